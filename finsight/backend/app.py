@@ -8,12 +8,28 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from datetime import datetime, timedelta
 import os
+import sys
 import json
 import sqlite3
 import asyncio
+import time
 from pathlib import Path
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
+from config import Config
+from db_connection import initialize_connection_manager
+from migrations import migrate
+from response_cache import get_dashboard_cache
+from lazy_imports import start_warmup, get_warmup_status
+from fire_engine import solve_months, whole_months, balance_after, calculator_years_to_fire, scenario_grid
+from loan_engine import schedule_payload, batch_schedules
+from monte_carlo import run_simulation, get_pool_stats, SimulationTimeout, DEFAULT_PATHS
+from statement_importer import StatementImporter, StatementError, detect_format
+from transaction_store import (
+    normalize_date, insert_transaction, insert_transactions, validate_transaction, get_month_totals,
+    list_transactions, encode_cursor, decode_cursor, parse_amount_filter, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
 
 # Load environment variables
 load_dotenv()
@@ -29,16 +45,32 @@ except ImportError as e:
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'finsight-local-secret-key-2025'
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_CONTENT_LENGTH
+app.config['UPLOAD_FOLDER'] = Config.UPLOAD_FOLDER
 
-# Initialize extensions
-CORS(app)
+# Initialize extensions; web clients read the next keyset page from X-Next-Cursor
+CORS(app, expose_headers=['X-Next-Cursor'])
 
 # Database setup
 DB_PATH = 'finsight.db'
 
+# Shared connection pool (FINSIGHT_DB_POOLING=0 restores connect-per-request)
+db_manager = initialize_connection_manager(DB_PATH)
+
+# Per-user dashboard cache, invalidated by bumping the user's data version on every write
+dashboard_cache = get_dashboard_cache()
+
+# Background statement imports
+statement_importer = StatementImporter(db_manager, on_insert=dashboard_cache.bump)
+
 def init_db():
     """Initialize the SQLite database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
+    with db_manager.connection() as conn:
+        create_tables(conn)
+        migrate(conn)
+
+def create_tables(conn):
+    """Create the base tables if they don't exist"""
     cursor = conn.cursor()
     
     # Users table
@@ -95,7 +127,6 @@ def init_db():
     ''')
     
     conn.commit()
-    conn.close()
 
 # API Routes
 
@@ -105,71 +136,100 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'message': 'FinSight Backend API is running',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now().isoformat(),
+        'dashboard_cache': dashboard_cache.get_stats(),
+        'monte_carlo': get_pool_stats(),
+        'warmup': get_warmup_status()
     })
 
 @app.route('/api/dashboard/summary/<int:user_id>', methods=['GET'])
 def get_dashboard_summary(user_id):
     """Get dashboard summary data for a user"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Get current month's transactions
-        current_month = datetime.now().strftime('%Y-%m')
-        
-        # Total spending this month
-        cursor.execute('''
-            SELECT SUM(amount) FROM transactions 
-            WHERE user_id = ? AND transaction_type = 'expense' 
-            AND date LIKE ?
-        ''', (user_id, f'{current_month}%'))
-        spending = cursor.fetchone()[0] or 0
-        
-        # Total income this month
-        cursor.execute('''
-            SELECT SUM(amount) FROM transactions 
-            WHERE user_id = ? AND transaction_type = 'income' 
-            AND date LIKE ?
-        ''', (user_id, f'{current_month}%'))
-        income = cursor.fetchone()[0] or 0
-        
-        # Calculate savings
-        savings = income - spending
-        
-        # Get recent transactions
-        cursor.execute('''
-            SELECT id, amount, category, description, date, transaction_type
-            FROM transactions 
-            WHERE user_id = ? 
-            ORDER BY date DESC LIMIT 10
-        ''', (user_id,))
-        
-        transactions = []
-        for row in cursor.fetchall():
-            transactions.append({
-                'id': row[0],
-                'amount': row[1],
-                'category': row[2],
-                'description': row[3],
-                'date': row[4],
-                'type': row[5]
-            })
-        
-        # Calculate financial health score (simplified)
-        health_score = min(100, max(0, 60 + (savings / max(income, 1)) * 40))
-        
-        conn.close()
-        
-        return jsonify({
+        # Keyed by month too, so the summary rolls over with the calendar
+        month = datetime.now().strftime('%Y-%m')
+        version = dashboard_cache.version(user_id)
+        summary = dashboard_cache.get('summary', user_id, month)
+        if summary is not None:
+            return jsonify(summary)
+        
+        with db_manager.connection() as conn:
+            cursor = conn.cursor()
+        
+            # Current month's totals come from the incrementally maintained rollups
+            totals = get_month_totals(conn, user_id, month)
+            spending = totals['expense']
+            income = totals['income']
+        
+            # Calculate savings
+            savings = income - spending
+        
+            # Get recent transactions
+            cursor.execute('''
+                SELECT id, amount, category, description, date, transaction_type
+                FROM transactions 
+                WHERE user_id = ? 
+                ORDER BY date DESC LIMIT 10
+            ''', (user_id,))
+        
+            transactions = []
+            for row in cursor.fetchall():
+                transactions.append({
+                    'id': row[0],
+                    'amount': row[1],
+                    'category': row[2],
+                    'description': row[3],
+                    'date': row[4],
+                    'type': row[5]
+                })
+        
+            # Calculate financial health score (simplified)
+            health_score = min(100, max(0, 60 + (savings / max(income, 1)) * 40))
+        
+        summary = {
             'spending': spending,
             'income': income,
             'savings': savings,
             'health_score': round(health_score),
             'recent_transactions': transactions,
             'budget_utilization': 75  # Mock data for now
+        }
+        dashboard_cache.set('summary', user_id, summary, month, version=version)
+        return jsonify(summary)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/transactions', methods=['GET'])
+def get_transactions():
+    """List a user's transactions, newest first, one keyset page at a time"""
+    try:
+        user_id = request.args.get('user_id', type=int)
+        if user_id is None:
+            return jsonify({'error': 'user_id is required'}), 400
+        
+        with db_manager.connection() as conn:
+            transactions, next_cursor = list_transactions(
+                conn,
+                user_id,
+                cursor=request.args.get('cursor'),
+                limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+                category=request.args.get('category'),
+                transaction_type=request.args.get('type'),
+                min_amount=parse_amount_filter(request.args.get('min_amount'), 'min_amount'),
+                max_amount=parse_amount_filter(request.args.get('max_amount'), 'max_amount'),
+                start_date=request.args.get('start_date'),
+                end_date=request.args.get('end_date')
+            )
+        
+        return jsonify({
+            'transactions': transactions,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -183,23 +243,23 @@ def add_transaction():
         if not all(field in data for field in required_fields):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO transactions (user_id, amount, category, description, transaction_type)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            data['user_id'],
-            data['amount'],
-            data['category'],
-            data.get('description', ''),
-            data['transaction_type']
-        ))
-        
-        transaction_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        try:
+            transaction_date = normalize_date(data.get('date'))
+        except ValueError:
+            return jsonify({'error': 'Invalid date format, expected ISO 8601'}), 400
+        
+        with db_manager.connection() as conn:
+            # Row insert and rollup update commit together
+            transaction_id = insert_transaction(
+                conn,
+                data['user_id'],
+                data['amount'],
+                data['category'],
+                data.get('description', ''),
+                transaction_date,
+                data['transaction_type']
+            )
+        dashboard_cache.bump(data['user_id'])
         
         return jsonify({
             'message': 'Transaction added successfully',
@@ -209,6 +269,129 @@ def add_transaction():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Rows validated and inserted per executemany call
+BULK_CHUNK_SIZE = 1000
+
+def _iter_bulk_payload():
+    """
+    Yield (index, row) pairs from a bulk request body.
+
+    NDJSON bodies are read line by line from the request stream so large
+    imports are never held in memory at once; anything else is parsed as a
+    JSON array. Lines that are not valid JSON are yielded as ValueError.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonlines'):
+        index = 0
+        for line in iter(request.stream.readline, b''):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield index, json.loads(line)
+            except ValueError:
+                yield index, ValueError('Malformed JSON line')
+            index += 1
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            raise ValueError('Expected a JSON array of transactions or an NDJSON body')
+        yield from enumerate(rows)
+
+@app.route('/api/transactions/bulk', methods=['POST'])
+def add_transactions_bulk():
+    """Add many transactions in one request and one database transaction"""
+    try:
+        start = time.perf_counter()
+        errors = []
+        inserted = 0
+        received = 0
+        chunk = []
+        user_ids = set()
+        
+        with db_manager.connection() as conn:
+            conn.execute('BEGIN')
+            for index, row in _iter_bulk_payload():
+                received += 1
+                if isinstance(row, ValueError):
+                    errors.append({'index': index, 'error': str(row)})
+                    continue
+                try:
+                    chunk.append(validate_transaction(row))
+                    user_ids.add(chunk[-1][0])
+                except ValueError as e:
+                    errors.append({'index': index, 'error': str(e)})
+                    continue
+                
+                if len(chunk) >= BULK_CHUNK_SIZE:
+                    inserted += insert_transactions(conn, chunk)
+                    chunk = []
+            
+            inserted += insert_transactions(conn, chunk)
+        
+        if inserted:
+            for user_id in user_ids:
+                dashboard_cache.bump(user_id)
+        
+        elapsed = time.perf_counter() - start
+        return jsonify({
+            'message': f'Inserted {inserted} of {received} transactions',
+            'received': received,
+            'inserted': inserted,
+            'failed': len(errors),
+            'errors': errors,
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'rows_per_second': round(inserted / elapsed, 1) if elapsed > 0 else 0
+        }), 201 if inserted else 400
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/transactions/import', methods=['POST'])
+def import_statement():
+    """Upload a CSV or OFX bank statement for background import"""
+    try:
+        upload = request.files.get('file')
+        user_id = request.form.get('user_id', type=int)
+        if upload is None or not upload.filename or user_id is None:
+            return jsonify({'error': 'A statement file and user_id are required'}), 400
+        
+        filename = secure_filename(upload.filename)
+        detect_format(filename)
+        
+        mapping = json.loads(request.form['mapping']) if request.form.get('mapping') else None
+        
+        # Spool to disk so the import worker can stream it
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        path = os.path.join(app.config['UPLOAD_FOLDER'], f'{os.urandom(8).hex()}_{filename}')
+        upload.save(path)
+        
+        job = statement_importer.submit(
+            path, user_id, filename,
+            mapping=mapping,
+            date_format=request.form.get('date_format')
+        )
+        
+        return jsonify({
+            'message': 'Statement import started',
+            'job_id': job.job_id,
+            'status_url': f'/api/transactions/import/{job.job_id}'
+        }), 202
+        
+    except (StatementError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/transactions/import/<job_id>', methods=['GET'])
+def get_import_status(job_id):
+    """Poll the progress of a statement import"""
+    job = statement_importer.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Import job not found'}), 404
+    return jsonify(job.to_dict())
+
 @app.route('/api/financial-tips', methods=['GET'])
 def get_financial_tips():
     """Get financial tips and advice"""
@@ -252,12 +435,20 @@ def calculate_emi():
         total_payment = emi * tenure
         total_interest = total_payment - principal
         
-        return jsonify({
+        result = {
             'emi': round(emi, 2),
             'total_payment': round(total_payment, 2),
             'total_interest': round(total_interest, 2)
-        })
+        }
+        
+        # Full amortization schedule on request, or when events change the totals
+        if data.get('include_schedule') or data.get('prepayments') or data.get('rate_changes'):
+            result.update(schedule_payload(principal, float(data['rate']), tenure, data))
+        
+        return jsonify(result)
         
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid input: {e}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -275,29 +466,57 @@ def calculate_fire():
         fire_number = annual_expenses * 25
         remaining_needed = fire_number - current_savings
         
-        # Calculate years to FIRE
-        if monthly_savings > 0 and expected_return > 0:
-            monthly_return = expected_return / 12
-            if remaining_needed <= 0:
-                years_to_fire = 0
-            else:
-                months = 0
-                balance = current_savings
-                while balance < fire_number and months < 600:  # Max 50 years
-                    balance = balance * (1 + monthly_return) + monthly_savings
-                    months += 1
-                years_to_fire = months / 12
-        else:
-            years_to_fire = remaining_needed / (monthly_savings * 12) if monthly_savings > 0 else float('inf')
+        # Calculate years to FIRE (closed form, whole months capped at 50 years)
+        years_to_fire = calculator_years_to_fire(current_savings, monthly_savings, expected_return, fire_number)
         
-        return jsonify({
+        result = {
             'fire_number': round(fire_number, 2),
             'current_savings': current_savings,
             'remaining_needed': round(remaining_needed, 2),
             'years_to_fire': round(years_to_fire, 1),
             'monthly_savings_needed': round(remaining_needed / (years_to_fire * 12), 2) if years_to_fire > 0 and years_to_fire != float('inf') else 0
-        })
+        }
         
+        # Monte Carlo mode: randomized returns instead of a constant expected_return
+        if data.get('mode') == 'monte_carlo':
+            seed = data.get('seed')
+            result['monte_carlo'] = run_simulation(
+                current_savings=current_savings,
+                monthly_savings=monthly_savings,
+                annual_return=expected_return,
+                annual_volatility=float(data.get('volatility', 15)) / 100,
+                target=fire_number,
+                years=int(data.get('years', 50)),
+                paths=int(data.get('paths', DEFAULT_PATHS)),
+                seed=int(seed) if seed is not None else None
+            )
+        
+        return jsonify(result)
+        
+    except SimulationTimeout as e:
+        return jsonify({'error': str(e)}), 503
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid input: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/calculator/fire/scenarios', methods=['POST'])
+def calculate_fire_scenarios():
+    """Years to FIRE over a grid of savings rates, returns and expense levels"""
+    try:
+        data = request.json
+        grid = scenario_grid(
+            monthly_income=float(data['monthly_income']),
+            current_savings=float(data.get('current_savings', 0)),
+            savings_rates=[float(x) for x in data.get('savings_rates', [10, 20, 30, 40, 50])],
+            annual_returns=[float(x) for x in data.get('annual_returns', [4, 6, 8, 10])],
+            annual_expenses=[float(x) for x in data['annual_expenses']],
+            withdrawal_rate=float(data.get('withdrawal_rate', 4))
+        )
+        return jsonify(grid)
+        
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid input: {e}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -309,6 +528,8 @@ if __name__ == '__main__':
     print("📊 Dashboard: http://localhost:5000/api/health")
     print("💰 Local SQLite database initialized")
     
+    # numpy (FIRE, loan and Monte Carlo engines) loads in the background once the server is up
+    start_warmup(('numpy',))
     app.run(debug=True, host='0.0.0.0', port=5000)
     transaction_type = db.Column(db.String(20), default='expense')  # income, expense
     is_recurring = db.Column(db.Boolean, default=False)
@@ -345,6 +566,85 @@ class Loan(db.Model):
     start_date = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='active')
 
+class MonthlyRollup(db.Model):
+    """Per-user monthly totals, maintained alongside every Transaction write"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    category = db.Column(db.String(50), primary_key=True)
+    transaction_type = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.Float, default=0.0, nullable=False)
+    txn_count = db.Column(db.Integer, default=0, nullable=False)
+
+ROLLUP_KEY = ('user_id', 'month', 'category', 'transaction_type')
+
+def _dialect_insert(table):
+    """INSERT with ON CONFLICT support for the configured database"""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+def apply_rollup_delta(transaction, sign=1):
+    """
+    Add (sign=1) or back out (sign=-1) a transaction in the monthly rollups.
+    
+    A single upsert that adds to the stored total in SQL, so concurrent
+    writers neither lose updates nor collide creating the same row.
+    """
+    stmt = _dialect_insert(MonthlyRollup.__table__).values(
+        user_id=transaction.user_id,
+        month=(transaction.date or datetime.utcnow()).strftime('%Y-%m'),
+        category=transaction.category,
+        transaction_type=transaction.transaction_type,
+        total=sign * transaction.amount,
+        txn_count=sign
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={
+            'total': MonthlyRollup.total + stmt.excluded.total,
+            'txn_count': MonthlyRollup.txn_count + stmt.excluded.txn_count
+        }
+    ))
+
+def get_rollup_totals(user_id, month):
+    """Get income and expense totals for a YYYY-MM month from the rollups"""
+    totals = {'income': 0, 'expense': 0}
+    rows = db.session.query(
+        MonthlyRollup.transaction_type, db.func.sum(MonthlyRollup.total)
+    ).filter(
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.month == month
+    ).group_by(MonthlyRollup.transaction_type).all()
+    for transaction_type, total in rows:
+        totals[transaction_type] = total or 0
+    return totals
+
+def rebuild_monthly_rollups():
+    """Recompute every rollup row from the raw transactions"""
+    month = db.func.to_char(Transaction.date, 'YYYY-MM') if db.engine.dialect.name == 'postgresql' \
+        else db.func.strftime('%Y-%m', Transaction.date)
+    totals = db.select(
+        Transaction.user_id, month, Transaction.category, Transaction.transaction_type,
+        db.func.sum(Transaction.amount), db.func.count()
+    ).where(
+        # Legacy rows without a date or type have no rollup to go in
+        Transaction.date.is_not(None), Transaction.transaction_type.is_not(None)
+    ).group_by(Transaction.user_id, month, Transaction.category, Transaction.transaction_type)
+    
+    db.session.query(MonthlyRollup).delete()
+    db.session.execute(MonthlyRollup.__table__.insert().from_select(list(ROLLUP_KEY) + ['total', 'txn_count'], totals))
+    db.session.commit()
+
+def create_database_tables():
+    """Create missing tables, backfilling the rollups when their table is new"""
+    had_rollups = db.inspect(db.engine).has_table(MonthlyRollup.__tablename__)
+    db.create_all()
+    if not had_rollups:
+        # Existing transactions would otherwise be missing from dashboard totals
+        rebuild_monthly_rollups()
+
 # API Routes
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -352,27 +652,27 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'dashboard_cache': dashboard_cache.get_stats(),
+        'monte_carlo': get_pool_stats(),
+        'warmup': get_warmup_status()
     })
 
 @app.route('/api/dashboard/<int:user_id>', methods=['GET'])
 def get_dashboard_data(user_id):
     """Get dashboard summary data"""
     try:
-        # Calculate current month spending
-        current_month = datetime.now().replace(day=1)
-        spending = db.session.query(db.func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.transaction_type == 'expense',
-            Transaction.date >= current_month
-        ).scalar() or 0
-        
-        # Calculate current month income
-        income = db.session.query(db.func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.transaction_type == 'income',
-            Transaction.date >= current_month
-        ).scalar() or 0
+        greeting = f"Good {'morning' if datetime.now().hour < 12 else 'afternoon' if datetime.now().hour < 18 else 'evening'}!"
+        month = datetime.now().strftime('%Y-%m')
+        version = dashboard_cache.version(user_id)
+        dashboard = dashboard_cache.get('dashboard', user_id, month)
+        if dashboard is not None:
+            return jsonify({**dashboard, 'greeting': greeting})
+        
+        # Current month spending and income from the rollups
+        totals = get_rollup_totals(user_id, month)
+        spending = totals['expense']
+        income = totals['income']
         
         # Calculate savings
         savings = income - spending
@@ -383,14 +683,16 @@ def get_dashboard_data(user_id):
         # Calculate financial health score (simplified)
         health_score = min(100, max(0, (savings / max(income, 1)) * 100))
         
-        return jsonify({
+        dashboard = {
             'spending': spending,
             'income': income,
             'savings': savings,
             'health_score': round(health_score, 1),
-            'active_goals': len(goals),
-            'greeting': f"Good {'morning' if datetime.now().hour < 12 else 'afternoon' if datetime.now().hour < 18 else 'evening'}!"
-        })
+            'active_goals': len(goals)
+        }
+        # The greeting depends on the time of day, so it is never cached
+        dashboard_cache.set('dashboard', user_id, dashboard, month, version=version)
+        return jsonify({**dashboard, 'greeting': greeting})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -399,15 +701,49 @@ def transactions():
     """Handle transaction operations"""
     if request.method == 'GET':
         user_id = request.args.get('user_id', 1)
-        transactions = Transaction.query.filter_by(user_id=user_id).order_by(Transaction.date.desc()).limit(50).all()
-        return jsonify([{
+        limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+        query = Transaction.query.filter_by(user_id=user_id)
+        
+        # Optional filters
+        if request.args.get('category'):
+            query = query.filter(Transaction.category == request.args['category'])
+        if request.args.get('type'):
+            query = query.filter(Transaction.transaction_type == request.args['type'])
+        try:
+            min_amount = parse_amount_filter(request.args.get('min_amount'), 'min_amount')
+            max_amount = parse_amount_filter(request.args.get('max_amount'), 'max_amount')
+            if min_amount is not None:
+                query = query.filter(Transaction.amount >= min_amount)
+            if max_amount is not None:
+                query = query.filter(Transaction.amount <= max_amount)
+            if request.args.get('start_date'):
+                query = query.filter(Transaction.date >= datetime.fromisoformat(request.args['start_date']))
+            if request.args.get('end_date'):
+                query = query.filter(Transaction.date < datetime.fromisoformat(request.args['end_date']))
+            
+            # Keyset pagination on (date, id) instead of a fixed latest-50 window
+            if request.args.get('cursor'):
+                cursor_date, cursor_id = decode_cursor(request.args['cursor'])
+                query = query.filter(
+                    db.tuple_(Transaction.date, Transaction.id) < (datetime.fromisoformat(cursor_date), cursor_id)
+                )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        transactions = query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1).all()
+        
+        response = jsonify([{
             'id': t.id,
             'amount': t.amount,
             'category': t.category,
             'description': t.description,
             'date': t.date.isoformat(),
             'type': t.transaction_type
-        } for t in transactions])
+        } for t in transactions[:limit]])
+        # The body stays a plain list for existing clients; the next page is in a header
+        if len(transactions) > limit:
+            response.headers['X-Next-Cursor'] = encode_cursor(transactions[limit - 1].date.isoformat(), transactions[limit - 1].id)
+        return response
     
     elif request.method == 'POST':
         data = request.json
@@ -419,7 +755,10 @@ def transactions():
             transaction_type=data.get('type', 'expense')
         )
         db.session.add(transaction)
+        db.session.flush()  # populate the default date before rolling up
+        apply_rollup_delta(transaction)
         db.session.commit()
+        dashboard_cache.bump(transaction.user_id)
         return jsonify({'status': 'success', 'id': transaction.id}), 201
 
 @app.route('/api/budgets', methods=['GET', 'POST'])
@@ -461,6 +800,7 @@ def budgets():
         )
         db.session.add(budget)
         db.session.commit()
+        dashboard_cache.bump(budget.user_id)
         return jsonify({'status': 'success', 'id': budget.id}), 201
 
 @app.route('/api/goals', methods=['GET', 'POST'])
@@ -491,6 +831,7 @@ def goals():
         )
         db.session.add(goal)
         db.session.commit()
+        dashboard_cache.bump(goal.user_id)
         return jsonify({'status': 'success', 'id': goal.id}), 201
 
 @app.route('/api/fire/calculate', methods=['POST'])
@@ -511,13 +852,11 @@ def calculate_fire():
     if monthly_savings <= 0:
         return jsonify({'error': 'Monthly savings must be greater than 0'}), 400
     
-    balance = current_savings
-    months = 0
     monthly_return = annual_return / 12
     
-    while balance < target_corpus and months < 600:  # Cap at 50 years
-        balance = balance * (1 + monthly_return) + monthly_savings
-        months += 1
+    # Closed-form solve, rounded up to whole months and capped at 50 years
+    months = whole_months(solve_months(current_savings, monthly_savings, monthly_return, target_corpus))
+    balance = float(balance_after(current_savings, monthly_savings, monthly_return, months))
     
     fire_date = datetime.now() + timedelta(days=months * 30)
     
@@ -549,17 +888,77 @@ def calculate_emi():
     total_amount = emi * tenure_months
     total_interest = total_amount - principal
     
-    return jsonify({
+    result = {
         'emi': round(emi, 2),
         'total_amount': round(total_amount, 2),
         'total_interest': round(total_interest, 2)
-    })
+    }
+    
+    # Full amortization schedule on request, or when events change the totals
+    if data.get('include_schedule') or data.get('prepayments') or data.get('rate_changes'):
+        try:
+            schedule = schedule_payload(principal, annual_rate * 100, tenure_months, data)
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid schedule options: {e}'}), 400
+        result.update({
+            'months': schedule['months'],
+            'total_amount': schedule['total_payment'],
+            'total_interest': schedule['total_interest'],
+            'schedule': schedule['schedule']
+        })
+    
+    return jsonify(result)
+
+@app.route('/api/loans/<int:user_id>/schedules', methods=['GET'])
+def get_loan_schedules(user_id):
+    """Amortize all of a user's active loans in one batch"""
+    loans = Loan.query.filter_by(user_id=user_id, status='active').all()
+    if not loans:
+        return jsonify({'loans': []})
+    
+    # Each loan is re-amortized from its outstanding amount over the months left
+    now = datetime.utcnow()
+    remaining = []
+    for loan in loans:
+        start = loan.start_date or now
+        elapsed = (now.year - start.year) * 12 + (now.month - start.month)
+        remaining.append(max(loan.tenure_months - elapsed, 1))
+    
+    batch = batch_schedules(
+        [loan.outstanding_amount for loan in loans],
+        [loan.interest_rate for loan in loans],
+        remaining
+    )
+    include_schedule = request.args.get('include_schedule', 'false').lower() == 'true'
+    
+    results = []
+    for i, loan in enumerate(loans):
+        months = remaining[i]
+        entry = {
+            'id': loan.id,
+            'lender_name': loan.lender_name,
+            'outstanding_amount': loan.outstanding_amount,
+            'interest_rate': loan.interest_rate,
+            'remaining_months': months,
+            'emi': round(float(batch['emi'][i]), 2),
+            'total_interest': round(float(batch['interest'][i, :months].sum()), 2)
+        }
+        if include_schedule:
+            entry['schedule'] = [{
+                'month': k + 1,
+                'interest': round(float(batch['interest'][i, k]), 2),
+                'principal': round(float(batch['principal'][i, k]), 2),
+                'closing_balance': round(float(batch['closing_balance'][i, k]), 2)
+            } for k in range(months)]
+        results.append(entry)
+    
+    return jsonify({'loans': results})
 
 # Initialize database
 @app.before_first_request
 def create_tables():
     """Create database tables if they don't exist"""
-    db.create_all()
+    create_database_tables()
     
     # Create default user if none exists
     if not User.query.first():
@@ -571,7 +970,7 @@ def create_tables():
 if __name__ == '__main__':
     # Create tables
     with app.app_context():
-        db.create_all()
+        create_database_tables()
         
         # Create default user if none exists
         if not User.query.first():
@@ -580,7 +979,12 @@ if __name__ == '__main__':
             db.session.add(default_user)
             db.session.commit()
             print("Created default user: demo/demo123")
+        
+        if '--rebuild-rollups' in sys.argv:
+            rebuild_monthly_rollups()
+            print("Rebuilt monthly rollups from transactions")
     
     print("Starting FinSight Backend Server...")
     print("Access the API at: http://localhost:5000")
+    start_warmup(('numpy',))
     app.run(debug=True, host='0.0.0.0', port=5000)
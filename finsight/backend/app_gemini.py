@@ -22,8 +22,9 @@ CORS(app, origins=['*'])
 # Initialize Gemini AI service
 try:
     from gemini_service import initialize_gemini_service
+    from llm_provider import uses_stub_provider
     gemini_api_key = os.getenv('GEMINI_API_KEY')
-    if gemini_api_key:
+    if gemini_api_key or uses_stub_provider():
         initialize_gemini_service(gemini_api_key)
         print("✅ Gemini AI service initialized successfully")
     else:
@@ -35,6 +36,14 @@ except Exception as e:
 from chatbot_routes import chatbot_bp
 app.register_blueprint(chatbot_bp)
 
+from lazy_imports import start_warmup, get_warmup_status
+
+def start_background_warmup():
+    """Import the Gemini SDK and build the model off the request path, shortly after start-up"""
+    from gemini_service import get_gemini_service
+    gemini_service = get_gemini_service()
+    start_warmup(hooks=[gemini_service.provider.warm] if gemini_service else [])
+
 # Basic API routes
 @app.route('/', methods=['GET'])
 def home():
@@ -46,6 +55,8 @@ def home():
         'endpoints': {
             'health': '/api/health',
             'chatbot': '/api/chatbot/chat',
+            'chatbot_stream': '/api/chatbot/chat/stream',
+            'chatbot_batch': '/api/chatbot/chat/batch',
             'chat_history': '/api/chatbot/history/<session_id>',
             'suggestions': '/api/chatbot/suggestions'
         }
@@ -65,6 +76,7 @@ def health_check():
         'status': 'healthy',
         'service': 'FinSight Backend API',
         'gemini_ai': 'available' if gemini_status else 'unavailable',
+        'warmup': get_warmup_status(),
         'message': 'Server is running successfully'
     })
 
@@ -88,6 +100,7 @@ if __name__ == '__main__':
     print("🤖 Chatbot Endpoint: http://localhost:5000/api/chatbot/chat")
     print("💡 API Documentation: http://localhost:5000/")
     
+    start_background_warmup()
     app.run(
         debug=True,
         host='0.0.0.0',
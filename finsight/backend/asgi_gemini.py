@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+FinSight ASGI Entry Point with Gemini AI Integration
+Serves chat requests natively on the server's event loop; every other route falls through to the Flask app
+
+Run with any ASGI server, e.g.: uvicorn asgi_gemini:app --workers 1
+"""
+
+import asyncio
+import json
+import sys
+from io import BytesIO
+from typing import Dict, List, Tuple
+
+from app_gemini import app as flask_app, start_background_warmup
+from chatbot_routes import process_chat, process_chat_batch, open_chat_stream, SSE_HEADERS
+
+# Routes served as coroutines; awaiting the LLM here holds no thread
+ASYNC_ROUTES = {
+    ('POST', '/api/chatbot/chat'): process_chat,
+    ('POST', '/api/chatbot/chat/batch'): process_chat_batch,
+}
+
+# Routes whose responses are streamed as server-sent events
+STREAM_ROUTES = {
+    ('POST', '/api/chatbot/chat/stream'): open_chat_stream,
+}
+
+async def _read_body(receive) -> bytes:
+    """Read the full request body from the ASGI receive channel"""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+async def _send_response(send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+    """Send a complete HTTP response"""
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def _send_json(send, status: int, payload: Dict):
+    """Send a JSON response with the same CORS policy as app_gemini"""
+    body = json.dumps(payload).encode('utf-8')
+    await _send_response(send, status, [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+        (b'access-control-allow-origin', b'*'),
+    ], body)
+
+async def _send_stream(send, events):
+    """Send an SSE response, flushing each event as soon as it is produced"""
+    headers = [(b'content-type', b'text/event-stream'), (b'access-control-allow-origin', b'*')]
+    headers += [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in SSE_HEADERS.items()]
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    try:
+        async for event in events:
+            await send({'type': 'http.response.body', 'body': event.encode('utf-8'), 'more_body': True})
+    finally:
+        await events.aclose()
+    await send({'type': 'http.response.body', 'body': b''})
+
+def _wsgi_environ(scope: Dict, body: bytes) -> Dict:
+    """Build a WSGI environ from an ASGI HTTP scope"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').lower()
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+def _call_wsgi(environ: Dict) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """Run the Flask app for one request (on a worker thread)"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(k.encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+    result = flask_app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+async def app(scope, receive, send):
+    """ASGI application"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                start_background_warmup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    body = await _read_body(receive)
+    route = (scope['method'], scope['path'])
+    handler = ASYNC_ROUTES.get(route)
+    if handler is None and route not in STREAM_ROUTES:
+        status, headers, content = await asyncio.to_thread(_call_wsgi, _wsgi_environ(scope, body))
+        await _send_response(send, status, headers, content)
+        return
+
+    try:
+        data = json.loads(body) if body else {}
+        if not isinstance(data, dict):
+            raise ValueError
+    except ValueError:
+        await _send_json(send, 400, {'success': False, 'error': 'Request body must be a JSON object'})
+        return
+
+    if handler is None:
+        # Validation reads the chat store, which may block on the SQLite lock
+        events, status = await asyncio.to_thread(STREAM_ROUTES[route], data)
+        if status == 200:
+            await _send_stream(send, events)
+        else:
+            await _send_json(send, status, events)
+        return
+
+    payload, status = await handler(data)
+    await _send_json(send, status, payload)
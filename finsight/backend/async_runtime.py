@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Shared Async Runtime for FinSight
+One long-lived event loop on a background thread for sync (WSGI) code that needs to await coroutines
+"""
+
+import asyncio
+import threading
+from concurrent.futures import TimeoutError
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional
+
+class BackgroundLoop:
+    """
+    Runs a single asyncio event loop on a daemon thread.
+
+    Sync request handlers submit coroutines with run() instead of creating and
+    closing a new loop per request, so every chat in the process shares one
+    loop, its default executor and any connections opened on it.
+    """
+
+    def __init__(self, name: str = 'finsight-async'):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread if it is not running and return the loop"""
+        with self._lock:
+            if self.loop is None or self.loop.is_closed():
+                self.loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._serve, name=self.name, daemon=True)
+                self._thread.start()
+            return self.loop
+
+    def _serve(self):
+        """Loop thread body"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and block the calling thread for its result"""
+        loop = self.start()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError('run() would deadlock when called from the loop thread')
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def iterate(self, agen: AsyncIterator) -> Iterator:
+        """
+        Consume an async generator from sync code, one item per loop round-trip.
+
+        Closing the returned generator (e.g. a streaming client disconnecting)
+        closes the async generator on the loop as well.
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(agen.aclose())
+
+    def stop(self):
+        """Stop the loop and wait for its thread to exit"""
+        with self._lock:
+            if self.loop is None or self.loop.is_closed():
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            self.loop.close()
+
+# Global instance
+background_loop = None
+_background_loop_lock = threading.Lock()
+
+def get_background_loop() -> BackgroundLoop:
+    """Get the process-wide background loop, starting it on first use"""
+    global background_loop
+    with _background_loop_lock:
+        if background_loop is None:
+            background_loop = BackgroundLoop()
+    background_loop.start()
+    return background_loop
+
+def run_coroutine(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the shared background loop from sync code"""
+    return get_background_loop().run(coro, timeout)
+
+def iterate_async(agen: AsyncIterator) -> Iterator:
+    """Iterate an async generator on the shared background loop from sync code"""
+    return get_background_loop().iterate(agen)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the FinSight chatbot endpoint
+Fires a burst of concurrent chats at one worker process, with the LLM replaced
+by a fixed-latency simulated advisor, and compares:
+
+  per-request loop  the old handler: a new event loop per request on W threads
+  shared loop       the WSGI route awaiting on the shared background loop, W threads
+  asgi              asgi_gemini.app, every chat a task on a single event loop
+
+Usage: python bench_chat.py [--chats 500] [--workers 16] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Keep benchmark chat history out of the real database
+os.environ.setdefault('FINSIGHT_CHAT_DB', os.path.join(tempfile.mkdtemp(), 'bench_chat.db'))
+
+import chatbot_routes
+from asgi_gemini import app as asgi_app, flask_app
+
+class SimulatedAdvisor:
+    """Stands in for GeminiFinancialAdvisor with a fixed, non-blocking latency"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def get_chat_response(self, message, user_id, context=None, conversation_history=None, use_cache=True):
+        await asyncio.sleep(self.latency)
+        return {
+            'success': True,
+            'response': f'Simulated advice for: {message}',
+            'suggestions': [],
+            'quick_replies': [],
+            'intent': 'general',
+            'timestamp': datetime.now().isoformat()
+        }
+
+class ThreadSampler:
+    """Records the peak number of live threads while a benchmark runs"""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._done.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+
+def chat_payload(index: int) -> dict:
+    return {'message': f'How should I budget? ({index})', 'user_id': f'bench_{index % 50}',
+            'session_id': f'bench_session_{index}'}
+
+def run_per_request_loop(chats: int, workers: int):
+    """The handler as it was: create, run and close an event loop per request"""
+    def handle(index):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(chatbot_routes.process_chat(chat_payload(index)))[1]
+        finally:
+            loop.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(handle, range(chats)))
+
+def run_shared_loop(chats: int, workers: int):
+    """The WSGI route, awaiting on the shared background loop"""
+    client = flask_app.test_client()
+
+    def handle(index):
+        return client.post('/api/chatbot/chat', json=chat_payload(index)).status_code
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(handle, range(chats)))
+
+async def _asgi_request(index: int) -> int:
+    """Drive one chat through the ASGI app with in-memory channels"""
+    body = json.dumps(chat_payload(index)).encode()
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/chatbot/chat',
+             'headers': [(b'content-type', b'application/json')]}
+    status = {}
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status['code'] = message['status']
+
+    await asgi_app(scope, receive, send)
+    return status['code']
+
+def run_asgi(chats: int, workers: int):
+    """asgi_gemini: all chats as tasks on one loop"""
+    async def burst():
+        return await asyncio.gather(*(_asgi_request(i) for i in range(chats)))
+    return asyncio.run(burst())
+
+def main():
+    parser = argparse.ArgumentParser(description='FinSight chatbot concurrency benchmark')
+    parser.add_argument('--chats', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=16, help='request threads for the WSGI modes')
+    parser.add_argument('--latency', type=float, default=0.5, help='simulated LLM latency in seconds')
+    args = parser.parse_args()
+
+    chatbot_routes.GEMINI_AVAILABLE = True
+    advisor = SimulatedAdvisor(args.latency)
+    chatbot_routes.get_gemini_service = lambda: advisor
+
+    print(f"🤖 {args.chats} concurrent chats, {args.latency}s simulated LLM latency, {args.workers} WSGI threads\n")
+    print(f"   {'mode':<18}{'wall s':>9}{'chats/s':>10}{'peak threads':>14}{'errors':>8}")
+    for name, runner in (('per-request loop', run_per_request_loop),
+                         ('shared loop', run_shared_loop),
+                         ('asgi', run_asgi)):
+        with ThreadSampler() as sampler:
+            start = time.perf_counter()
+            statuses = runner(args.chats, args.workers)
+            elapsed = time.perf_counter() - start
+        errors = sum(1 for s in statuses if s != 200)
+        print(f"   {name:<18}{elapsed:9.2f}{args.chats / elapsed:10.1f}{sampler.peak:14d}{errors:8d}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark and query-plan check for the FinSight SQLite layer
+Builds a scratch database, then compares the dashboard queries before and
+after the schema migrations, and pooled vs per-request connections.
+
+Usage: python bench_db.py [--rows 200000] [--users 200] [--iterations 500]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db_connection import ConnectionManager
+from migrations import migrate, explain_query_plan
+from transaction_store import DATE_FORMAT, month_range
+
+LIKE_QUERY = '''
+    SELECT SUM(amount) FROM transactions
+    WHERE user_id = ? AND transaction_type = 'expense'
+    AND date LIKE ?
+'''
+
+RANGE_QUERY = '''
+    SELECT SUM(amount) FROM transactions
+    WHERE user_id = ? AND transaction_type = 'expense'
+    AND date >= ? AND date < ?
+'''
+
+def build_database(path: str, rows: int, users: int):
+    """Create the base schema and fill it with random transactions"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            description TEXT,
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            transaction_type TEXT DEFAULT 'expense'
+        )
+    ''')
+    rng = random.Random(42)
+    now = datetime.now()
+    categories = ['food', 'rent', 'travel', 'shopping', 'salary', 'utilities']
+    conn.executemany(
+        'INSERT INTO transactions (user_id, amount, category, description, date, transaction_type) VALUES (?, ?, ?, ?, ?, ?)',
+        (
+            (
+                rng.randint(1, users),
+                round(rng.uniform(1, 500), 2),
+                rng.choice(categories),
+                'benchmark row',
+                (now - timedelta(minutes=rng.randint(0, 60 * 24 * 730))).strftime(DATE_FORMAT),
+                'income' if rng.random() < 0.1 else 'expense'
+            )
+            for _ in range(rows)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+def time_queries(manager: ConnectionManager, sql: str, params_for, iterations: int, users: int) -> float:
+    """Run a query repeatedly through a connection manager, return ms per query"""
+    rng = random.Random(7)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with manager.connection() as conn:
+            conn.execute(sql, params_for(rng.randint(1, users))).fetchone()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description='FinSight SQLite benchmark')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    current_month = datetime.now().strftime('%Y-%m')
+    month_start, month_end = month_range()
+    like_params = lambda user_id: (user_id, f'{current_month}%')
+    range_params = lambda user_id: (user_id, month_start, month_end)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        print(f"📦 Building scratch database with {args.rows:,} rows...")
+        build_database(path, args.rows, args.users)
+
+        legacy = ConnectionManager(path, pooled=False)
+        with legacy.connection() as conn:
+            print("\n🔍 Query plan BEFORE migration (LIKE):")
+            for line in explain_query_plan(conn, LIKE_QUERY, like_params(1)):
+                print(f"   {line}")
+        before_ms = time_queries(legacy, LIKE_QUERY, like_params, args.iterations, args.users)
+
+        conn = sqlite3.connect(path)
+        migrate(conn)
+        conn.close()
+
+        pooled = ConnectionManager(path, pooled=True)
+        with pooled.connection() as conn:
+            print("\n🔍 Query plan AFTER migration (range):")
+            for line in explain_query_plan(conn, RANGE_QUERY, range_params(1)):
+                print(f"   {line}")
+
+        legacy_after_ms = time_queries(legacy, RANGE_QUERY, range_params, args.iterations, args.users)
+        pooled_after_ms = time_queries(pooled, RANGE_QUERY, range_params, args.iterations, args.users)
+        pooled.close_all()
+
+    print("\n⏱️  Monthly spending query, ms per request:")
+    print(f"   per-request connection, LIKE scan:    {before_ms:8.3f}")
+    print(f"   per-request connection, range+index:  {legacy_after_ms:8.3f}")
+    print(f"   pooled WAL connection, range+index:   {pooled_after_ms:8.3f}")
+
+if __name__ == '__main__':
+    main()
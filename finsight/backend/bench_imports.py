@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Import-time report for the FinSight server entry points
+Imports each module in a fresh interpreter under `python -X importtime` and
+reports its cold-start cost, the heaviest imports, and any library that is
+meant to load lazily but was imported eagerly. Exits non-zero on a failed
+import, a blown budget or an eager heavy import, so it works as a regression
+check.
+
+Usage: python bench_imports.py [--modules app_gemini simple_app app]
+                               [--budget-ms 1000] [--top 10] [--repeat 3] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_MODULES = ['app_gemini', 'simple_app', 'app']
+
+# Loaded on first use or by the background warm-up, never at import
+DEFERRED_MODULES = ('numpy', 'pandas', 'sklearn', 'reportlab', 'fpdf', 'google.generativeai', 'grpc')
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parse `-X importtime` lines into {module, self_us, cumulative_us, depth}"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append({
+            'module': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(name) - len(name.lstrip())) // 2
+        })
+    return rows
+
+def profile_import(module: str, workdir: str) -> Dict:
+    """Import one module in a fresh interpreter and summarize the import tree"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get('PYTHONPATH')]))
+    # Exercise the configured start-up path without touching the real databases
+    env.setdefault('GEMINI_API_KEY', 'import-report')
+    env['FINSIGHT_CHAT_DB'] = os.path.join(workdir, 'chat.db')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=workdir, env=env, capture_output=True, text=True)
+
+    rows = parse_importtime(result.stderr)
+    top_level = next((row for row in rows if row['module'] == module and row['depth'] == 0), None)
+    errors = [line for line in result.stderr.splitlines() if line and not line.startswith('import time:')]
+    loaded = {row['module'] for row in rows}
+    return {
+        'ok': result.returncode == 0,
+        'error': errors[-1] if result.returncode != 0 and errors else None,
+        'total_ms': round(top_level['cumulative_us'] / 1000, 1) if top_level else None,
+        'modules_imported': len(rows),
+        'eager_deferred': sorted(name for name in DEFERRED_MODULES if name in loaded),
+        'rows': rows
+    }
+
+def heaviest(rows: List[Dict], top: int) -> List[Dict]:
+    """Direct imports of the profiled module with the largest cumulative import time"""
+    direct = [row for row in rows if row['depth'] == 1]
+    return sorted(direct, key=lambda row: row['cumulative_us'], reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description='FinSight import-time regression check')
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES)
+    parser.add_argument('--budget-ms', type=float, default=1000, help='max cumulative import time per module')
+    parser.add_argument('--top', type=int, default=10, help='heaviest direct imports to list')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per module; the fastest is reported')
+    parser.add_argument('--json', help='write the report to this path')
+    args = parser.parse_args()
+
+    report = {}
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for module in args.modules:
+            runs = [profile_import(module, workdir) for _ in range(max(1, args.repeat))]
+            measured = [run for run in runs if run['total_ms'] is not None]
+            result = min(measured, key=lambda run: run['total_ms']) if measured else runs[0]
+
+            problems = []
+            if not result['ok']:
+                problems.append(f"import failed: {result['error']}")
+            if result['total_ms'] is not None and result['total_ms'] > args.budget_ms:
+                problems.append(f"{result['total_ms']:.0f}ms is over the {args.budget_ms:.0f}ms budget")
+            if result['eager_deferred']:
+                problems.append(f"eagerly imports {', '.join(result['eager_deferred'])}")
+            failures += bool(problems)
+
+            total = f"{result['total_ms']:.1f}ms" if result['total_ms'] is not None else 'n/a'
+            print(f"{'❌' if problems else '✅'} {module}: {total}, {result['modules_imported']} modules")
+            for problem in problems:
+                print(f"   ⚠️  {problem}")
+            for row in heaviest(result['rows'], args.top):
+                print(f"   {row['cumulative_us'] / 1000:8.1f}ms  {row['module']}")
+            print()
+
+            report[module] = {key: value for key, value in result.items() if key != 'rows'}
+            report[module]['heaviest'] = [
+                {'module': row['module'], 'cumulative_ms': round(row['cumulative_us'] / 1000, 1)}
+                for row in heaviest(result['rows'], args.top)
+            ]
+            report[module]['problems'] = problems
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'budget_ms': args.budget_ms, 'python': sys.version.split()[0], 'modules': report}, f, indent=2)
+        print(f"💾 Report saved to {args.json}")
+
+    print(f"{'❌' if failures else '✅'} {failures} of {len(args.modules)} modules failed the import check")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the chatbot keyword matcher
+Compares the keyword loops the chatbot used before (intent, quick-reply topic,
+fallback topic and the intent lookup inside the advisor's fallback) with the
+same lookups through FINANCE_KEYWORDS.first(), on short messages and
+~1000-token responses, after checking that both give the same categories on
+random texts.
+
+Usage: python bench_keywords.py [--texts 200] [--tokens 1000] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+
+from keyword_matcher import FINANCE_KEYWORDS
+
+FILLER = ('your', 'monthly', 'plan', 'should', 'include', 'a', 'simple', 'rule', 'for', 'each', 'paycheck',
+          'consider', 'the', 'following', 'steps', 'first', 'then', 'review', 'this', 'every', 'quarter')
+
+def legacy_first(text: str, table: str, default: str) -> str:
+    """The old matching: lowercase, then scan once per keyword until a category hits"""
+    lowered = text.lower()
+    for category, keywords in FINANCE_KEYWORDS.tables[table].items():
+        if any(keyword in lowered for keyword in keywords):
+            return category
+    return default
+
+def legacy_reply_topic(text: str) -> str:
+    """The old _process_response chain, which lowercased the response for every keyword"""
+    for category, keywords in FINANCE_KEYWORDS.tables['reply'].items():
+        if any(keyword in text.lower() for keyword in keywords):
+            return category
+    return 'general'
+
+def legacy_all(text: str):
+    """Every lookup the old code ran: intent, quick replies, route fallback, advisor fallback"""
+    return (legacy_first(text, 'intent', 'general'), legacy_reply_topic(text),
+            legacy_first(text, 'fallback', 'general'), legacy_first(text, 'intent', 'general'))
+
+def matcher_all(text: str):
+    """The same lookups through the shared matcher"""
+    return (FINANCE_KEYWORDS.first(text, 'intent', 'general'), FINANCE_KEYWORDS.first(text, 'reply', 'general'),
+            FINANCE_KEYWORDS.first(text, 'fallback', 'general'), FINANCE_KEYWORDS.first(text, 'intent', 'general'))
+
+def make_text(rng: random.Random, tokens: int, keyword_rate: float) -> str:
+    """Random response-like text with occasional keywords"""
+    keywords = [k for categories in FINANCE_KEYWORDS.tables.values() for ks in categories.values() for k in ks]
+    words = [rng.choice(keywords) if rng.random() < keyword_rate else rng.choice(FILLER) for _ in range(tokens)]
+    return ' '.join(words).capitalize() + '.'
+
+def time_per_text(fn, texts, repeat: int) -> float:
+    """Best-of-repeat microseconds per text"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6 / len(texts)
+
+def main():
+    parser = argparse.ArgumentParser(description='FinSight keyword matcher benchmark')
+    parser.add_argument('--texts', type=int, default=200)
+    parser.add_argument('--tokens', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    tables = list(FINANCE_KEYWORDS.tables)
+
+    # Equivalence on short and long texts, dense and sparse in keywords
+    samples = [make_text(rng, rng.randint(1, 40), rng.random() * 0.3) for _ in range(5000)]
+    mismatches = sum(
+        1 for text in samples for table in tables
+        if legacy_first(text, table, 'none') != FINANCE_KEYWORDS.first(text, table, 'none')
+    )
+    print(f"✅ Equivalence: {len(samples)} texts x {len(tables)} tables, {mismatches} mismatches")
+
+    for tokens in (12, args.tokens):
+        print(f"\n⏱️  {tokens}-token texts, µs per text (every lookup of a request):")
+        for label, rate in (('keyword-sparse', 0.002), ('keyword-dense', 0.05), ('no keywords', 0.0)):
+            texts = [make_text(rng, tokens, rate) for _ in range(args.texts)]
+            legacy = time_per_text(legacy_all, texts, args.repeat)
+            lookups = time_per_text(matcher_all, texts, args.repeat)
+            print(f"   {label:<15} legacy loops {legacy:8.1f}   first() lookups {lookups:8.1f} ({legacy / lookups:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the FinSight chatbot API
+Runs app_gemini in-process against the stub LLM provider and drives the chat,
+history, sessions and context endpoints with concurrent simulated users.
+Reports throughput, p50/p95/p99 latency per endpoint and process memory
+growth, and saves everything as JSON so releases can be compared.
+
+Usage: python bench_load.py [--users 50] [--requests 40] [--latency-ms 200]
+                            [--out results.json] [--compare previous.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Share of each endpoint in a simulated user's requests
+DEFAULT_MIX = {'chat': 50, 'history': 20, 'sessions': 15, 'context': 15}
+
+MESSAGES = [
+    'How do I start a budget?',
+    'What is an emergency fund?',
+    'Should I invest in index funds?',
+    'How can I pay off my student loan faster?',
+    'I spend $400 a month on food, is that too much?',
+    'How much of my 3200 salary should I save?',
+    'Explain the 50/30/20 rule',
+    'What should I do about credit card debt?'
+]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable, 0 if neither is)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return 0.0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+def git_commit() -> Optional[str]:
+    """Commit of the code under test, if run from a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class SimulatedUser:
+    """One user with their own client, session and seeded request mix"""
+
+    def __init__(self, app, index: int, seed: int, mix: Dict[str, int]):
+        self.client = app.test_client()
+        self.user_id = f'load_user_{index}'
+        self.session_id = f'load_session_{index}'
+        self.rng = random.Random(seed + index)
+        self.endpoints = list(mix)
+        self.weights = list(mix.values())
+
+    def request(self, endpoint: str):
+        """Send one request; returns (status code, whether the chat fell back)"""
+        if endpoint == 'chat':
+            response = self.client.post('/api/chatbot/chat', json={
+                'message': self.rng.choice(MESSAGES), 'user_id': self.user_id, 'session_id': self.session_id
+            })
+            return response.status_code, (response.get_json(silent=True) or {}).get('success') is False
+        if endpoint == 'history':
+            response = self.client.get(f'/api/chatbot/history/{self.session_id}')
+        elif endpoint == 'sessions':
+            response = self.client.get(f'/api/chatbot/sessions/{self.user_id}')
+        else:
+            response = self.client.post('/api/chatbot/context', json={'user_id': self.user_id, 'context': {
+                'monthly_income': self.rng.choice([2500, 3200, 4800]),
+                'monthly_expenses': self.rng.choice([1800, 2600, 3500]),
+                'risk_tolerance': self.rng.choice(['low', 'medium', 'high'])
+            }})
+        return response.status_code, False
+
+    def run(self, requests: int, results: Dict[str, list], lock: threading.Lock):
+        """Send `requests` requests back to back, recording latency per endpoint"""
+        for _ in range(requests):
+            endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+            started = time.perf_counter()
+            try:
+                status, fallback = self.request(endpoint)
+            except Exception:
+                status, fallback = 599, False
+            elapsed = time.perf_counter() - started
+            with lock:
+                results[endpoint].append((elapsed, status, fallback))
+
+def summarize(samples: list, wall: float) -> Dict[str, float]:
+    """Throughput and latency percentiles (ms) for one endpoint"""
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample[1] >= 400),
+        'fallbacks': sum(1 for sample in samples if sample[2]),
+        'throughput_rps': round(len(samples) / wall, 2) if wall else 0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0
+    }
+
+def print_comparison(current: Dict, previous_path: str):
+    """Print latency and throughput changes against an earlier results file"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\n📈 Against {previous_path} ({previous.get('commit') or 'unknown commit'}):")
+    for endpoint, stats in current['endpoints'].items():
+        before = previous.get('endpoints', {}).get(endpoint)
+        if not before:
+            continue
+        changes = '   '.join(
+            f"{key} {stats[key] - before[key]:+.1f}" for key in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms')
+        )
+        print(f"   {endpoint:<10}{changes}")
+    growth = current['memory']['growth_mb'] - previous.get('memory', {}).get('growth_mb', 0)
+    print(f"   {'memory':<10}growth_mb {growth:+.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='FinSight chatbot offline load test')
+    parser.add_argument('--users', type=int, default=50, help='concurrent simulated users')
+    parser.add_argument('--requests', type=int, default=40, help='requests per user')
+    parser.add_argument('--latency-ms', type=float, default=200, help='stub LLM mean latency')
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--distribution', default='lognormal', help='fixed, uniform, normal or lognormal')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of stub LLM calls that fail')
+    parser.add_argument('--user-rate', type=float, default=0.0,
+                        help='per-user chat calls/second before fallbacks (0 = unlimited)')
+    parser.add_argument('--mix', default=','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items()),
+                        help='endpoint weights, e.g. chat=50,history=20,sessions=15,context=15')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='results JSON path (default: bench_load_<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    mix = {name: int(weight) for name, weight in (part.split('=') for part in args.mix.split(','))}
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        parser.error(f"unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+
+    # The app picks these up at import: stub LLM, scratch chat database
+    os.environ['FINSIGHT_LLM_PROVIDER'] = 'stub'
+    os.environ['FINSIGHT_STUB_LATENCY_MS'] = str(args.latency_ms)
+    os.environ['FINSIGHT_STUB_JITTER_MS'] = str(args.jitter_ms)
+    os.environ['FINSIGHT_STUB_DISTRIBUTION'] = args.distribution
+    os.environ['FINSIGHT_STUB_ERROR_RATE'] = str(args.error_rate)
+    os.environ['FINSIGHT_STUB_SEED'] = str(args.seed)
+    os.environ['FINSIGHT_USER_RATE'] = str(args.user_rate)
+    os.environ['FINSIGHT_CHAT_DB'] = os.path.join(tempfile.mkdtemp(), 'bench_load.db')
+
+    rss_before_import = rss_mb()
+    from app_gemini import app
+    from gemini_service import get_gemini_service
+    service = get_gemini_service()
+    rss_after_import = rss_mb()
+
+    users = [SimulatedUser(app, index, args.seed, mix) for index in range(args.users)]
+    # Warm-up: one request of each kind per user, not measured
+    for user in users:
+        for endpoint in mix:
+            user.request(endpoint)
+
+    rss_start = rss_mb()
+    results = {endpoint: [] for endpoint in mix}
+    lock = threading.Lock()
+    print(f"🚀 {args.users} users x {args.requests} requests, stub LLM {args.latency_ms:g}ms "
+          f"({args.distribution}, error rate {args.error_rate:g})\n")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        for future in [pool.submit(user.run, args.requests, results, lock) for user in users]:
+            future.result()
+    wall = time.perf_counter() - started
+    rss_end = rss_mb()
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'config': {**vars(args), 'mix': mix},
+        'wall_seconds': round(wall, 3),
+        'total_rps': round(sum(len(samples) for samples in results.values()) / wall, 2),
+        'endpoints': {endpoint: summarize(samples, wall) for endpoint, samples in results.items()},
+        'memory': {
+            'rss_before_import_mb': round(rss_before_import, 1),
+            'rss_after_import_mb': round(rss_after_import, 1),
+            'rss_start_mb': round(rss_start, 1),
+            'rss_end_mb': round(rss_end, 1),
+            'growth_mb': round(rss_end - rss_start, 1)
+        },
+        'service': {
+            'sessions': service.get_session_stats(),
+            'response_cache': service.get_cache_stats(),
+            'dispatcher': service.get_dispatcher_stats(),
+            'circuit_breaker': service.get_breaker_stats(),
+            'llm_executor': service.get_executor_stats(),
+            'rate_limiter': service.get_rate_limiter_stats()
+        } if service else None
+    }
+
+    print(f"   {'endpoint':<10}{'requests':>9}{'errors':>8}{'fallback':>9}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for endpoint, stats in report['endpoints'].items():
+        print(f"   {endpoint:<10}{stats['requests']:>9}{stats['errors']:>8}{stats['fallbacks']:>9}"
+              f"{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}"
+              f"{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}")
+    memory = report['memory']
+    print(f"\n⏱️  {wall:.2f}s wall, {report['total_rps']:.1f} req/s overall")
+    print(f"🧠 RSS {memory['rss_start_mb']:.1f} MB -> {memory['rss_end_mb']:.1f} MB ({memory['growth_mb']:+.1f} MB)")
+
+    out = args.out or f"bench_load_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to {out}")
+
+    if args.compare:
+        print_comparison(report, args.compare)
+
+if __name__ == '__main__':
+    main()
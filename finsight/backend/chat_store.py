@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Chat Session Store for FinSight
+SQLite-backed chat history and user context, shared by every worker process
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from db_connection import ConnectionManager
+
+# Messages kept per session; older ones are trimmed on append
+MAX_SESSION_MESSAGES = 50
+
+class ChatStore:
+    """
+    Persists chat messages, per-session summaries and user financial context.
+
+    Messages are append-only rows keyed by (session_id, id). Each append also
+    upserts a one-row summary of its session, so listing a user's sessions is
+    a lookup on the (user_id, last_updated) index rather than a scan of every
+    stored message.
+    """
+
+    def __init__(self, db_path: str, max_messages: int = MAX_SESSION_MESSAGES):
+        self.max_messages = max_messages
+        self.connection_manager = ConnectionManager(db_path)
+        with self.connection_manager.connection() as conn:
+            self.create_tables(conn)
+
+    @staticmethod
+    def create_tables(conn):
+        """Create the chat tables if they don't exist"""
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                user_message TEXT,
+                ai_response TEXT,
+                timestamp TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chat_messages_session
+                ON chat_messages (session_id, id);
+
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                session_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                last_message TEXT,
+                last_updated TEXT NOT NULL,
+                message_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_chat_sessions_user_updated
+                ON chat_sessions (user_id, last_updated);
+
+            CREATE TABLE IF NOT EXISTS chat_contexts (
+                user_id TEXT PRIMARY KEY,
+                context TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+        ''')
+
+    def append_message(self, session_id: str, user_id: str, user_message: str, ai_response: str) -> Dict[str, Any]:
+        """Append one exchange to a session and trim it to the last max_messages"""
+        timestamp = datetime.now().isoformat()
+        with self.connection_manager.connection() as conn:
+            conn.execute('BEGIN')
+            conn.execute('''
+                INSERT INTO chat_messages (session_id, user_id, user_message, ai_response, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (session_id, user_id, user_message, ai_response, timestamp))
+            conn.execute('''
+                INSERT INTO chat_sessions (session_id, user_id, last_message, last_updated, message_count)
+                VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    last_message = excluded.last_message,
+                    last_updated = excluded.last_updated,
+                    message_count = MIN(message_count + 1, ?)
+            ''', (session_id, user_id, user_message, timestamp, self.max_messages))
+            # Everything at or below the id max_messages rows back is trimmed
+            conn.execute('''
+                DELETE FROM chat_messages
+                WHERE session_id = ? AND id <= (
+                    SELECT id FROM chat_messages WHERE session_id = ?
+                    ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+            ''', (session_id, session_id, self.max_messages))
+        return {
+            'user_id': user_id,
+            'user_message': user_message,
+            'ai_response': ai_response,
+            'timestamp': timestamp
+        }
+
+    def get_messages(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get a session's messages, oldest first (only the last `limit` if given)"""
+        with self.connection_manager.connection() as conn:
+            rows = conn.execute('''
+                SELECT user_id, user_message, ai_response, timestamp FROM chat_messages
+                WHERE session_id = ?
+                ORDER BY id DESC LIMIT ?
+            ''', (session_id, -1 if limit is None else limit)).fetchall()
+        return [
+            {'user_id': row[0], 'user_message': row[1], 'ai_response': row[2], 'timestamp': row[3]}
+            for row in reversed(rows)
+        ]
+
+    def list_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get a user's sessions, most recently updated first"""
+        with self.connection_manager.connection() as conn:
+            rows = conn.execute('''
+                SELECT session_id, last_message, last_updated, message_count FROM chat_sessions
+                WHERE user_id = ?
+                ORDER BY last_updated DESC
+            ''', (user_id,)).fetchall()
+        return [
+            {'session_id': row[0], 'last_message': row[1] or '', 'last_updated': row[2], 'message_count': row[3]}
+            for row in rows
+        ]
+
+    def delete_session(self, session_id: str):
+        """Delete a session and its messages"""
+        with self.connection_manager.connection() as conn:
+            conn.execute('BEGIN')
+            conn.execute('DELETE FROM chat_messages WHERE session_id = ?', (session_id,))
+            conn.execute('DELETE FROM chat_sessions WHERE session_id = ?', (session_id,))
+
+    def count_sessions(self) -> int:
+        """Count stored sessions"""
+        with self.connection_manager.connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM chat_sessions').fetchone()[0]
+
+    def get_context(self, user_id: str) -> Dict[str, Any]:
+        """Get a user's stored financial context (empty if none)"""
+        with self.connection_manager.connection() as conn:
+            row = conn.execute('SELECT context FROM chat_contexts WHERE user_id = ?', (user_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def set_context(self, user_id: str, context: Dict[str, Any]):
+        """Replace a user's stored financial context"""
+        with self.connection_manager.connection() as conn:
+            conn.execute('''
+                INSERT INTO chat_contexts (user_id, context, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET context = excluded.context, updated_at = excluded.updated_at
+            ''', (user_id, json.dumps(context), datetime.now().isoformat()))
+
+# Global instance
+chat_store = None
+
+def initialize_chat_store(db_path: Optional[str] = None, **kwargs) -> ChatStore:
+    """Initialize the global chat store (FINSIGHT_CHAT_DB, default finsight.db)"""
+    global chat_store
+    if chat_store is None:
+        chat_store = ChatStore(db_path or os.getenv('FINSIGHT_CHAT_DB', 'finsight.db'), **kwargs)
+    return chat_store
+
+def get_chat_store() -> Optional[ChatStore]:
+    """Get the global chat store"""
+    return chat_store
@@ -4,11 +4,18 @@ Gemini AI Chatbot API Routes for FinSight
 Provides RESTful endpoints for AI-powered financial advisory chat
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 import asyncio
 import json
+import os
+import time
+import weakref
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
+
+from async_runtime import run_coroutine, iterate_async
+from chat_store import initialize_chat_store
+from keyword_matcher import FINANCE_KEYWORDS
 
 # Import Gemini service
 try:
@@ -21,83 +28,278 @@ except ImportError as e:
 # Create blueprint for chatbot routes
 chatbot_bp = Blueprint('chatbot', __name__)
 
-# In-memory storage for chat sessions (in production, use a proper database)
-chat_sessions: Dict[str, List[Dict]] = {}
-user_contexts: Dict[str, Dict] = {}
+# Chat history and user context live in SQLite so every worker sees the same sessions
+chat_store = initialize_chat_store()
+
+# Keep proxies from buffering the event stream
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+# Batch chat limits: items per request, and items in flight at once across all batches
+BATCH_MAX_ITEMS = int(os.getenv('FINSIGHT_CHAT_BATCH_MAX_ITEMS', 500))
+BATCH_CONCURRENCY = int(os.getenv('FINSIGHT_CHAT_BATCH_CONCURRENCY', 4))
+
+# Batch items in flight on each event loop, shared by every batch on it: (limit, semaphore)
+_batch_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[int, asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
 
 @chatbot_bp.route('/api/chatbot/chat', methods=['POST'])
 def chat_with_ai():
     """Main chat endpoint for AI conversations"""
-    try:
-        if not GEMINI_AVAILABLE:
-            return jsonify({
-                'success': False,
-                'error': 'Gemini AI service is not available',
-                'fallback_response': get_fallback_response(request.json.get('message', ''))
-            }), 503
-        
-        data = request.json
-        message = data.get('message', '').strip()
-        user_id = data.get('user_id', 'anonymous')
-        session_id = data.get('session_id', f"session_{user_id}_{datetime.now().timestamp()}")
-        
-        if not message:
-            return jsonify({
-                'success': False,
-                'error': 'Message is required'
-            }), 400
-        
+    # Awaited on the shared background loop rather than a fresh loop per request
+    payload, status = run_coroutine(process_chat(request.get_json(silent=True) or {}))
+    return jsonify(payload), status
+
+@chatbot_bp.route('/api/chatbot/chat/stream', methods=['POST'])
+def chat_with_ai_stream():
+    """Chat endpoint that streams the AI response as server-sent events"""
+    stream, status = open_chat_stream(request.get_json(silent=True) or {})
+    if status != 200:
+        return jsonify(stream), status
+    
+    return Response(iterate_async(stream), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+@chatbot_bp.route('/api/chatbot/chat/batch', methods=['POST'])
+def chat_with_ai_batch():
+    """Answer many chat messages in one request, processed concurrently"""
+    payload, status = run_coroutine(process_chat_batch(request.get_json(silent=True) or {}))
+    return jsonify(payload), status
+
+def prepare_chat(data: Dict) -> Tuple[Dict, int]:
+    """
+    Validate a chat request and gather what the AI call needs.
+    
+    Returns (request fields, 200) or (error payload, status code).
+    """
+    if not GEMINI_AVAILABLE:
+        return {
+            'success': False,
+            'error': 'Gemini AI service is not available',
+            'fallback_response': get_fallback_response(data.get('message', ''))
+        }, 503
+    
+    message = data.get('message', '').strip()
+    user_id = data.get('user_id', 'anonymous')
+    session_id = data.get('session_id', f"session_{user_id}_{datetime.now().timestamp()}")
+    
+    if not message:
+        return {
+            'success': False,
+            'error': 'Message is required'
+        }, 400
+    
+    # Get Gemini service
+    gemini_service = get_gemini_service()
+    if not gemini_service:
+        return {
+            'success': False,
+            'error': 'Gemini service not initialized',
+            'fallback_response': get_fallback_response(message)
+        }, 503
+    
+    return {
+        'service': gemini_service,
+        'message': message,
+        'user_id': user_id,
+        'session_id': session_id,
         # Get user's financial context
-        context = get_user_context(user_id, data.get('context', {}))
-        
+        'context': get_user_context(user_id, data.get('context', {})),
         # Get conversation history
-        history = get_conversation_history(session_id)
-        
-        # Get Gemini service
-        gemini_service = get_gemini_service()
-        if not gemini_service:
-            return jsonify({
-                'success': False,
-                'error': 'Gemini service not initialized',
-                'fallback_response': get_fallback_response(message)
-            }), 503
+        'history': get_conversation_history(session_id),
+        # Clients can force a fresh answer with "use_cache": false
+        'use_cache': bool(data.get('use_cache', True))
+    }, 200
+
+async def process_chat(data: Dict) -> Tuple[Dict, int]:
+    """
+    Handle one chat request and return (payload, status code).
+
+    Framework-independent so the WSGI route and the ASGI entry point
+    (asgi_gemini.py) serve exactly the same responses.
+    """
+    try:
+        # The answer deadline runs from arrival, so slow context reads count against it
+        arrived = time.monotonic()
         
-        # Get AI response (run async function)
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Context and history reads can wait on the SQLite lock, so they stay off the event loop
+        chat, status = await asyncio.to_thread(prepare_chat, data)
+        if status != 200:
+            return chat, status
         
-        try:
-            ai_response = loop.run_until_complete(
-                gemini_service.get_chat_response(
-                    message=message,
-                    user_id=user_id,
-                    context=context,
-                    conversation_history=history
-                )
-            )
-        finally:
-            loop.close()
+        ai_response = await chat['service'].get_chat_response(
+            message=chat['message'],
+            user_id=chat['user_id'],
+            context=chat['context'],
+            conversation_history=chat['history'],
+            use_cache=chat['use_cache'],
+            deadline=arrived + chat['service'].deadline
+        )
         
         # Save to conversation history
-        save_to_history(session_id, message, ai_response.get('response', ''), user_id)
+        await asyncio.to_thread(save_to_history, chat['session_id'], chat['message'],
+                                ai_response.get('response', ''), chat['user_id'])
         
-        return jsonify({
+        return {
             'success': ai_response.get('success', True),
-            'response': ai_response.get('response', ''),
+            # Failed or shed calls still answer with the advisor's fallback text
+            'response': ai_response.get('response', ai_response.get('fallback_response', '')),
             'suggestions': ai_response.get('suggestions', []),
             'quick_replies': ai_response.get('quick_replies', []),
             'intent': ai_response.get('intent', 'general'),
-            'session_id': session_id,
+            'usage': ai_response.get('usage', {}),
+            'queue_wait_ms': ai_response.get('queue_wait_ms', 0),
+            # Rate-limited users are told when the advisor will take their next message
+            **({'retry_after': ai_response['retry_after']} if 'retry_after' in ai_response else {}),
+            'session_id': chat['session_id'],
             'timestamp': ai_response.get('timestamp', datetime.now().isoformat())
-        })
+        }, 200
         
     except Exception as e:
         print(f"Error in chat endpoint: {e}")
-        return jsonify({
+        return {
             'success': False,
             'error': 'Internal server error',
-            'fallback_response': get_fallback_response(request.json.get('message', ''))
-        }), 500
+            'fallback_response': get_fallback_response(data.get('message', ''))
+        }, 500
+
+async def process_chat_batch(data: Dict) -> Tuple[Dict, int]:
+    """
+    Handle a batch of chat requests and return (payload, status code).
+    
+    Expects {"items": [{"user_id", "message", "context", ...}, ...]} with the
+    same fields as a single chat request, plus an optional "concurrency" up to
+    batch_concurrency(). Items are answered concurrently through process_chat,
+    so they share its validation, caching and fallbacks; results come back in
+    item order, each with its own status code, and one failed item does not
+    fail the batch.
+    """
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return {
+            'success': False,
+            'error': 'items must be a non-empty list of chat requests'
+        }, 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return {
+            'success': False,
+            'error': f'At most {BATCH_MAX_ITEMS} items per batch'
+        }, 413
+    
+    limit = batch_concurrency()
+    try:
+        concurrency = max(1, min(int(data.get('concurrency', limit)), limit))
+    except (TypeError, ValueError):
+        return {
+            'success': False,
+            'error': 'concurrency must be an integer'
+        }, 400
+    
+    # At most `concurrency` items of this batch, and batch_concurrency() items
+    # of all batches together, wait on the advisor at once, leaving the rest
+    # of its call slots and its queue to interactive users
+    semaphore = asyncio.Semaphore(concurrency)
+    shared = batch_slots(limit)
+    
+    async def answer(index: int, item: Any) -> Dict:
+        if not isinstance(item, dict):
+            return {'index': index, 'status': 400, 'success': False, 'error': 'Item must be an object'}
+        async with semaphore, shared:
+            payload, status = await process_chat(item)
+        return {'index': index, 'status': status, **payload}
+    
+    started = time.perf_counter()
+    results = await asyncio.gather(*(answer(index, item) for index, item in enumerate(items)))
+    succeeded = sum(1 for result in results if result['status'] == 200 and result.get('success'))
+    
+    return {
+        'success': True,
+        'results': results,
+        'count': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'concurrency': concurrency,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'timestamp': datetime.now().isoformat()
+    }, 200
+
+def batch_concurrency() -> int:
+    """Batch items allowed in flight at once: BATCH_CONCURRENCY, and at most half the advisor's call slots"""
+    service = get_gemini_service() if GEMINI_AVAILABLE else None
+    if service is None:
+        return max(1, BATCH_CONCURRENCY)
+    return max(1, min(BATCH_CONCURRENCY, service.dispatcher.max_concurrency // 2))
+
+def batch_slots(limit: int) -> asyncio.Semaphore:
+    """
+    The running loop's semaphore for batch items in flight across batches.
+    
+    A new semaphore is made when the limit changes; batches already running
+    finish on the old one.
+    """
+    loop = asyncio.get_running_loop()
+    current = _batch_slots.get(loop)
+    if current is None or current[0] != limit:
+        current = _batch_slots[loop] = (limit, asyncio.Semaphore(limit))
+    return current[1]
+
+def format_sse(event: str, data: Dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def open_chat_stream(data: Dict) -> Tuple[Any, int]:
+    """
+    Validate a streaming chat request.
+    
+    Returns (async iterator of SSE strings, 200) or (error payload, status code),
+    so errors found before the first byte still get a proper HTTP status.
+    """
+    arrived = time.monotonic()
+    try:
+        chat, status = prepare_chat(data)
+    except Exception as e:
+        print(f"Error in chat stream endpoint: {e}")
+        return {
+            'success': False,
+            'error': 'Internal server error',
+            'fallback_response': get_fallback_response(data.get('message', ''))
+        }, 500
+    if status != 200:
+        return chat, status
+    chat['deadline'] = arrived + chat['service'].deadline
+    return stream_chat(chat), 200
+
+async def stream_chat(chat: Dict) -> AsyncIterator[str]:
+    """
+    Stream a prepared chat as SSE: 'chunk' events with partial text, then one
+    'done' event with quick replies and intent (or 'error' with a fallback).
+    History is saved once the full response is known.
+    """
+    try:
+        async for event in chat['service'].stream_chat_response(
+            message=chat['message'],
+            user_id=chat['user_id'],
+            context=chat['context'],
+            conversation_history=chat['history'],
+            use_cache=chat['use_cache'],
+            deadline=chat.get('deadline')
+        ):
+            kind = event.pop('type')
+            if kind == 'chunk':
+                yield format_sse('chunk', event)
+                continue
+            
+            if kind == 'done':
+                await asyncio.to_thread(save_to_history, chat['session_id'], chat['message'],
+                                        event.get('response', ''), chat['user_id'])
+            yield format_sse(kind, {**event, 'session_id': chat['session_id']})
+            
+    except Exception as e:
+        print(f"Error in chat stream: {e}")
+        yield format_sse('error', {
+            'success': False,
+            'error': 'Internal server error',
+            'fallback_response': get_fallback_response(chat['message']),
+            'session_id': chat['session_id']
+        })
 
 @chatbot_bp.route('/api/chatbot/context', methods=['POST'])
 def update_user_context():
@@ -108,7 +310,7 @@ def update_user_context():
         context_data = data.get('context', {})
         
         # Update user context
-        user_contexts[user_id] = {
+        chat_store.set_context(user_id, {
             'monthly_income': context_data.get('monthly_income'),
             'monthly_expenses': context_data.get('monthly_expenses'),
             'savings_goal': context_data.get('savings_goal'),
@@ -116,7 +318,7 @@ def update_user_context():
             'risk_tolerance': context_data.get('risk_tolerance'),
             'financial_goals': context_data.get('financial_goals', []),
             'updated_at': datetime.now().isoformat()
-        }
+        })
         
         return jsonify({
             'success': True,
@@ -134,7 +336,7 @@ def update_user_context():
 def get_chat_history(session_id):
     """Get chat history for a session"""
     try:
-        history = chat_sessions.get(session_id, [])
+        history = chat_store.get_messages(session_id)
         return jsonify({
             'success': True,
             'history': history,
@@ -151,20 +353,9 @@ def get_chat_history(session_id):
 def get_user_sessions(user_id):
     """Get all chat sessions for a user"""
     try:
-        user_sessions = []
-        for session_id, messages in chat_sessions.items():
-            if any(msg.get('user_id') == user_id for msg in messages):
-                last_message = messages[-1] if messages else {}
-                user_sessions.append({
-                    'session_id': session_id,
-                    'last_message': last_message.get('user_message', ''),
-                    'last_updated': last_message.get('timestamp', ''),
-                    'message_count': len(messages)
-                })
-        
         return jsonify({
             'success': True,
-            'sessions': user_sessions
+            'sessions': chat_store.list_user_sessions(user_id)
         })
     except Exception as e:
         print(f"Error getting sessions: {e}")
@@ -177,8 +368,7 @@ def get_user_sessions(user_id):
 def delete_session(session_id):
     """Delete a chat session"""
     try:
-        if session_id in chat_sessions:
-            del chat_sessions[session_id]
+        chat_store.delete_session(session_id)
         
         return jsonify({
             'success': True,
@@ -221,7 +411,15 @@ def chatbot_health():
         'success': True,
         'gemini_available': GEMINI_AVAILABLE,
         'service_initialized': gemini_service is not None,
-        'active_sessions': len(chat_sessions),
+        'llm_provider': gemini_service.get_provider_info() if gemini_service else None,
+        'active_sessions': chat_store.count_sessions(),
+        'session_cache': gemini_service.get_session_stats() if gemini_service else None,
+        'response_cache': gemini_service.get_cache_stats() if gemini_service else None,
+        'dispatcher': gemini_service.get_dispatcher_stats() if gemini_service else None,
+        'circuit_breaker': gemini_service.get_breaker_stats() if gemini_service else None,
+        'llm_executor': gemini_service.get_executor_stats() if gemini_service else None,
+        'rate_limiter': gemini_service.get_rate_limiter_stats() if gemini_service else None,
+        'context_window': gemini_service.get_context_stats() if gemini_service else None,
         'timestamp': datetime.now().isoformat()
     })
 
@@ -234,7 +432,7 @@ def get_user_context(user_id: str, context_data: Dict) -> Optional[ChatContext]:
             return None
             
         # Merge existing context with new data
-        existing_context = user_contexts.get(user_id, {})
+        existing_context = chat_store.get_context(user_id)
         merged_context = {**existing_context, **context_data}
         
         # Create ChatContext object
@@ -258,11 +456,11 @@ def get_conversation_history(session_id: str) -> List[ChatMessage]:
         if not GEMINI_AVAILABLE:
             return []
             
-        messages = chat_sessions.get(session_id, [])
         history = []
         
         from gemini_service import ChatMessage
-        for msg in messages[-10:]:  # Last 10 messages for context
+        # Everything retained; the advisor's context window decides what fits the budget
+        for msg in chat_store.get_messages(session_id):
             # Add user message
             if msg.get('user_message'):
                 history.append(ChatMessage(
@@ -287,28 +485,17 @@ def get_conversation_history(session_id: str) -> List[ChatMessage]:
 def save_to_history(session_id: str, user_message: str, ai_response: str, user_id: str):
     """Save conversation to history"""
     try:
-        if session_id not in chat_sessions:
-            chat_sessions[session_id] = []
-        
-        chat_sessions[session_id].append({
-            'user_id': user_id,
-            'user_message': user_message,
-            'ai_response': ai_response,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Keep only last 50 messages per session
-        if len(chat_sessions[session_id]) > 50:
-            chat_sessions[session_id] = chat_sessions[session_id][-50:]
+        # Appends one row; the store keeps only the last 50 messages per session
+        chat_store.append_message(session_id, user_id, user_message, ai_response)
             
     except Exception as e:
         print(f"Error saving to history: {e}")
 
 def get_fallback_response(message: str) -> str:
     """Get a fallback response when Gemini is not available"""
-    message_lower = message.lower()
+    topic = FINANCE_KEYWORDS.first(message, 'fallback', 'general')
     
-    if any(word in message_lower for word in ['budget', 'expense', 'spending']):
+    if topic == 'budget':
         return """I'd be happy to help with budgeting! Here are some key tips:
 
 • Follow the 50/30/20 rule: 50% for needs, 30% for wants, 20% for savings
@@ -319,7 +506,7 @@ def get_fallback_response(message: str) -> str:
 
 Would you like specific advice on any particular aspect of budgeting?"""
 
-    elif any(word in message_lower for word in ['save', 'saving', 'emergency']):
+    elif topic == 'saving':
         return """Building savings is crucial for financial security! Here's how to start:
 
 • Start with an emergency fund of 3-6 months of expenses
@@ -330,7 +517,7 @@ Would you like specific advice on any particular aspect of budgeting?"""
 
 What's your current savings goal? I can help you create a plan to reach it."""
 
-    elif any(word in message_lower for word in ['invest', 'investment', 'stocks']):
+    elif topic == 'investing':
         return """Investing can help your money grow over time! For beginners:
 
 • Start with low-cost index funds or ETFs
@@ -341,7 +528,7 @@ What's your current savings goal? I can help you create a plan to reach it."""
 
 How much are you thinking of investing, and what's your timeline?"""
 
-    elif any(word in message_lower for word in ['debt', 'loan', 'credit']):
+    elif topic == 'debt':
         return """Managing debt effectively is key to financial health:
 
 • List all debts with balances, interest rates, and minimum payments
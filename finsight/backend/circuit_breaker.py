@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker for FinSight
+Stops calling a failing or slow model provider and probes it for recovery
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling the provider while the breaker is open"""
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker around model calls.
+
+    Closed: calls go through. failure_threshold consecutive failures (errors,
+    timeouts, or calls slower than slow_call_seconds) open it. Open: calls are
+    refused with CircuitOpen so callers answer with a fallback at once. After
+    reset_timeout seconds it is half-open: up to half_open_probes calls go
+    through as probes; a probe success closes it, a probe failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, slow_call_seconds: float = 10.0,
+                 reset_timeout: float = 30.0, half_open_probes: int = 1):
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._last_error: Optional[str] = None
+        self._stats = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'opened': 0, 'probes': 0}
+
+    def _refresh(self, now: float):
+        """Move from open to half-open once the reset timeout has passed (lock held)"""
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    def check(self):
+        """Raise CircuitOpen if a call would be refused right now, without taking a probe"""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == OPEN or (self._state == HALF_OPEN and self._probes >= self.half_open_probes):
+                self._stats['rejected'] += 1
+                raise CircuitOpen('AI advisor is temporarily unavailable')
+
+    def acquire(self):
+        """Admit one call (a probe when half-open) or raise CircuitOpen"""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                self._stats['probes'] += 1
+            elif self._state != CLOSED:
+                self._stats['rejected'] += 1
+                raise CircuitOpen('AI advisor is temporarily unavailable')
+            self._stats['calls'] += 1
+
+    def record_success(self, latency: float):
+        """Report an admitted call that answered; a slow answer counts as a failure, and an open breaker stays open"""
+        if latency > self.slow_call_seconds:
+            with self._lock:
+                self._stats['slow_calls'] += 1
+            self.record_failure(f'Slow call ({latency:.1f}s)')
+            return
+        with self._lock:
+            # A call admitted before the breaker opened says nothing about recovery
+            if self._state == OPEN:
+                return
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self, error: str):
+        """Report an admitted call that failed or timed out"""
+        with self._lock:
+            self._stats['failures'] += 1
+            self._failures += 1
+            self._last_error = error
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._stats['opened'] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def abandon(self):
+        """Report an admitted call that was cancelled before a verdict, freeing its probe"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state, consecutive failures and counters"""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            stats = dict(self._stats)
+            stats['state'] = self._state
+            stats['consecutive_failures'] = self._failures
+            stats['last_error'] = self._last_error
+            stats['retry_in'] = round(max(0.0, self.reset_timeout - (now - self._opened_at)), 1) if self._state == OPEN else 0
+        stats['failure_threshold'] = self.failure_threshold
+        stats['slow_call_seconds'] = self.slow_call_seconds
+        stats['reset_timeout'] = self.reset_timeout
+        return stats
+
+def circuit_breaker_from_env() -> CircuitBreaker:
+    """Build a breaker from FINSIGHT_BREAKER_FAILURES, FINSIGHT_BREAKER_SLOW_SECONDS and FINSIGHT_BREAKER_RESET_SECONDS"""
+    return CircuitBreaker(
+        failure_threshold=int(os.getenv('FINSIGHT_BREAKER_FAILURES', 5)),
+        slow_call_seconds=float(os.getenv('FINSIGHT_BREAKER_SLOW_SECONDS', 10)),
+        reset_timeout=float(os.getenv('FINSIGHT_BREAKER_RESET_SECONDS', 30))
+    )
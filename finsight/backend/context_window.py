@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Context Window Manager for FinSight
+Fits chat history into a per-request token budget: recent turns verbatim, older turns as a rolling summary
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Rough size of a Gemini token in English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+SUMMARY_LINE_CHARS = 160
+
+SUMMARY_HEADER = 'Summary of our earlier conversation:'
+SUMMARY_ACK = 'Understood.'
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the token count of a text without a tokenizer round-trip"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _summary_line(role: str, content: str) -> str:
+    """One line of the rolling summary: the first sentence of a message"""
+    first = _SENTENCE_END.split(content.strip(), 1)[0].replace('\n', ' ')
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[:SUMMARY_LINE_CHARS - 3].rstrip() + '...'
+    return f"{'User' if role == 'user' else 'Advisor'}: {first}"
+
+@dataclass
+class WindowPlan:
+    """History chosen for a chat session and what it cost"""
+    history: List[Dict[str, Any]]
+    tokens: int
+    verbatim_turns: int
+    summarized_turns: int
+    dropped_turns: int
+
+class ContextWindow:
+    """
+    Decides how much conversation a model call carries.
+
+    The newest recent_turns messages are kept verbatim while they fit; older
+    messages are folded into a summary of their first sentences, newest kept
+    first, capped at summary_tokens. Everything is sized against budget_tokens,
+    the total prompt tokens allowed per request.
+    """
+
+    def __init__(self, budget_tokens: int = 3000, recent_turns: int = 6, summary_tokens: int = 300):
+        self.budget_tokens = budget_tokens
+        self.recent_turns = recent_turns
+        self.summary_tokens = summary_tokens
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'prompt_tokens': 0, 'max_prompt_tokens': 0, 'folds': 0}
+
+    def fit(self, history: Optional[List[Any]], available_tokens: int) -> WindowPlan:
+        """
+        Build Gemini chat history (alternating user/model contents) from
+        ChatMessage-like objects, using at most available_tokens.
+        """
+        messages = list(history or [])
+        # Turns must alternate, so drop questions that never got an answer
+        messages = [msg for i, msg in enumerate(messages)
+                    if not (msg.role == 'user' and i + 1 < len(messages) and messages[i + 1].role == 'user')]
+        # A session history has to end on a model turn before the next question
+        while messages and messages[-1].role == 'user':
+            messages.pop()
+
+        verbatim = []
+        used = 0
+        while messages and len(verbatim) < self.recent_turns:
+            cost = estimate_tokens(messages[-1].content)
+            if used + cost > available_tokens:
+                break
+            verbatim.insert(0, messages.pop())
+            used += cost
+        # ...and start on a user turn
+        while verbatim and verbatim[0].role != 'user':
+            messages.append(verbatim.pop(0))
+            used -= estimate_tokens(messages[-1].content)
+
+        lines = []
+        summary_budget = min(self.summary_tokens, available_tokens - used - estimate_tokens(SUMMARY_ACK))
+        for msg in reversed(messages):
+            line = _summary_line(msg.role, msg.content)
+            if estimate_tokens('\n'.join([SUMMARY_HEADER, line] + lines)) > summary_budget:
+                break
+            lines.insert(0, line)
+
+        contents = []
+        if lines:
+            summary = '\n'.join([SUMMARY_HEADER] + lines)
+            contents += [{'role': 'user', 'parts': [summary]}, {'role': 'model', 'parts': [SUMMARY_ACK]}]
+            used += estimate_tokens(summary) + estimate_tokens(SUMMARY_ACK)
+        contents += [{'role': 'user' if msg.role == 'user' else 'model', 'parts': [msg.content]} for msg in verbatim]
+
+        return WindowPlan(
+            history=contents,
+            tokens=used,
+            verbatim_turns=len(verbatim),
+            summarized_turns=len(lines),
+            dropped_turns=len(messages) - len(lines)
+        )
+
+    def record(self, prompt_tokens: int, folded: bool = False):
+        """Account for the prompt tokens one request sent"""
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['prompt_tokens'] += prompt_tokens
+            self._stats['max_prompt_tokens'] = max(self._stats['max_prompt_tokens'], prompt_tokens)
+            if folded:
+                self._stats['folds'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get prompt token usage per request"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_prompt_tokens'] = round(stats['prompt_tokens'] / stats['requests'], 1) if stats['requests'] else 0
+        stats['budget_tokens'] = self.budget_tokens
+        return stats
+
+def context_window_from_env() -> ContextWindow:
+    """Build a window from FINSIGHT_PROMPT_TOKEN_BUDGET, FINSIGHT_CONTEXT_RECENT_TURNS and FINSIGHT_CONTEXT_SUMMARY_TOKENS"""
+    return ContextWindow(
+        budget_tokens=int(os.getenv('FINSIGHT_PROMPT_TOKEN_BUDGET', 3000)),
+        recent_turns=int(os.getenv('FINSIGHT_CONTEXT_RECENT_TURNS', 6)),
+        summary_tokens=int(os.getenv('FINSIGHT_CONTEXT_SUMMARY_TOKENS', 300))
+    )
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+SQLite Connection Management for FinSight
+Pooled, WAL-mode connections shared by the raw-sqlite3 API routes
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Any
+
+# Pragmas applied to every pooled connection. journal_mode=WAL lets readers
+# run while a writer holds the lock; synchronous=NORMAL is durable in WAL mode
+# and skips the fsync on every commit.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,        # ~20MB page cache (negative = KiB)
+    'mmap_size': 268435456,      # 256MB memory-mapped I/O
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,        # ms to wait on a locked database
+}
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a boolean switch from the environment"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ('0', 'false', 'no', 'off')
+
+class ConnectionManager:
+    """
+    Hands out SQLite connections for the lifetime of a request.
+
+    With pooling enabled, idle connections are kept in a LIFO pool so that
+    connection setup, schema parsing and the per-connection statement cache
+    survive between requests. With pooling disabled the manager reproduces
+    the old behaviour (connect per request, default rollback journal), which
+    is useful for benchmarking the two against each other.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        pooled: bool = True,
+        pool_size: int = 8,
+        pragmas: Optional[Dict[str, Any]] = None,
+        cached_statements: int = 256
+    ):
+        self.db_path = db_path
+        self.pooled = pooled
+        self.pool_size = pool_size
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.cached_statements = cached_statements
+
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'reused': 0, 'closed': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection"""
+        if not self.pooled:
+            return sqlite3.connect(self.db_path)
+
+        # Pooled connections move between request threads, but only one
+        # thread holds a given connection at a time.
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        with self._lock:
+            self._stats['created'] += 1
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take a connection from the pool, opening one if the pool is empty"""
+        if self.pooled:
+            try:
+                conn = self._pool.get_nowait()
+                with self._lock:
+                    self._stats['reused'] += 1
+                return conn
+            except queue.Empty:
+                pass
+        return self._connect()
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, closing it if the pool is full"""
+        if self.pooled:
+            try:
+                self._pool.put_nowait(conn)
+                return
+            except queue.Full:
+                pass
+        conn.close()
+        with self._lock:
+            self._stats['closed'] += 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a block.
+
+        Any open transaction is committed on success and rolled back on error
+        before the connection goes back to the pool.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every idle pooled connection"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._stats['closed'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'pooled': self.pooled,
+            'pool_size': self.pool_size,
+            'idle': self._pool.qsize()
+        })
+        return stats
+
+# Global instance
+connection_manager = None
+
+def initialize_connection_manager(db_path: str, **kwargs) -> ConnectionManager:
+    """
+    Initialize the global connection manager.
+
+    Set FINSIGHT_DB_POOLING=0 to fall back to one connection per request in the
+    default journal mode, and FINSIGHT_DB_POOL_SIZE to size the pool. Raises
+    ValueError if it is already initialized for a different database.
+    """
+    global connection_manager
+    if connection_manager is not None and os.path.abspath(connection_manager.db_path) != os.path.abspath(db_path):
+        raise ValueError(
+            f"Connection manager already initialized for {connection_manager.db_path}, not {db_path}"
+        )
+    if connection_manager is None:
+        kwargs.setdefault('pooled', _env_flag('FINSIGHT_DB_POOLING', True))
+        kwargs.setdefault('pool_size', int(os.getenv('FINSIGHT_DB_POOL_SIZE', 8)))
+        connection_manager = ConnectionManager(db_path, **kwargs)
+    return connection_manager
+
+def get_connection_manager() -> Optional[ConnectionManager]:
+    """Get the global connection manager"""
+    return connection_manager
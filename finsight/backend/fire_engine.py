@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+FIRE (Financial Independence, Retire Early) Engine for FinSight
+Closed-form time-to-FIRE solver, vectorized over scenario grids with NumPy
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Any
+
+from lazy_imports import lazy_import
+
+# numpy loads with the first calculation rather than at API start-up
+np = lazy_import('numpy')
+
+# Cap used by the calculator endpoints (50 years), matching the old simulation
+MAX_MONTHS = 600
+
+# Largest scenario grid accepted in one request
+MAX_GRID_CELLS = 100000
+
+def months_to_target(current_savings, monthly_savings, monthly_return, target) -> np.ndarray:
+    """
+    Solve for the number of months until the balance reaches the target.
+
+    The balance after n months of saving P at monthly rate r, starting from S0, is
+
+        B(n) = S0 * (1 + r)^n + P * ((1 + r)^n - 1) / r
+
+    so B(n) = F gives n = ln((F*r + P) / (S0*r + P)) / ln(1 + r). With r = 0
+    it reduces to n = (F - S0) / P. The result is the exact, fractional month
+    count: 0 where the target is already met, inf where it is never reached.
+
+    All arguments broadcast against each other like NumPy arrays.
+    """
+    s0, p, r, f = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (
+        current_savings, monthly_savings, monthly_return, target
+    )))
+    months = np.full(s0.shape, np.inf)
+
+    reached = s0 >= f
+    zero_return = ~reached & (r == 0)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        linear = (f - s0) / p
+        months = np.where(zero_return & (p > 0), linear, months)
+
+        ratio = (f * r + p) / (s0 * r + p)
+        growth = np.log(ratio) / np.log1p(r)
+        solvable = ~reached & ~zero_return & (r > -1) & (ratio > 0) & np.isfinite(growth) & (growth >= 0)
+        months = np.where(solvable, growth, months)
+
+    return np.where(reached, 0.0, months)
+
+def balance_after(current_savings, monthly_savings, monthly_return, months):
+    """Balance after a number of monthly contributions (vectorized)"""
+    s0, p, r, n = (np.asarray(x, dtype=float) for x in (current_savings, monthly_savings, monthly_return, months))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.power(1 + r, n)
+        annuity = np.where(r == 0, n, (growth - 1) / np.where(r == 0, 1, r))
+    return s0 * growth + p * annuity
+
+def solve_months(current_savings: float, monthly_savings: float, monthly_return: float, target: float) -> float:
+    """Scalar time-to-FIRE in exact (fractional) months"""
+    return float(months_to_target(current_savings, monthly_savings, monthly_return, target))
+
+def whole_months(months: float, cap: int = MAX_MONTHS) -> int:
+    """Round a fractional month count up to whole contribution months, capped"""
+    if math.isinf(months):
+        return cap
+    return min(cap, math.ceil(months - 1e-9))
+
+def calculator_years_to_fire(current_savings: float, monthly_savings: float, annual_return: float,
+                             target: float) -> float:
+    """
+    Years to FIRE as /api/calculator/fire has always reported it.
+
+    With savings and a positive return this is the old month-by-month
+    simulation in closed form: whole months, capped at MAX_MONTHS. Otherwise
+    the endpoint's straight-line estimate is kept as it was: remaining amount
+    over yearly savings, uncapped, and infinite without monthly savings.
+    """
+    if monthly_savings > 0 and annual_return > 0:
+        return whole_months(solve_months(current_savings, monthly_savings, annual_return / 12, target)) / 12
+    if monthly_savings > 0:
+        return (target - current_savings) / (monthly_savings * 12)
+    return float('inf')
+
+def scenario_grid(
+    monthly_income: float,
+    current_savings: float,
+    savings_rates: List[float],
+    annual_returns: List[float],
+    annual_expenses: List[float],
+    withdrawal_rate: float = 4
+) -> Dict[str, Any]:
+    """
+    Evaluate every (savings rate x return x expenses) scenario in one pass.
+
+    Rates are percentages. Returns the axes and a nested
+    [savings_rate][return][expenses] grid of years to FIRE (None = never).
+    """
+    rates = np.asarray(savings_rates, dtype=float) / 100
+    returns = np.asarray(annual_returns, dtype=float) / 100
+    expenses = np.asarray(annual_expenses, dtype=float)
+
+    cells = rates.size * returns.size * expenses.size
+    if cells == 0:
+        raise ValueError('savings_rates, annual_returns and annual_expenses must not be empty')
+    if cells > MAX_GRID_CELLS:
+        raise ValueError(f'Scenario grid too large ({cells} cells, max {MAX_GRID_CELLS})')
+    if withdrawal_rate <= 0:
+        raise ValueError('withdrawal_rate must be greater than 0')
+
+    # Broadcast to shape (rates, returns, expenses)
+    monthly_savings = (monthly_income * rates)[:, None, None]
+    monthly_return = (returns / 12)[None, :, None]
+    target = (expenses / (withdrawal_rate / 100))[None, None, :]
+
+    months = months_to_target(current_savings, monthly_savings, monthly_return, target)
+    years = np.round(months / 12, 1)
+
+    return {
+        'savings_rates': savings_rates,
+        'annual_returns': annual_returns,
+        'annual_expenses': annual_expenses,
+        'fire_numbers': np.round(target.ravel(), 2).tolist(),
+        'years_to_fire': np.where(np.isfinite(years), years, None).tolist()
+    }
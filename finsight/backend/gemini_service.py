@@ -7,11 +7,21 @@ Integrates Google's Gemini AI for advanced financial advisory conversations
 import os
 import json
 import asyncio
-from typing import Dict, List, Optional, Any
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any
 from datetime import datetime
-import google.generativeai as genai
 from dataclasses import dataclass
 
+from session_cache import session_cache_from_env
+from response_cache import chat_response_cache_from_env, describe_bucket
+from keyword_matcher import FINANCE_KEYWORDS
+from llm_dispatcher import DispatcherFull, dispatcher_from_env
+from context_window import context_window_from_env, estimate_tokens
+from llm_provider import LLMProvider, provider_from_env
+from circuit_breaker import CircuitOpen, circuit_breaker_from_env
+from llm_executor import llm_executor_from_env
+from rate_limiter import rate_limiter_from_env
+
 @dataclass
 class ChatContext:
     """Represents the financial context for the conversation"""
@@ -37,29 +47,35 @@ class GeminiFinancialAdvisor:
     Advanced Financial Advisory Chatbot powered by Google Gemini AI
     """
     
-    def __init__(self, api_key: str = None):
-        """Initialize Gemini AI service"""
+    def __init__(self, api_key: str = None, provider: Optional[LLMProvider] = None):
+        """Initialize Gemini AI service (or the provider chosen by FINSIGHT_LLM_PROVIDER)"""
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
-            raise ValueError("Gemini API key is required. Set GEMINI_API_KEY environment variable.")
-        
-        # Configure Gemini AI
-        genai.configure(api_key=self.api_key)
-        
-        # Initialize the model with financial expertise
-        self.model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash",
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                top_p=0.8,
-                top_k=40,
-                max_output_tokens=1000,
-            ),
-            system_instruction=self._get_system_prompt()
-        )
-        
-        # Chat sessions storage
-        self.chat_sessions: Dict[str, Any] = {}
+        
+        # Model backend with financial expertise; raises without an API key for Gemini
+        self.provider = provider or provider_from_env(self._get_system_prompt(), self.api_key)
+        
+        # Blocking SDK calls get their own thread pool; async-capable providers bypass it
+        self.executor = llm_executor_from_env()
+        
+        # Live chat sessions, bounded and expired when idle
+        self.chat_sessions = session_cache_from_env(self.provider.start_chat)
+        
+        # Answers to repeated, non-personal questions
+        self.response_cache = chat_response_cache_from_env()
+        
+        # Coalescing and concurrency limit for outbound model calls, shared fairly across users
+        self.dispatcher = dispatcher_from_env()
+        
+        # Per-user cap on how fast the shared model quota can be spent
+        self.limiter = rate_limiter_from_env()
+        
+        # Per-request prompt token budget for history carried by chat sessions
+        self.context_window = context_window_from_env()
+        self.system_tokens = estimate_tokens(self._get_system_prompt())
+        
+        # Per-request deadline and a breaker that serves fallbacks at once while the provider is down
+        self.deadline = float(os.getenv('FINSIGHT_LLM_DEADLINE', 15))
+        self.breaker = circuit_breaker_from_env()
         
     def _get_system_prompt(self) -> str:
         """Get the system prompt for financial advisory"""
@@ -100,56 +116,311 @@ class GeminiFinancialAdvisor:
         message: str, 
         user_id: str,
         context: Optional[ChatContext] = None,
-        conversation_history: Optional[List[ChatMessage]] = None
+        conversation_history: Optional[List[ChatMessage]] = None,
+        use_cache: bool = True,
+        deadline: Optional[float] = None
     ) -> Dict[str, Any]:
         """
-        Get AI response for a chat message with financial context
+        Get AI response for a chat message with financial context.
+        
+        deadline is the time.monotonic() timestamp by which the answer is due,
+        covering the wait for a call slot as well as the model call; it
+        defaults to the service deadline from now.
         """
+        deadline = deadline or time.monotonic() + self.deadline
         try:
-            # Build the conversation prompt with context
-            prompt = self._build_contextual_prompt(message, context, conversation_history)
+            # Repeated starter questions are answered from the response cache
+            cache_key = self.response_cache.key_for(message, context, conversation_history, bypass=not use_cache)
+            self._start_conversation(user_id, cache_key)
+            cached = self.response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                return self._build_result(message, cached, context, self._usage(0, 0, cached))
             
-            # Get or create chat session
-            if user_id not in self.chat_sessions:
-                self.chat_sessions[user_id] = self.model.start_chat(history=[])
+            # Fail fast while the provider is known to be down
+            self.breaker.check()
             
-            chat_session = self.chat_sessions[user_id]
+            # Users over their call rate get the local answer instead of a model call
+            retry_after = self.limiter.acquire(user_id)
+            if retry_after:
+                return self._shed_response(message, 'Too many messages, please slow down', 'rate_limited', retry_after)
             
-            # Generate response
-            response = await asyncio.to_thread(chat_session.send_message, prompt)
+            # Build the conversation prompt with context; shared answers only see its bucket
+            prompt = self._build_contextual_prompt(message, context, cache_key[1] if cache_key else None)
             
-            # Process response
-            processed_response = self._process_response(response.text, context)
+            async def generate():
+                # Get or create chat session, kept within the token budget
+                chat_session, usage = self._get_session_for(user_id, conversation_history, prompt, cache_key)
+                
+                # Generate response
+                started = time.perf_counter()
+                response = await self._call_model(user_id, deadline, lambda: self._send(chat_session, prompt))
+                self._record_exchange(user_id, prompt, response.text, usage, shared=bool(cache_key))
+                if cache_key:
+                    self.response_cache.set(cache_key, response.text, time.perf_counter() - started)
+                return response.text, usage, started
             
+            # Identical in-flight questions share one call: cacheable ones across
+            # users (their prompt and session hold nothing personal), anything
+            # else only for the same user and prompt
+            queued_at = time.perf_counter()
+            text, usage, started = await self.dispatcher.run(cache_key or (user_id, prompt), generate, user=user_id,
+                                                           deadline=deadline)
+            
+            # Time until the call that produced this answer began (0 if it joined one already running)
+            return self._build_result(message, text, context, usage, max(0.0, started - queued_at))
+            
+        except (DispatcherFull, CircuitOpen) as e:
+            return self._shed_response(message, str(e), 'circuit_open' if isinstance(e, CircuitOpen) else 'capacity')
+        except Exception as e:
             return {
-                'success': True,
-                'response': processed_response['content'],
-                'suggestions': processed_response.get('suggestions', []),
-                'quick_replies': processed_response.get('quick_replies', []),
-                'intent': self._detect_intent(message),
+                'success': False,
+                'error': str(e),
+                'fallback_response': self._get_fallback_response(message),
                 'timestamp': datetime.now().isoformat()
             }
+    
+    async def stream_chat_response(
+        self,
+        message: str,
+        user_id: str,
+        context: Optional[ChatContext] = None,
+        conversation_history: Optional[List[ChatMessage]] = None,
+        use_cache: bool = True,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an AI response as Gemini generates it.
+        
+        Yields {'type': 'chunk', 'text': ...} for each partial chunk, then a
+        single {'type': 'done', ...} event with the same fields as
+        get_chat_response (full text, quick replies, intent), or
+        {'type': 'error', ...} with a fallback response. deadline is as for
+        get_chat_response.
+        """
+        parts = []
+        deadline = deadline or time.monotonic() + self.deadline
+        try:
+            # A cached answer is sent as a single chunk
+            cache_key = self.response_cache.key_for(message, context, conversation_history, bypass=not use_cache)
+            self._start_conversation(user_id, cache_key)
+            cached = self.response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                yield {'type': 'chunk', 'text': cached}
+                yield {'type': 'done', **self._build_result(message, cached, context, self._usage(0, 0, cached))}
+                return
+            
+            self.breaker.check()
+            retry_after = self.limiter.acquire(user_id)
+            if retry_after:
+                yield {'type': 'error', **self._shed_response(message, 'Too many messages, please slow down',
+                                                              'rate_limited', retry_after)}
+                return
+            prompt = self._build_contextual_prompt(message, context, cache_key[1] if cache_key else None)
             
+            # Streams hold a call slot until the last chunk (no coalescing)
+            async with self.dispatcher.slot(user_id, deadline) as queue_wait:
+                chat_session, usage = self._get_session_for(user_id, conversation_history, prompt, cache_key)
+                
+                # Chunks are awaited one by one, all within the one request deadline
+                started = time.perf_counter()
+                response = await self._call_model(user_id, deadline, lambda: self._send(chat_session, prompt, stream=True))
+                next_chunk = self._chunk_reader(response)
+                while True:
+                    chunk = await self._call_model(user_id, deadline, next_chunk, gated=False)
+                    if chunk is None:
+                        break
+                    if chunk.text:
+                        parts.append(chunk.text)
+                        yield {'type': 'chunk', 'text': chunk.text}
+            
+        except (DispatcherFull, CircuitOpen) as e:
+            reason = 'circuit_open' if isinstance(e, CircuitOpen) else 'capacity'
+            yield {'type': 'error', **self._shed_response(message, str(e), reason)}
+            return
         except Exception as e:
-            return {
+            yield {
+                'type': 'error',
                 'success': False,
                 'error': str(e),
                 'fallback_response': self._get_fallback_response(message),
                 'timestamp': datetime.now().isoformat()
             }
+            return
+        
+        text = ''.join(parts)
+        self._record_exchange(user_id, prompt, text, usage, shared=bool(cache_key))
+        if cache_key:
+            self.response_cache.set(cache_key, text, time.perf_counter() - started)
+        yield {'type': 'done', **self._build_result(message, text, context, usage, queue_wait)}
+    
+    def _start_conversation(self, user_id: str, cache_key: Optional[tuple]):
+        """
+        Drop the user's live session when a shared answer starts a new conversation.
+        
+        Shared answers never enter the live session, so a follow-up rebuilds
+        it from the history the client sends instead of an older conversation.
+        """
+        if cache_key:
+            self.chat_sessions.discard(user_id)
+    
+    def _get_session_for(self, user_id: str, history: Optional[List[ChatMessage]], prompt: str,
+                         cache_key: Optional[tuple]):
+        """
+        Get the session to send `prompt` on and its prompt usage.
+        
+        Answers shared through the response cache are generated on a fresh
+        session, so they cannot draw on anyone's earlier conversation.
+        """
+        if not cache_key:
+            return self._get_chat_session(user_id, history, prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        return self.provider.start_chat([]), self._usage(self.system_tokens + prompt_tokens, 0)
+    
+    def _get_chat_session(self, user_id: str, history: Optional[List[ChatMessage]], prompt: str):
+        """
+        Get the user's live chat session and the prompt usage of sending `prompt` on it.
+        
+        A session that would push the request over the token budget is folded:
+        it is dropped and rebuilt like an evicted one, from recent turns verbatim
+        plus a summary of older turns. Rebuilt sessions get half of what the
+        budget leaves, so they absorb a few exchanges before folding again.
+        """
+        prompt_tokens = estimate_tokens(prompt)
+        available = self.context_window.budget_tokens - self.system_tokens - prompt_tokens
+        folded = user_id in self.chat_sessions and self.chat_sessions.tokens(user_id) > available
+        if folded:
+            self.chat_sessions.discard(user_id)
+        
+        plan = None
+        if user_id not in self.chat_sessions:
+            plan = self.context_window.fit(history, max(available, 0) // 2)
+        chat_session = self.chat_sessions.get(user_id, plan.history if plan else None, plan.tokens if plan else 0)
+        
+        usage = self._usage(self.system_tokens + self.chat_sessions.tokens(user_id) + prompt_tokens,
+                            self.chat_sessions.tokens(user_id))
+        usage['folded'] = folded
+        return chat_session, usage
+    
+    def _record_exchange(self, user_id: str, prompt: str, text: str, usage: Dict[str, Any], shared: bool = False):
+        """Account for an exchange added to the user's session (unless it was shared) and the prompt it cost"""
+        usage['completion_tokens'] = estimate_tokens(text)
+        if not shared:
+            self.chat_sessions.record(user_id, len(prompt.encode('utf-8')) + len(text.encode('utf-8')),
+                                      estimate_tokens(prompt) + usage['completion_tokens'])
+        self.context_window.record(usage['prompt_tokens'], usage['folded'])
+    
+    def _usage(self, prompt_tokens: int, history_tokens: int, text: str = '') -> Dict[str, Any]:
+        """Estimated token usage of one response"""
+        return {
+            'prompt_tokens': prompt_tokens,
+            'history_tokens': history_tokens,
+            'completion_tokens': estimate_tokens(text),
+            'budget_tokens': self.context_window.budget_tokens,
+            'folded': False
+        }
+    
+    async def _send(self, chat_session, prompt: str, stream: bool = False):
+        """Send a message with the SDK's async API, or on the LLM thread pool if it has none"""
+        if self.provider.native_async:
+            return await chat_session.send_message_async(prompt, stream=stream)
+        return await self.executor.run(chat_session.send_message, prompt, stream=stream)
+    
+    def _chunk_reader(self, response) -> Callable[[], Awaitable[Any]]:
+        """Get an awaitable next-chunk function for a streamed response (None when exhausted)"""
+        if hasattr(response, '__aiter__'):
+            chunks = response.__aiter__()
+            return lambda: anext(chunks, None)
+        chunks = iter(response)
+        return lambda: self.executor.run(next, chunks, None)
+    
+    async def _call_model(self, user_id: str, deadline: float, call: Callable[[], Awaitable[Any]],
+                          gated: bool = True):
+        """
+        Await a provider call through the circuit breaker, giving up at the
+        request's deadline (a monotonic timestamp).
+        
+        Ungated calls (pulling the rest of an admitted stream) are not refused
+        by an open breaker and only report failures to it.
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError('Request deadline passed before the AI advisor answered')
+        
+        if gated:
+            self.breaker.acquire()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(call(), remaining)
+        except asyncio.TimeoutError:
+            # A blocking call keeps running and may still land in the session, so rebuild it from stored history
+            self.chat_sessions.discard(user_id)
+            self.breaker.record_failure('Timed out')
+            raise TimeoutError(f'AI advisor did not answer within {self.deadline:g}s') from None
+        except asyncio.CancelledError:
+            if gated:
+                self.breaker.abandon()
+            raise
+        except Exception as e:
+            self.breaker.record_failure(str(e))
+            raise
+        if gated:
+            self.breaker.record_success(time.monotonic() - started)
+        return result
+    
+    def _shed_response(self, message: str, error: str, reason: str = 'capacity',
+                       retry_after: Optional[float] = None) -> Dict[str, Any]:
+        """Immediate fallback when the advisor is at capacity, its circuit is open or the user is rate limited"""
+        result = {
+            'success': False,
+            'error': error,
+            'shed': True,
+            'reason': reason,
+            'fallback_response': self._get_fallback_response(message),
+            'intent': self._detect_intent(message),
+            'timestamp': datetime.now().isoformat()
+        }
+        if retry_after is not None:
+            result['retry_after'] = round(retry_after, 1)
+        return result
+    
+    def _build_result(self, message: str, response_text: str, context: Optional[ChatContext],
+                      usage: Optional[Dict[str, Any]] = None, queue_wait: float = 0.0) -> Dict[str, Any]:
+        """Build the chat result payload from a complete response text"""
+        processed_response = self._process_response(response_text, context)
+        
+        return {
+            'success': True,
+            'response': processed_response['content'],
+            'suggestions': processed_response.get('suggestions', []),
+            'quick_replies': processed_response.get('quick_replies', []),
+            'intent': self._detect_intent(message),
+            'usage': usage or {},
+            'queue_wait_ms': round(queue_wait * 1000, 1),
+            'timestamp': datetime.now().isoformat()
+        }
     
     def _build_contextual_prompt(
         self, 
         message: str, 
         context: Optional[ChatContext],
-        history: Optional[List[ChatMessage]]
+        bucket: Optional[tuple] = None
     ) -> str:
-        """Build a contextual prompt with user's financial information"""
+        """
+        Build a contextual prompt with user's financial information.
+        
+        For answers shared through the response cache, pass the context bucket
+        from the cache key: the prompt then describes the bucket instead of
+        the user's exact figures and goals.
+        """
         
         prompt_parts = []
         
+        if bucket is not None:
+            bucket_info = describe_bucket(bucket)
+            if bucket_info:
+                prompt_parts.append(f"User's Financial Context: {' | '.join(bucket_info)}")
         # Add context if available
-        if context:
+        elif context:
             context_info = []
             if context.monthly_income:
                 context_info.append(f"Monthly Income: ${context.monthly_income:,.2f}")
@@ -167,14 +438,7 @@ class GeminiFinancialAdvisor:
             if context_info:
                 prompt_parts.append(f"User's Financial Context: {' | '.join(context_info)}")
         
-        # Add conversation history (last 3 messages for context)
-        if history and len(history) > 1:
-            recent_history = history[-3:]
-            history_text = []
-            for msg in recent_history:
-                role = "User" if msg.role == "user" else "Assistant"
-                history_text.append(f"{role}: {msg.content[:100]}...")
-            prompt_parts.append(f"Recent Conversation: {' || '.join(history_text)}")
+        # Conversation history travels in the chat session (see _get_chat_session)
         
         # Add the current message
         prompt_parts.append(f"Current Question: {message}")
@@ -191,25 +455,26 @@ class GeminiFinancialAdvisor:
         }
         
         # Generate contextual quick replies based on the response
-        if any(keyword in response_text.lower() for keyword in ['budget', 'budgeting']):
+        topic = FINANCE_KEYWORDS.first(response_text, 'reply', 'general')
+        if topic == 'budget':
             processed['quick_replies'] = [
                 "Show me budget templates",
                 "How to track expenses?",
                 "50/30/20 rule explanation"
             ]
-        elif any(keyword in response_text.lower() for keyword in ['save', 'saving', 'savings']):
+        elif topic == 'saving':
             processed['quick_replies'] = [
                 "Emergency fund tips",
                 "High-yield savings accounts",
                 "Automatic savings strategies"
             ]
-        elif any(keyword in response_text.lower() for keyword in ['invest', 'investment']):
+        elif topic == 'investing':
             processed['quick_replies'] = [
                 "Investment basics for beginners",
                 "Index funds vs ETFs",
                 "How much should I invest?"
             ]
-        elif any(keyword in response_text.lower() for keyword in ['debt', 'loan']):
+        elif topic == 'debt':
             processed['quick_replies'] = [
                 "Debt payoff strategies",
                 "Student loan options",
@@ -236,24 +501,8 @@ class GeminiFinancialAdvisor:
     
     def _detect_intent(self, message: str) -> str:
         """Detect the intent of the user's message"""
-        message_lower = message.lower()
-        
-        intent_keywords = {
-            'budgeting': ['budget', 'expense', 'spending', 'track', 'money management'],
-            'saving': ['save', 'savings', 'emergency fund', 'goal'],
-            'investing': ['invest', 'investment', 'stocks', 'portfolio', 'etf', 'index fund'],
-            'debt': ['debt', 'loan', 'credit', 'payment', 'payoff'],
-            'planning': ['plan', 'goal', 'future', 'retirement', 'financial plan'],
-            'income': ['income', 'salary', 'job', 'career', 'money'],
-            'education': ['learn', 'explain', 'what is', 'how does', 'help me understand'],
-            'general': ['hello', 'hi', 'help', 'advice', 'recommendation']
-        }
-        
-        for intent, keywords in intent_keywords.items():
-            if any(keyword in message_lower for keyword in keywords):
-                return intent
-        
-        return 'general'
+        # Keyword table lives in keyword_matcher, shared with the other matchers
+        return FINANCE_KEYWORDS.first(message, 'intent', 'general')
     
     def _get_fallback_response(self, message: str) -> str:
         """Get a fallback response when AI fails"""
@@ -272,8 +521,7 @@ class GeminiFinancialAdvisor:
     
     def clear_chat_session(self, user_id: str):
         """Clear chat session for a user"""
-        if user_id in self.chat_sessions:
-            del self.chat_sessions[user_id]
+        self.chat_sessions.discard(user_id)
     
     def get_session_info(self, user_id: str) -> Dict[str, Any]:
         """Get information about the chat session"""
@@ -282,15 +530,47 @@ class GeminiFinancialAdvisor:
             'session_id': user_id,
             'created_at': datetime.now().isoformat()
         }
+    
+    def get_session_stats(self) -> Dict[str, Any]:
+        """Get resident chat session metrics"""
+        return self.chat_sessions.get_stats()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache hit rate and latency saved"""
+        return self.response_cache.get_stats()
+    
+    def get_dispatcher_stats(self) -> Dict[str, Any]:
+        """Get outbound call concurrency, queueing and coalescing metrics"""
+        return self.dispatcher.get_stats()
+    
+    def get_rate_limiter_stats(self) -> Dict[str, Any]:
+        """Get per-user rate limiting counters and settings"""
+        return self.limiter.get_stats()
+    
+    def get_provider_info(self) -> Dict[str, Any]:
+        """Get the model provider and its settings"""
+        return self.provider.describe()
+    
+    def get_breaker_stats(self) -> Dict[str, Any]:
+        """Get circuit breaker state and call deadline"""
+        return {**self.breaker.get_stats(), 'deadline_seconds': self.deadline}
+    
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """Get LLM thread pool size and queue depth, and whether calls bypass it"""
+        return {**self.executor.get_stats(), 'native_async': self.provider.native_async}
+    
+    def get_context_stats(self) -> Dict[str, Any]:
+        """Get prompt tokens per request against the context budget"""
+        return self.context_window.get_stats()
 
 # Global instance
 gemini_advisor = None
 
-def initialize_gemini_service(api_key: str = None) -> GeminiFinancialAdvisor:
+def initialize_gemini_service(api_key: str = None, provider: Optional[LLMProvider] = None) -> GeminiFinancialAdvisor:
     """Initialize the global Gemini service instance"""
     global gemini_advisor
     if gemini_advisor is None:
-        gemini_advisor = GeminiFinancialAdvisor(api_key)
+        gemini_advisor = GeminiFinancialAdvisor(api_key, provider)
     return gemini_advisor
 
 def get_gemini_service() -> Optional[GeminiFinancialAdvisor]:
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Keyword Matcher for FinSight
+Matching of chat text against the keyword tables used by the chatbot
+"""
+
+from typing import Dict, List
+
+class KeywordMatcher:
+    """
+    Matches text against several keyword tables.
+
+    tables maps a table name to an ordered {category: [keywords]} dict.
+    Matching keeps the substring semantics of `keyword in text.lower()`:
+    first() lowercases the text once and tests the table's keywords in order
+    until one hits, so keyword-dense texts stop early and texts without
+    keywords cost a few fast substring scans.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]]):
+        self.tables = tables
+        self._ordered = {
+            table: [(category, [keyword.lower() for keyword in keywords]) for category, keywords in categories.items()]
+            for table, categories in tables.items()
+        }
+
+    def first(self, text: str, table: str, default: str) -> str:
+        """Get the first category of one table hit by the text"""
+        lowered = text.lower()
+        for category, keywords in self._ordered[table]:
+            for keyword in keywords:
+                if keyword in lowered:
+                    return category
+        return default
+
+# Keyword tables used by the chatbot, in precedence order within each table
+FINANCE_KEYWORDS = KeywordMatcher({
+    # User intent (GeminiFinancialAdvisor._detect_intent)
+    'intent': {
+        'budgeting': ['budget', 'expense', 'spending', 'track', 'money management'],
+        'saving': ['save', 'savings', 'emergency fund', 'goal'],
+        'investing': ['invest', 'investment', 'stocks', 'portfolio', 'etf', 'index fund'],
+        'debt': ['debt', 'loan', 'credit', 'payment', 'payoff'],
+        'planning': ['plan', 'goal', 'future', 'retirement', 'financial plan'],
+        'income': ['income', 'salary', 'job', 'career', 'money'],
+        'education': ['learn', 'explain', 'what is', 'how does', 'help me understand'],
+        'general': ['hello', 'hi', 'help', 'advice', 'recommendation']
+    },
+    # Topic of an AI response, for quick replies (GeminiFinancialAdvisor._process_response)
+    'reply': {
+        'budget': ['budget', 'budgeting'],
+        'saving': ['save', 'saving', 'savings'],
+        'investing': ['invest', 'investment'],
+        'debt': ['debt', 'loan']
+    },
+    # Topic of a message when Gemini is unavailable (chatbot_routes.get_fallback_response)
+    'fallback': {
+        'budget': ['budget', 'expense', 'spending'],
+        'saving': ['save', 'saving', 'emergency'],
+        'investing': ['invest', 'investment', 'stocks'],
+        'debt': ['debt', 'loan', 'credit']
+    }
+})
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Lazy Imports for FinSight
+Defers heavy libraries to first use and warms them on a background thread once the server is up
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+import types
+from typing import Any, Callable, Dict, Iterable
+
+# Libraries the backend needs sooner or later but not to start serving
+HEAVY_MODULES = ('numpy', 'google.generativeai')
+
+_warmup_lock = threading.Lock()
+_warmup: Dict[str, Any] = {'state': 'not_started', 'modules': {}}
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that imports it on first attribute access.
+
+    Once loaded, the real module's namespace is copied in, so later lookups
+    are plain attribute hits rather than going through __getattr__.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_loaded'] = False
+
+    def _load(self) -> types.ModuleType:
+        with self.__dict__['_lazy_lock']:
+            module = importlib.import_module(self.__name__)
+            if not self.__dict__['_lazy_loaded']:
+                self.__dict__.update(module.__dict__)
+                self.__dict__['_lazy_loaded'] = True
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_loaded'] else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Get a module that is imported on first use (the real module if it already is)"""
+    return sys.modules.get(name) or LazyModule(name)
+
+def module_available(name: str) -> bool:
+    """Whether a module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def _warm(names: Iterable[str], hooks: Iterable[Callable[[], Any]], delay: float):
+    """Import each module and run each hook, recording how long each took"""
+    time.sleep(delay)
+    for name in names:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            result = round((time.perf_counter() - started) * 1000, 1)
+        except ImportError:
+            result = 'unavailable'
+        with _warmup_lock:
+            _warmup['modules'][name] = result
+    for hook in hooks:
+        try:
+            hook()
+        except Exception as e:
+            print(f"Warm-up hook failed: {e}")
+    with _warmup_lock:
+        _warmup['state'] = 'done'
+
+def start_warmup(names: Iterable[str] = HEAVY_MODULES, hooks: Iterable[Callable[[], Any]] = (),
+                 delay: float = None) -> bool:
+    """
+    Import heavy modules and run warm-up hooks on a daemon thread after
+    `delay` seconds (FINSIGHT_WARMUP_DELAY, default 1), so the first requests
+    do not pay for them. Runs at most once; FINSIGHT_WARMUP=0 disables it.
+    """
+    if os.getenv('FINSIGHT_WARMUP', '1') == '0':
+        return False
+    with _warmup_lock:
+        if _warmup['state'] != 'not_started':
+            return False
+        _warmup['state'] = 'running'
+    if delay is None:
+        delay = float(os.getenv('FINSIGHT_WARMUP_DELAY', 1.0))
+    threading.Thread(target=_warm, args=(list(names), list(hooks), delay),
+                     name='finsight-warmup', daemon=True).start()
+    return True
+
+def get_warmup_status() -> Dict[str, Any]:
+    """Get warm-up state and per-module import time in ms"""
+    with _warmup_lock:
+        return {'state': _warmup['state'], 'modules': dict(_warmup['modules'])}
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+LLM Call Dispatcher for FinSight
+Coalesces identical in-flight model calls and caps concurrent calls behind a bounded, per-user fair wait queue
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+class DispatcherFull(RuntimeError):
+    """Raised when every call slot is busy and the wait queue is full"""
+
+@dataclass
+class _Waiter:
+    """A caller queued for a call slot, with its fair-queue tags"""
+    user: str
+    start: float
+    finish: float
+    future: asyncio.Future
+    popped: bool = False
+    cancelled: bool = False
+
+class LLMDispatcher:
+    """
+    Gatekeeper for outbound model calls.
+
+    run(key, call) is singleflight: while a call for `key` is in flight, later
+    callers with the same key await its result instead of calling again.
+    Calls that do go out take one of max_concurrency slots; up to max_queue
+    callers wait for a slot and anyone beyond that gets DispatcherFull
+    immediately, so the caller can shed load with a fallback.
+
+    A caller that passes a deadline (a time.monotonic() timestamp) and is
+    still waiting for a slot when it passes gets DispatcherFull as well.
+
+    Waiting callers are served by start-time fair queuing across users: each
+    waiter is tagged finish = max(virtual time, user's last finish) + 1/weight
+    and the smallest tag goes next, so a user with many queued calls gets
+    their weighted share of freed slots instead of all of them.
+
+    State is guarded by a thread lock and waiters are woken on their own loop,
+    so the dispatcher can be shared by the background loop and an ASGI loop.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32,
+                 weights: Optional[Dict[str, float]] = None, default_weight: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.weights = weights or {}
+        self.default_weight = default_weight
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queue: List[Tuple[float, int, _Waiter]] = []
+        self._waiting = 0
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._queued_by_user: Dict[str, int] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._stats = {'calls': 0, 'coalesced': 0, 'shed': 0, 'queued': 0, 'timed_out': 0, 'peak_active': 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def weight_for(self, user: str) -> float:
+        """A user's share of freed slots relative to other waiting users"""
+        return self.weights.get(user, self.default_weight)
+
+    async def _acquire(self, user: str, deadline: Optional[float] = None) -> float:
+        """Take a call slot, waiting in the fair queue until the deadline if needed; returns seconds waited"""
+        with self._lock:
+            if self._active < self.max_concurrency and not self._waiting:
+                self._take_slot()
+                return 0.0
+            if self._waiting >= self.max_queue:
+                self._stats['shed'] += 1
+                raise DispatcherFull('Too many requests waiting for the AI advisor')
+            waiter = self._enqueue(user, asyncio.get_running_loop().create_future())
+
+        queued_at = time.monotonic()
+        try:
+            # The releasing caller hands its slot straight to us
+            await asyncio.wait_for(waiter.future, None if deadline is None else deadline - queued_at)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            with self._lock:
+                handed_over = waiter.popped
+                if not handed_over:
+                    waiter.cancelled = True
+                    self._forget(waiter)
+            # The slot was handed over just as we gave up; pass it on
+            if handed_over:
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                with self._lock:
+                    self._stats['timed_out'] += 1
+                raise DispatcherFull('Timed out waiting for the AI advisor') from None
+            raise
+
+        waited = time.monotonic() - queued_at
+        with self._lock:
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return waited
+
+    def _enqueue(self, user: str, future: asyncio.Future) -> _Waiter:
+        """Tag and queue a waiter (lock held)"""
+        start = max(self._virtual_time, self._last_finish.get(user, 0.0))
+        waiter = _Waiter(user, start, start + 1.0 / self.weight_for(user), future)
+        self._last_finish[user] = waiter.finish
+        heapq.heappush(self._queue, (waiter.finish, next(self._sequence), waiter))
+        self._waiting += 1
+        self._queued_by_user[user] = self._queued_by_user.get(user, 0) + 1
+        self._stats['queued'] += 1
+        return waiter
+
+    def _forget(self, waiter: _Waiter):
+        """Drop a served or cancelled waiter from the queue counts (lock held)"""
+        self._waiting -= 1
+        left = self._queued_by_user[waiter.user] - 1
+        if left:
+            self._queued_by_user[waiter.user] = left
+        else:
+            # Idle users start again from the current virtual time
+            del self._queued_by_user[waiter.user]
+            self._last_finish.pop(waiter.user, None)
+
+    def _take_slot(self):
+        """Count a newly taken slot (lock held)"""
+        self._active += 1
+        self._stats['calls'] += 1
+        self._stats['peak_active'] = max(self._stats['peak_active'], self._active)
+
+    def _release(self):
+        """Give a slot to the next waiter in fair order, or free it"""
+        with self._lock:
+            # A popped waiter owns the slot; if it was cancelled meanwhile it passes it on
+            while self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                if waiter.cancelled:
+                    continue
+                waiter.popped = True
+                self._virtual_time = waiter.start
+                self._forget(waiter)
+                self._stats['calls'] += 1
+                waiter.future.get_loop().call_soon_threadsafe(_wake, waiter.future)
+                return
+            self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, user: Optional[str] = None, deadline: Optional[float] = None):
+        """Hold one call slot for the duration of a block (e.g. a streamed response); yields seconds waited"""
+        waited = await self._acquire(user or '', deadline)
+        try:
+            yield waited
+        finally:
+            self._release()
+
+    async def run(self, key: Optional[Hashable], call: Callable[[], Awaitable[Any]], user: Optional[str] = None,
+                  deadline: Optional[float] = None) -> Any:
+        """Run call() under a slot, sharing the result with concurrent callers of the same key"""
+        if key is None:
+            async with self.slot(user, deadline):
+                return await call()
+
+        with self._lock:
+            shared = self._inflight.get(key)
+            if shared is None:
+                shared = self._inflight[key] = Future()
+                leader = True
+            else:
+                self._stats['coalesced'] += 1
+                leader = False
+
+        if not leader:
+            # A follower that gives up must not cancel the call for everyone else
+            return await asyncio.shield(asyncio.wrap_future(shared))
+
+        try:
+            async with self.slot(user, deadline):
+                result = await call()
+            if not shared.done():
+                shared.set_result(result)
+            return result
+        except BaseException as e:
+            # Followers share the failure, but not the leader's own cancellation
+            if not shared.done():
+                shared.set_exception(e if isinstance(e, Exception) else RuntimeError('Coalesced call was cancelled'))
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get slot usage, queue depth, queue wait and coalescing/shedding counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['active'] = self._active
+            stats['waiting'] = self._waiting
+            stats['waiting_users'] = len(self._queued_by_user)
+            stats['inflight_keys'] = len(self._inflight)
+            stats['avg_wait_ms'] = round(self._wait_total / stats['queued'] * 1000, 1) if stats['queued'] else 0
+            stats['max_wait_ms'] = round(self._wait_max * 1000, 1)
+        stats['max_concurrency'] = self.max_concurrency
+        stats['max_queue'] = self.max_queue
+        return stats
+
+def _wake(waiter: asyncio.Future):
+    """Resolve a waiter on its own loop, unless it was cancelled meanwhile"""
+    if not waiter.done():
+        waiter.set_result(None)
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse 'user_a=2,user_b=0.5' into per-user weights"""
+    weights = {}
+    for part in filter(None, (item.strip() for item in spec.split(','))):
+        user, _, weight = part.rpartition('=')
+        if not user or float(weight) <= 0:
+            raise ValueError(f"Invalid user weight '{part}', expected user=positive number")
+        weights[user] = float(weight)
+    return weights
+
+def dispatcher_from_env() -> LLMDispatcher:
+    """Build a dispatcher from FINSIGHT_LLM_MAX_CONCURRENCY, FINSIGHT_LLM_MAX_QUEUE and FINSIGHT_LLM_USER_WEIGHTS"""
+    return LLMDispatcher(
+        max_concurrency=int(os.getenv('FINSIGHT_LLM_MAX_CONCURRENCY', 8)),
+        max_queue=int(os.getenv('FINSIGHT_LLM_MAX_QUEUE', 32)),
+        weights=parse_weights(os.getenv('FINSIGHT_LLM_USER_WEIGHTS', ''))
+    )
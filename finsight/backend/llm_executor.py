@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+LLM Executor for FinSight
+Dedicated, sized thread pool for blocking model SDK calls, with queue-depth metrics
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+class LLMExecutor:
+    """
+    Runs blocking provider calls on max_workers threads of their own, so slow
+    model calls queue here instead of filling the event loop's default
+    executor that asyncio.to_thread (and the ASGI bridge) share.
+
+    A call abandoned at its deadline keeps its thread until the SDK returns,
+    so the pool is sized above the dispatcher's concurrency limit.
+    """
+
+    def __init__(self, max_workers: int = 16):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='finsight-llm')
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._stats = {'submitted': 0, 'completed': 0, 'cancelled': 0, 'peak_queued': 0, 'peak_active': 0}
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result"""
+        with self._lock:
+            self._queued += 1
+            self._stats['submitted'] += 1
+            self._stats['peak_queued'] = max(self._stats['peak_queued'], self._queued)
+        future = self._pool.submit(self._call, fn, args, kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Still queued: it will never run, so it leaves the queue here
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+                    self._stats['cancelled'] += 1
+            raise
+
+    def _call(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Pool-side wrapper that tracks queued and running calls"""
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._stats['peak_active'] = max(self._stats['peak_active'], self._active)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._stats['completed'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool size, current queue depth and running calls, and counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queued'] = self._queued
+            stats['active'] = self._active
+        stats['max_workers'] = self.max_workers
+        return stats
+
+    def shutdown(self):
+        """Stop accepting calls and let running ones finish in the background"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+def llm_executor_from_env() -> LLMExecutor:
+    """Build an executor sized by FINSIGHT_LLM_THREADS"""
+    return LLMExecutor(max_workers=int(os.getenv('FINSIGHT_LLM_THREADS', 16)))
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+LLM Providers for FinSight
+Chat backends for the financial advisor: Google Gemini, or a deterministic local stub for offline benchmarking
+"""
+
+import asyncio
+import importlib
+import os
+import random
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from context_window import CHARS_PER_TOKEN
+from keyword_matcher import FINANCE_KEYWORDS
+from lazy_imports import module_available
+
+GEMINI_SDK = 'google.generativeai'
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal')
+
+# Canned advice per topic; the variant is picked from the prompt so a prompt always gets the same answer
+CANNED_RESPONSES = {
+    'budget': [
+        "A simple way to start budgeting is the 50/30/20 rule: 50% of income for needs, 30% for wants and 20% for savings. Track every expense for a month to see where your money goes, then adjust one category at a time.",
+        "Build your budget around fixed costs first: rent, utilities and loan payments. Give every remaining dollar a job, and review your spending each week so small leaks do not add up."
+    ],
+    'saving': [
+        "Start with an emergency fund covering three to six months of expenses. Automate a transfer to a high-yield savings account on payday so saving happens before spending.",
+        "Pay yourself first: set aside a fixed amount as soon as you are paid, even if it is only $25. Raise it whenever your income grows and keep the savings in a separate account."
+    ],
+    'investing': [
+        "For beginners, low-cost index funds or ETFs are a solid start because they spread risk across many companies. Invest regularly, keep fees low and think in years, not weeks.",
+        "Before investing, make sure you have an emergency fund and no high-interest debt. Then consider a broad market index fund and contribute a fixed amount every month."
+    ],
+    'debt': [
+        "List your debts by interest rate and pay the minimum on all of them, putting every extra dollar on the highest rate first. This avalanche method saves the most interest.",
+        "If motivation is the challenge, try the snowball method: pay off the smallest balance first, then roll that payment into the next one. Avoid taking on new debt while you pay down the old."
+    ],
+    'general': [
+        "Good finances rest on a few habits: spend less than you earn, keep an emergency fund, avoid high-interest debt and invest for the long term. Which of these would you like to work on first?",
+        "I can help with budgeting, saving, investing and paying off debt. Tell me a bit about your income and goals and I will suggest a few concrete next steps."
+    ]
+}
+
+class StubProviderError(RuntimeError):
+    """Simulated provider failure raised by StubProvider"""
+
+class LLMProvider:
+    """
+    A chat backend. start_chat(history) returns a session whose
+    send_message(prompt, stream=False) gives a response with .text, or with
+    stream=True an iterator of chunks with .text, as google.generativeai does.
+
+    When native_async is set, sessions also have an awaitable
+    send_message_async(prompt, stream=False) whose streamed responses are
+    async iterators, and callers need no threads at all.
+    """
+    name = 'base'
+    native_async = False
+
+    def start_chat(self, history: List[Dict[str, Any]]):
+        """Start a chat session seeded with Gemini-style history contents"""
+        raise NotImplementedError
+
+    def warm(self):
+        """Load the client ahead of the first chat (no-op by default)"""
+
+    def describe(self) -> Dict[str, Any]:
+        """Get the provider name and settings for health checks"""
+        return {'name': self.name}
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini through google.generativeai.
+
+    The SDK is slow to import, so it is only checked for here and imported
+    (and the model configured) by the first chat or by warm().
+    """
+    name = 'gemini'
+
+    def __init__(self, api_key: Optional[str], system_prompt: str, model_name: str = "gemini-1.5-flash"):
+        if not module_available(GEMINI_SDK):
+            raise ImportError("google-generativeai is not installed")
+        if not api_key:
+            raise ValueError("Gemini API key is required. Set GEMINI_API_KEY environment variable.")
+
+        self.api_key = api_key
+        self.system_prompt = system_prompt
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The configured GenerativeModel, built on first use"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    genai = importlib.import_module(GEMINI_SDK)
+                    genai.configure(api_key=self.api_key)
+                    self.native_async = hasattr(getattr(genai, 'ChatSession', None), 'send_message_async')
+                    self._model = genai.GenerativeModel(
+                        model_name=self.model_name,
+                        generation_config=genai.types.GenerationConfig(
+                            temperature=0.7,
+                            top_p=0.8,
+                            top_k=40,
+                            max_output_tokens=1000,
+                        ),
+                        system_instruction=self.system_prompt
+                    )
+        return self._model
+
+    def start_chat(self, history: List[Dict[str, Any]]):
+        return self.model.start_chat(history=history)
+
+    def warm(self):
+        self.model
+
+    def describe(self) -> Dict[str, Any]:
+        loaded = self._model is not None
+        return {'name': self.name, 'model': self.model_name, 'loaded': loaded,
+                'native_async': self.native_async if loaded else None}
+
+class StubResponse:
+    """A complete stub response or one streamed chunk"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+class StubChatSession:
+    """Chat session of StubProvider; keeps history like a Gemini ChatSession"""
+
+    def __init__(self, provider: 'StubProvider', history: List[Dict[str, Any]]):
+        self.provider = provider
+        self.history = list(history)
+
+    def send_message(self, prompt: str, stream: bool = False):
+        text = self.provider.response_for(prompt)
+        latency, fail = self.provider.draw()
+        if not stream:
+            time.sleep(latency)
+            if fail:
+                raise StubProviderError('Simulated provider error')
+            self._remember(prompt, text)
+            return StubResponse(text)
+        return self._stream(prompt, text, latency, fail)
+
+    def _stream(self, prompt: str, text: str, latency: float, fail: bool) -> Iterator[StubResponse]:
+        """Yield the text in chunk_tokens pieces; latency is the time to the first chunk"""
+        time.sleep(latency)
+        if fail:
+            raise StubProviderError('Simulated provider error')
+        size = self.provider.chunk_tokens * CHARS_PER_TOKEN
+        for start in range(0, len(text), size):
+            if start:
+                time.sleep(self.provider.chunk_delay)
+            yield StubResponse(text[start:start + size])
+        self._remember(prompt, text)
+
+    def _remember(self, prompt: str, text: str):
+        self.history += [{'role': 'user', 'parts': [prompt]}, {'role': 'model', 'parts': [text]}]
+
+class StubAsyncChatSession(StubChatSession):
+    """Stub session that also offers the SDK's async API, waiting without a thread"""
+
+    async def send_message_async(self, prompt: str, stream: bool = False):
+        text = self.provider.response_for(prompt)
+        latency, fail = self.provider.draw()
+        await asyncio.sleep(latency)
+        if fail:
+            raise StubProviderError('Simulated provider error')
+        if not stream:
+            self._remember(prompt, text)
+            return StubResponse(text)
+        return self._stream_async(prompt, text)
+
+    async def _stream_async(self, prompt: str, text: str) -> AsyncIterator[StubResponse]:
+        size = self.provider.chunk_tokens * CHARS_PER_TOKEN
+        for start in range(0, len(text), size):
+            if start:
+                await asyncio.sleep(self.provider.chunk_delay)
+            yield StubResponse(text[start:start + size])
+        self._remember(prompt, text)
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic local stand-in for Gemini, for load tests and profiling
+    without network access or an API key.
+
+    Answers are canned advice chosen by the prompt's topic, padded or cut to
+    completion_tokens when set. Latency is drawn from `distribution` around
+    latency_ms (spread jitter_ms) and calls fail with probability error_rate;
+    both come from one generator seeded with `seed`, so the same sequence of
+    calls sees the same latencies and failures. Streams yield chunk_tokens
+    per chunk, chunk_delay_ms apart. With async_api, sessions offer
+    send_message_async like the Gemini SDK; without it they only block.
+    """
+    name = 'stub'
+
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 50, distribution: str = 'normal',
+                 error_rate: float = 0.0, completion_tokens: Optional[int] = None,
+                 chunk_tokens: int = 8, chunk_delay_ms: float = 20, seed: int = 42, async_api: bool = True):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{distribution}', expected one of {LATENCY_DISTRIBUTIONS}")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.completion_tokens = completion_tokens
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.chunk_delay = chunk_delay_ms / 1000
+        self.seed = seed
+        self.native_async = async_api
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def start_chat(self, history: List[Dict[str, Any]]):
+        return (StubAsyncChatSession if self.native_async else StubChatSession)(self, history)
+
+    def draw(self):
+        """Draw (latency in seconds, whether the call fails) for the next call"""
+        with self._lock:
+            if self.distribution == 'fixed':
+                latency = self.latency_ms
+            elif self.distribution == 'uniform':
+                latency = self._rng.uniform(self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms)
+            elif self.distribution == 'normal':
+                latency = self._rng.gauss(self.latency_ms, self.jitter_ms)
+            else:
+                # Long right tail with median latency_ms, like real model latencies
+                sigma = self.jitter_ms / self.latency_ms if self.latency_ms else 0
+                latency = self._rng.lognormvariate(0, sigma) * self.latency_ms
+            fail = self._rng.random() < self.error_rate
+        return max(latency, 0) / 1000, fail
+
+    def response_for(self, prompt: str) -> str:
+        """The canned answer for a prompt"""
+        question = prompt.rsplit('Current Question:', 1)[-1]
+        variants = CANNED_RESPONSES[FINANCE_KEYWORDS.first(question, 'fallback', 'general')]
+        text = variants[zlib.crc32(prompt.encode('utf-8')) % len(variants)]
+        if not self.completion_tokens:
+            return text
+
+        target = self.completion_tokens * CHARS_PER_TOKEN
+        padded = text
+        while len(padded) < target:
+            padded += ' ' + text
+        return padded[:target]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'latency_ms': self.latency_ms,
+            'jitter_ms': self.jitter_ms,
+            'distribution': self.distribution,
+            'error_rate': self.error_rate,
+            'completion_tokens': self.completion_tokens,
+            'chunk_tokens': self.chunk_tokens,
+            'seed': self.seed,
+            'native_async': self.native_async
+        }
+
+def stub_provider_from_env() -> StubProvider:
+    """Build a stub from the FINSIGHT_STUB_* settings"""
+    tokens = os.getenv('FINSIGHT_STUB_TOKENS')
+    return StubProvider(
+        latency_ms=float(os.getenv('FINSIGHT_STUB_LATENCY_MS', 200)),
+        jitter_ms=float(os.getenv('FINSIGHT_STUB_JITTER_MS', 50)),
+        distribution=os.getenv('FINSIGHT_STUB_DISTRIBUTION', 'normal'),
+        error_rate=float(os.getenv('FINSIGHT_STUB_ERROR_RATE', 0)),
+        completion_tokens=int(tokens) if tokens else None,
+        chunk_tokens=int(os.getenv('FINSIGHT_STUB_CHUNK_TOKENS', 8)),
+        chunk_delay_ms=float(os.getenv('FINSIGHT_STUB_CHUNK_DELAY_MS', 20)),
+        seed=int(os.getenv('FINSIGHT_STUB_SEED', 42)),
+        async_api=os.getenv('FINSIGHT_STUB_ASYNC', '1') != '0'
+    )
+
+def provider_from_env(system_prompt: str, api_key: Optional[str] = None) -> LLMProvider:
+    """Build the provider named by FINSIGHT_LLM_PROVIDER ('gemini' by default, or 'stub')"""
+    name = os.getenv('FINSIGHT_LLM_PROVIDER', 'gemini').lower()
+    if name == 'stub':
+        return stub_provider_from_env()
+    if name != 'gemini':
+        raise ValueError(f"Unknown LLM provider '{name}', expected 'gemini' or 'stub'")
+    return GeminiProvider(api_key or os.getenv('GEMINI_API_KEY'), system_prompt)
+
+def uses_stub_provider() -> bool:
+    """Whether the stub is configured, so no Gemini API key is needed"""
+    return os.getenv('FINSIGHT_LLM_PROVIDER', 'gemini').lower() == 'stub'
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Loan Amortization Engine for FinSight
+Vectorized EMI schedules with prepayments, rate changes and batch processing
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Any
+
+from lazy_imports import lazy_import
+
+# Deferred until the first schedule is built
+np = lazy_import('numpy')
+
+# Stop schedules that would never amortize (e.g. EMI below interest)
+MAX_SCHEDULE_MONTHS = 1200
+
+# Balances below this are treated as paid off
+EPSILON = 0.005
+
+SCHEDULE_COLUMNS = ['month', 'opening_balance', 'payment', 'interest', 'principal', 'prepayment', 'closing_balance', 'annual_rate']
+
+def calculate_emi_amount(principal, monthly_rate, months):
+    """EMI formula P * r * (1+r)^n / ((1+r)^n - 1), vectorized; r = 0 gives P / n"""
+    p, r, n = (np.asarray(x, dtype=float) for x in (principal, monthly_rate, months))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.power(1 + r, n)
+        emi = np.where(r == 0, p / n, p * r * growth / (growth - 1))
+    return emi if emi.ndim else float(emi)
+
+def _months_to_payoff(balance: float, monthly_rate: float, emi: float) -> int:
+    """Whole months for an EMI to clear a balance (capped if it never does)"""
+    if balance <= EPSILON:
+        return 0
+    if monthly_rate == 0:
+        return math.ceil(balance / emi - 1e-9)
+    if emi <= balance * monthly_rate:
+        return MAX_SCHEDULE_MONTHS
+    n = -math.log(1 - balance * monthly_rate / emi) / math.log1p(monthly_rate)
+    return math.ceil(n - 1e-9)
+
+def _segment(balance: float, monthly_rate: float, emi: float, months: int) -> Dict[str, np.ndarray]:
+    """
+    Closed-form amortization of `months` constant-rate, constant-EMI payments.
+
+    Closing balance after k payments is B*(1+r)^k - E*((1+r)^k - 1)/r, so the
+    whole segment is computed with array operations instead of a month loop.
+    """
+    k = np.arange(1, months + 1, dtype=float)
+    if monthly_rate == 0:
+        closing = balance - emi * k
+    else:
+        growth = np.power(1 + monthly_rate, k)
+        closing = balance * growth - emi * (growth - 1) / monthly_rate
+    opening = np.concatenate(([balance], closing[:-1]))
+    interest = opening * monthly_rate
+    payment = np.full(months, emi)
+
+    # The final payment only needs to clear what is left
+    overpaid = closing < EPSILON
+    if overpaid.any():
+        last = int(np.argmax(overpaid))
+        opening, interest, payment, closing = opening[:last + 1], interest[:last + 1], payment[:last + 1], closing[:last + 1]
+        payment[-1] = opening[-1] + interest[-1]
+        closing[-1] = 0.0
+
+    return {
+        'opening_balance': opening,
+        'payment': payment,
+        'interest': interest,
+        'principal': payment - interest,
+        'closing_balance': closing
+    }
+
+def amortization_schedule(
+    principal: float,
+    annual_rate: float,
+    tenure_months: int,
+    prepayments: Optional[List[Dict[str, Any]]] = None,
+    rate_changes: Optional[List[Dict[str, Any]]] = None,
+    reduce: str = 'tenure'
+) -> Dict[str, Any]:
+    """
+    Build a full month-by-month amortization schedule.
+
+    prepayments: [{'month': m, 'amount': a}] paid after month m's EMI.
+    rate_changes: [{'month': m, 'annual_rate': pct}] effective from month m.
+    reduce: after a prepayment or rate change, keep the EMI and shorten the
+        tenure ('tenure'), or keep the original end date and re-price the EMI ('emi').
+
+    The schedule is split at event months and each segment between events is
+    computed in closed form, so cost scales with the number of events, not months.
+    """
+    if principal <= 0 or tenure_months <= 0 or annual_rate < 0:
+        raise ValueError('principal and tenure_months must be positive and annual_rate non-negative')
+    if reduce not in ('tenure', 'emi'):
+        raise ValueError("reduce must be 'tenure' or 'emi'")
+
+    prepay_by_month: Dict[int, float] = {}
+    for item in prepayments or []:
+        month = int(item['month'])
+        prepay_by_month[month] = prepay_by_month.get(month, 0.0) + float(item['amount'])
+    rate_by_month = {int(item['month']): float(item['annual_rate']) for item in rate_changes or []}
+    if any(m < 1 for m in list(prepay_by_month) + list(rate_by_month)):
+        raise ValueError('Event months start at 1')
+
+    rate = annual_rate
+    monthly_rate = rate / 12 / 100
+    emi = calculate_emi_amount(principal, monthly_rate, tenure_months)
+    initial_emi = emi
+    balance = float(principal)
+    month = 1
+    columns: Dict[str, List[np.ndarray]] = {name: [] for name in SCHEDULE_COLUMNS}
+
+    while balance > EPSILON and month <= MAX_SCHEDULE_MONTHS:
+        if month in rate_by_month:
+            rate = rate_by_month[month]
+            monthly_rate = rate / 12 / 100
+            remaining = max(tenure_months - month + 1, 1)
+            # Re-price when asked to, or when the old EMI no longer covers interest
+            if reduce == 'emi' or emi <= balance * monthly_rate:
+                emi = calculate_emi_amount(balance, monthly_rate, remaining)
+
+        later_events = [m for m in set(prepay_by_month) | set(rate_by_month) if m > month]
+        until_event = (min(later_events) - month) if later_events else MAX_SCHEDULE_MONTHS
+        # A prepayment in this month ends the segment after this month
+        if month in prepay_by_month:
+            until_event = 1
+        length = max(1, min(until_event, _months_to_payoff(balance, monthly_rate, emi), MAX_SCHEDULE_MONTHS - month + 1))
+
+        segment = _segment(balance, monthly_rate, emi, length)
+        count = len(segment['payment'])
+        end_month = month + count - 1
+        prepayment = np.zeros(count)
+
+        balance = float(segment['closing_balance'][-1])
+        if end_month in prepay_by_month and balance > EPSILON:
+            paid = min(prepay_by_month[end_month], balance)
+            prepayment[-1] = paid
+            segment['closing_balance'][-1] = balance = balance - paid
+            if reduce == 'emi' and balance > EPSILON:
+                emi = calculate_emi_amount(balance, monthly_rate, max(tenure_months - end_month, 1))
+
+        columns['month'].append(np.arange(month, end_month + 1))
+        columns['prepayment'].append(prepayment)
+        columns['annual_rate'].append(np.full(count, rate))
+        for name in ('opening_balance', 'payment', 'interest', 'principal', 'closing_balance'):
+            columns[name].append(segment[name])
+        month = end_month + 1
+
+    schedule = {name: np.concatenate(parts) if parts else np.array([]) for name, parts in columns.items()}
+    total_interest = float(schedule['interest'].sum())
+    total_payment = float(schedule['payment'].sum() + schedule['prepayment'].sum())
+
+    return {
+        'emi': round(float(initial_emi), 2),
+        'total_payment': round(total_payment, 2),
+        'total_interest': round(total_interest, 2),
+        'months': int(len(schedule['month'])),
+        'schedule': schedule
+    }
+
+def schedule_to_rows(schedule: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Convert a columnar schedule into a JSON-friendly list of month rows"""
+    rounded = {
+        name: (values.astype(int).tolist() if name == 'month' else np.round(values, 2).tolist())
+        for name, values in schedule.items()
+    }
+    return [dict(zip(SCHEDULE_COLUMNS, row)) for row in zip(*(rounded[name] for name in SCHEDULE_COLUMNS))]
+
+def batch_schedules(principals, annual_rates, tenures) -> Dict[str, np.ndarray]:
+    """
+    Amortize many plain loans at once as (loans x months) matrices.
+
+    Rows past a loan's own tenure are zero. Returns the EMI per loan and the
+    interest, principal and closing-balance matrices.
+    """
+    p = np.asarray(principals, dtype=float)[:, None]
+    r = (np.asarray(annual_rates, dtype=float) / 12 / 100)[:, None]
+    n = np.asarray(tenures, dtype=int)
+    if p.size == 0:
+        empty = np.zeros((0, 0))
+        return {'emi': np.zeros(0), 'interest': empty, 'principal': empty, 'closing_balance': empty}
+
+    emi = calculate_emi_amount(p[:, 0], r[:, 0], n)[:, None]
+    k = np.arange(1, int(n.max()) + 1, dtype=float)[None, :]
+    active = k <= n[:, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.power(1 + r, k)
+        closing = np.where(r == 0, p - emi * k, p * growth - emi * (growth - 1) / np.where(r == 0, 1, r))
+    closing = np.where(active, np.maximum(closing, 0.0), 0.0)
+    opening = np.concatenate((p, closing[:, :-1]), axis=1)
+    interest = np.where(active, opening * r, 0.0)
+    principal = np.where(active, opening - closing, 0.0)
+
+    return {
+        'emi': emi[:, 0],
+        'interest': interest,
+        'principal': principal,
+        'closing_balance': closing
+    }
+
+def schedule_payload(principal: float, annual_rate: float, tenure_months: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the schedule fields for an EMI API response.
+
+    options carries the optional request fields: prepayments, rate_changes and
+    reduce ('tenure' or 'emi').
+    """
+    result = amortization_schedule(
+        principal,
+        annual_rate,
+        tenure_months,
+        prepayments=options.get('prepayments'),
+        rate_changes=options.get('rate_changes'),
+        reduce=options.get('reduce', 'tenure')
+    )
+    return {
+        'months': result['months'],
+        'total_payment': result['total_payment'],
+        'total_interest': result['total_interest'],
+        'schedule': schedule_to_rows(result['schedule'])
+    }
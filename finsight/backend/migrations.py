@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Schema Migrations for the FinSight SQLite database
+Versioned with PRAGMA user_version so existing finsight.db files upgrade in place
+
+Usage: python migrations.py [path/to/finsight.db]
+"""
+
+import sqlite3
+import sys
+from typing import Callable, List, Tuple
+
+from transaction_store import transaction_fingerprint
+
+def _normalize_transaction_dates(conn: sqlite3.Connection):
+    """Rewrite transaction dates into the sortable 'YYYY-MM-DD HH:MM:SS' form"""
+    conn.execute('''
+        UPDATE transactions
+        SET date = strftime('%Y-%m-%d %H:%M:%S', date)
+        WHERE date IS NOT NULL
+        AND strftime('%Y-%m-%d %H:%M:%S', date) IS NOT NULL
+        AND date != strftime('%Y-%m-%d %H:%M:%S', date)
+    ''')
+
+def _add_transaction_indexes(conn: sqlite3.Connection):
+    """Add composite indexes for per-user date range queries"""
+    # Serves monthly SUM(amount) by type with a range scan on date
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_type_date
+        ON transactions (user_id, transaction_type, date)
+    ''')
+    # Serves "recent transactions" ordered by date without a sort step
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_date
+        ON transactions (user_id, date)
+    ''')
+
+def _add_monthly_rollups(conn: sqlite3.Connection):
+    """Add the per-user monthly rollup table and backfill it (legacy rows without a date or type have no month to go in)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS monthly_rollups (
+            user_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            txn_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, month, category, transaction_type)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO monthly_rollups (user_id, month, category, transaction_type, total, txn_count)
+        SELECT user_id, substr(date, 1, 7), category, transaction_type, SUM(amount), COUNT(*)
+        FROM transactions
+        WHERE date IS NOT NULL AND transaction_type IS NOT NULL
+        GROUP BY user_id, substr(date, 1, 7), category, transaction_type
+    ''')
+
+def _add_transaction_fingerprints(conn: sqlite3.Connection):
+    """Add the duplicate-detection fingerprint column, backfill and index it"""
+    conn.execute('ALTER TABLE transactions ADD COLUMN fingerprint TEXT')
+    conn.create_function('txn_fingerprint', 4, transaction_fingerprint, deterministic=True)
+    conn.execute('''
+        UPDATE transactions
+        SET fingerprint = txn_fingerprint(user_id, date, amount, description)
+        WHERE date IS NOT NULL
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_fingerprint
+        ON transactions (user_id, fingerprint)
+    ''')
+
+def _add_category_index(conn: sqlite3.Connection):
+    """Add the index behind category-filtered transaction listings"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_category_date
+        ON transactions (user_id, category, date)
+    ''')
+
+# Ordered list of (version, description, migration). Append only.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'Normalize transaction dates', _normalize_transaction_dates),
+    (2, 'Add transaction date indexes', _add_transaction_indexes),
+    (3, 'Add monthly rollups', _add_monthly_rollups),
+    (4, 'Add transaction fingerprints', _add_transaction_fingerprints),
+    (5, 'Add transaction category index', _add_category_index),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the current schema version of a database"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(conn: sqlite3.Connection) -> List[int]:
+    """
+    Apply every pending migration, each in its own transaction.
+
+    Returns the list of versions that were applied.
+    """
+    applied = []
+    current = get_schema_version(conn)
+    if conn.in_transaction:
+        conn.commit()
+
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute('BEGIN')
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('ANALYZE transactions')
+        applied.append(version)
+        print(f"Applied migration {version}: {description}")
+
+    return applied
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> List[str]:
+    """Get the EXPLAIN QUERY PLAN details for a statement"""
+    return [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()]
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'finsight.db'
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        before = get_schema_version(conn)
+        applied = migrate(conn)
+        if applied:
+            print(f"✅ Migrated {db_path} from version {before} to {get_schema_version(conn)}")
+        else:
+            print(f"✅ {db_path} is already at version {before}")
+    finally:
+        conn.close()
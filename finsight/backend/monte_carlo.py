@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo Retirement Simulation for FinSight
+Simulates many market return paths to expose sequence-of-returns risk in FIRE plans
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Any
+
+from lazy_imports import lazy_import
+
+# Loaded by the first simulation; pool workers import it on their own
+np = lazy_import('numpy')
+
+DEFAULT_PATHS = 10000
+MAX_PATHS = 200000
+MAX_YEARS = 60
+
+# Paths simulated per chunk. Chunks get their own child seed, so results for a
+# given seed are identical whether chunks run inline or on the process pool.
+CHUNK_PATHS = 10000
+
+# Requests with more paths than this fan out to the process pool
+POOL_THRESHOLD = 20000
+
+# Upper bound on how long one request waits for all of its pool chunks (seconds).
+# Only chunks that have not started are cancelled at the timeout: a process
+# pool cannot stop a running chunk, so those finish in the background (at most
+# one CHUNK_PATHS chunk per worker) and are counted as abandoned.
+POOL_TIMEOUT = 10.0
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {'pooled_runs': 0, 'timeouts': 0, 'cancelled_chunks': 0, 'abandoned_chunks': 0}
+_abandoned_running = 0
+
+class SimulationTimeout(RuntimeError):
+    """Raised when a simulation does not finish within POOL_TIMEOUT"""
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Get the shared process pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.getenv('FINSIGHT_MC_WORKERS', 0)) or max(1, (os.cpu_count() or 2) - 1)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+def _abandoned_chunk_done(_future):
+    """A chunk left running by a timed-out request has freed its worker"""
+    global _abandoned_running
+    with _stats_lock:
+        _abandoned_running -= 1
+
+def _give_up(futures: List) -> None:
+    """Cancel a timed-out request's chunks; running ones are left to finish and counted"""
+    global _abandoned_running
+    for f in futures:
+        if f.cancel():
+            with _stats_lock:
+                _stats['cancelled_chunks'] += 1
+        elif not f.done():
+            with _stats_lock:
+                _stats['abandoned_chunks'] += 1
+                _abandoned_running += 1
+            f.add_done_callback(_abandoned_chunk_done)
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get pooled run and timeout counters, and abandoned chunks still holding a worker"""
+    with _stats_lock:
+        stats = dict(_stats)
+        stats['abandoned_running'] = _abandoned_running
+    stats['pool_timeout'] = POOL_TIMEOUT
+    return stats
+
+def simulate_chunk(
+    seed_state: np.random.SeedSequence,
+    paths: int,
+    months: int,
+    current_savings: float,
+    monthly_savings: float,
+    annual_return: float,
+    annual_volatility: float,
+    target: float
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate one chunk of paths (runs in a worker process for large requests).
+
+    Monthly returns are drawn from a lognormal whose mean matches the expected
+    annual return. Each month is one vectorized update across all paths, which
+    keeps the working set to a few path-sized vectors.
+    Returns year-end balances (paths x years) and the first month each path
+    reached the target (inf if it never did).
+    """
+    rng = np.random.default_rng(seed_state)
+    sigma = annual_volatility / np.sqrt(12)
+    mu = np.log1p(annual_return) / 12 - sigma ** 2 / 2
+
+    balance = np.full(paths, float(current_savings))
+    reached_at = np.where(balance >= target, 0.0, np.inf)
+    yearly = np.empty((paths, months // 12))
+    growth = np.empty(paths)
+
+    for month in range(1, months + 1):
+        rng.standard_normal(paths, out=growth)
+        growth *= sigma
+        growth += mu
+        np.exp(growth, out=growth)
+        balance *= growth
+        balance += monthly_savings
+        reached_at[np.isinf(reached_at) & (balance >= target)] = month
+        if month % 12 == 0:
+            yearly[:, month // 12 - 1] = balance
+
+    return {'yearly': yearly, 'reached_at': reached_at}
+
+def run_simulation(
+    current_savings: float,
+    monthly_savings: float,
+    annual_return: float,
+    annual_volatility: float,
+    target: float,
+    years: int = 50,
+    paths: int = DEFAULT_PATHS,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Run a Monte Carlo FIRE simulation.
+
+    Rates are fractions (0.07 = 7%). Returns the probability of reaching the
+    target within the horizon, percentiles of the time to FIRE, and yearly
+    balance percentile bands. The same seed always gives the same result.
+    """
+    if not 1 <= paths <= MAX_PATHS:
+        raise ValueError(f'paths must be between 1 and {MAX_PATHS}')
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f'years must be between 1 and {MAX_YEARS}')
+    if annual_volatility < 0 or annual_return <= -1:
+        raise ValueError('volatility must be non-negative and return greater than -100%')
+
+    months = years * 12
+    sizes = [CHUNK_PATHS] * (paths // CHUNK_PATHS)
+    if paths % CHUNK_PATHS:
+        sizes.append(paths % CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(s, n, months, current_savings, monthly_savings, annual_return, annual_volatility, target)
+            for s, n in zip(seeds, sizes)]
+
+    if paths > POOL_THRESHOLD:
+        with _stats_lock:
+            _stats['pooled_runs'] += 1
+        futures = [_get_pool().submit(simulate_chunk, *a) for a in args]
+        # One deadline for the whole request, however many chunks it has
+        _, pending = wait(futures, timeout=POOL_TIMEOUT)
+        if pending:
+            with _stats_lock:
+                _stats['timeouts'] += 1
+            _give_up(futures)
+            raise SimulationTimeout(f'Simulation exceeded {POOL_TIMEOUT:.0f}s, try fewer paths')
+        results = [f.result() for f in futures]
+    else:
+        results = [simulate_chunk(*a) for a in args]
+
+    yearly = np.concatenate([r['yearly'] for r in results])
+    reached_at = np.concatenate([r['reached_at'] for r in results])
+    succeeded = np.isfinite(reached_at)
+
+    # Paths that never reach the target sort last, so late percentiles may be None
+    values = np.percentile(reached_at / 12, PERCENTILES, method='nearest')
+    years_to_fire = {f'p{p}': round(float(v), 1) if np.isfinite(v) else None for p, v in zip(PERCENTILES, values)}
+
+    bands = np.percentile(yearly, PERCENTILES, axis=0)
+    return {
+        'paths': paths,
+        'years': years,
+        'seed': seed,
+        'success_probability': round(float(succeeded.mean()), 4),
+        'years_to_fire_percentiles': years_to_fire,
+        'balance_bands': {
+            'year': list(range(1, years + 1)),
+            **{f'p{p}': np.round(band, 2).tolist() for p, band in zip(PERCENTILES, bands)}
+        }
+    }
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Per-User Rate Limiter for FinSight
+Token buckets that cap how fast each user can spend the shared LLM quota
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+DEFAULT_MAX_USERS = 10000
+
+class TokenBucketLimiter:
+    """
+    One token bucket per user: up to `burst` calls at once, refilled at `rate`
+    calls per second. Buckets of the least recently seen users are dropped
+    beyond max_users; a dropped user simply starts again with a full bucket.
+    A rate of 0 (the default) disables limiting.
+
+    Buckets are keyed by the user_id the client sends, so only enable it for
+    clients that send a real per-user id: clients that send one shared id
+    (the Flutter app's 'flutter_user' fallback, or 'anonymous') would share one
+    bucket.
+    """
+
+    def __init__(self, rate: float = 0.0, burst: float = 5, max_users: int = DEFAULT_MAX_USERS):
+        self.rate = rate
+        self.burst = burst
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._stats = {'allowed': 0, 'throttled': 0}
+
+    def acquire(self, user_id: str) -> float:
+        """Spend one token; returns 0 if allowed, else seconds until the next token"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(user_id)
+            if bucket is None:
+                bucket = self._buckets[user_id] = [float(self.burst), now]
+                while len(self._buckets) > self.max_users:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(user_id)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self._stats['allowed'] += 1
+                return 0.0
+            self._stats['throttled'] += 1
+            return (1 - bucket[0]) / self.rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get allowed/throttled counts and limiter settings"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['tracked_users'] = len(self._buckets)
+        stats['rate_per_second'] = self.rate
+        stats['burst'] = self.burst
+        return stats
+
+def rate_limiter_from_env() -> TokenBucketLimiter:
+    """Build a limiter from FINSIGHT_USER_RATE (calls/second, off unless set) and FINSIGHT_USER_BURST"""
+    return TokenBucketLimiter(
+        rate=float(os.getenv('FINSIGHT_USER_RATE', 0)),
+        burst=float(os.getenv('FINSIGHT_USER_BURST', 5))
+    )
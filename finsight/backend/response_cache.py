@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Response Cache for FinSight
+In-process LRU caches: per-user dashboard payloads invalidated by data versions,
+and chatbot answers keyed by normalized question
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+class VersionedLRUCache:
+    """
+    Bounded LRU cache keyed by (namespace, user, user data version, extra).
+
+    Writers call bump(user_id) instead of deleting entries: every cached entry
+    for the old version simply stops matching and ages out of the LRU, so a
+    read can never return data from before the latest write.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def version(self, user_id: Any) -> int:
+        """Get a user's current data version"""
+        with self._lock:
+            return self._versions.get(str(user_id), 0)
+
+    def bump(self, user_id: Any):
+        """Mark a user's data as changed, invalidating their cached payloads"""
+        with self._lock:
+            key = str(user_id)
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._stats['invalidations'] += 1
+
+    def get(self, namespace: str, user_id: Any, extra: Hashable = None) -> Optional[Any]:
+        """Get a cached payload for the user's current version, or None"""
+        with self._lock:
+            key = (namespace, str(user_id), self._versions.get(str(user_id), 0), extra)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._entries[key]
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, namespace: str, user_id: Any, value: Any, extra: Hashable = None, version: Optional[int] = None):
+        """
+        Cache a payload.
+
+        Pass the version read before computing the payload so that a write
+        racing with the computation leaves the result under the stale version.
+        """
+        with self._lock:
+            current = self._versions.get(str(user_id), 0)
+            key = (namespace, str(user_id), current if version is None else version, extra)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and occupancy"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['max_entries'] = self.max_entries
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+# Global instance
+dashboard_cache = None
+
+def get_dashboard_cache() -> VersionedLRUCache:
+    """Get the process-wide dashboard cache (FINSIGHT_DASHBOARD_CACHE_SIZE entries)"""
+    global dashboard_cache
+    if dashboard_cache is None:
+        dashboard_cache = VersionedLRUCache(int(os.getenv('FINSIGHT_DASHBOARD_CACHE_SIZE', 1024)))
+    return dashboard_cache
+
+# Words that do not change what a finance question is asking
+STOP_WORDS = frozenset("""
+    a an the i me my we our you your it is are am be do does did can could should would will
+    to of for in on at by with as and or but so if about some any what whats how hows which
+    please tell give explain best good way ways really just
+""".split())
+
+_NON_WORD = re.compile(r"[^a-z0-9\s]+")
+
+# Amounts quoted by the user ($500, 3000) make an answer personal; rule names like 50/30/20 do not
+_PERSONAL_FIGURE = re.compile(r"[$€£₹]|\d{3,}")
+
+def normalize_question(message: str) -> str:
+    """Reduce a question to its content words: 'How do I build an Emergency Fund?' -> 'build emergency fund'"""
+    words = _NON_WORD.sub(' ', message.lower().replace("'", '')).split()
+    return ' '.join(word for word in words if word not in STOP_WORDS)
+
+def context_bucket(context: Any) -> Tuple:
+    """
+    Coarse bucket of a ChatContext: income order of magnitude, savings rate
+    band, whether there is debt and risk tolerance. Users in the same bucket
+    share cached answers.
+    """
+    if context is None:
+        return ()
+    income = getattr(context, 'monthly_income', None) or 0
+    expenses = getattr(context, 'monthly_expenses', None) or 0
+    income_band = int(math.log10(income)) if income > 0 else None
+    savings_band = None
+    if income > 0 and expenses:
+        savings_band = max(-1, min(3, int((income - expenses) / income * 10)))  # 10% steps, capped
+    return (
+        income_band,
+        savings_band,
+        bool(getattr(context, 'debt_amount', None)),
+        (getattr(context, 'risk_tolerance', None) or '').lower() or None
+    )
+
+def describe_bucket(bucket: Tuple) -> List[str]:
+    """
+    Prompt context lines for a context bucket, in the same form as the exact
+    figures in a personal prompt. Answers cached under a bucket are generated
+    from these lines only, so they carry nothing specific to one user.
+    """
+    if not bucket:
+        return []
+    income_band, savings_band, has_debt, risk_tolerance = bucket
+    lines = []
+    if income_band is not None:
+        low = 10 ** max(income_band, 0)
+        lines.append(f"Monthly Income: ${low:,}-${10 ** (max(income_band, 0) + 1) - 1:,}")
+    if savings_band is not None:
+        if savings_band < 0:
+            lines.append("Savings Rate: spending at least 10% more than income")
+        elif savings_band >= 3:
+            lines.append("Savings Rate: 30% or more")
+        else:
+            lines.append(f"Savings Rate: {savings_band * 10}-{savings_band * 10 + 9}%")
+    if has_debt:
+        lines.append("Current Debt: yes")
+    if risk_tolerance:
+        lines.append(f"Risk Tolerance: {risk_tolerance}")
+    return lines
+
+class ChatResponseCache:
+    """
+    TTL + LRU cache of chatbot answer texts.
+
+    Keys are (normalized question, context bucket), so repeated starters and
+    their close paraphrases reuse one model call. Cacheable answers must be
+    generated from the key alone (see describe_bucket). Follow-ups within a
+    conversation and questions quoting the user's own figures bypass it.
+    """
+
+    def __init__(self, max_entries: int = 500, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, Tuple[str, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'evictions': 0, 'expired': 0, 'latency_saved_ms': 0.0}
+
+    def key_for(self, message: str, context: Any = None, history: Optional[List] = None,
+                bypass: bool = False) -> Optional[tuple]:
+        """Cache key for a question, or None (counted as a bypass) when the answer is personal"""
+        question = normalize_question(message)
+        if bypass or not self.max_entries or not question or history or _PERSONAL_FIGURE.search(message):
+            with self._lock:
+                self._stats['bypassed'] += 1
+            return None
+        return (question, context_bucket(context))
+
+    def get(self, key: tuple) -> Optional[str]:
+        """Get a cached answer text, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] > self.ttl:
+                del self._entries[key]
+                self._stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            self._stats['latency_saved_ms'] += entry[2] * 1000
+            return entry[0]
+
+    def set(self, key: tuple, text: str, latency: float):
+        """Cache an answer with the model latency it took to produce"""
+        with self._lock:
+            self._entries[key] = (text, time.monotonic(), latency)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate, latency saved and occupancy"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['latency_saved_ms'] = round(stats['latency_saved_ms'], 1)
+        stats['max_entries'] = self.max_entries
+        stats['ttl'] = self.ttl
+        return stats
+
+def chat_response_cache_from_env() -> ChatResponseCache:
+    """Build a cache sized by FINSIGHT_CHAT_CACHE_SIZE (0 disables it) and FINSIGHT_CHAT_CACHE_TTL"""
+    return ChatResponseCache(
+        max_entries=int(os.getenv('FINSIGHT_CHAT_CACHE_SIZE', 500)),
+        ttl=float(os.getenv('FINSIGHT_CHAT_CACHE_TTL', 3600))
+    )
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Chat Session Cache for FinSight
+Bounded LRU store with idle TTL for live Gemini chat sessions
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_IDLE_TTL = 1800  # seconds
+
+@dataclass
+class _Entry:
+    """A resident chat session and its bookkeeping"""
+    session: Any
+    last_used: float
+    bytes: int = 0
+    tokens: int = 0
+
+class ChatSessionCache:
+    """
+    Keeps at most max_sessions chat sessions, dropping the least recently used
+    one when full and any session idle for longer than idle_ttl seconds.
+
+    Sessions are created by factory(history); when a user's session was
+    evicted, the history passed to get() rehydrates it, so eviction costs a
+    slightly longer first prompt rather than the conversation.
+    """
+
+    def __init__(self, factory: Callable[[List[Dict]], Any], max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 idle_ttl: float = DEFAULT_IDLE_TTL):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'rehydrated': 0, 'evicted': 0, 'expired': 0}
+
+    def get(self, user_id: str, history: Optional[List[Dict]] = None, tokens: int = 0) -> Any:
+        """Get a user's live session, creating (and rehydrating) it if needed"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.last_used = now
+                self._entries.move_to_end(user_id)
+                self._stats['hits'] += 1
+                return entry.session
+            self._stats['misses'] += 1
+
+        # Build outside the lock; a concurrent create for the same user just wins the race
+        session = self.factory(history or [])
+        with self._lock:
+            if history:
+                self._stats['rehydrated'] += 1
+            entry = self._entries.setdefault(user_id, _Entry(
+                session, now, sum(len(part.encode('utf-8')) for item in history or [] for part in item['parts']), tokens
+            ))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+                self._stats['evicted'] += 1
+            return entry.session
+
+    def record(self, user_id: str, nbytes: int, tokens: int = 0):
+        """Account for text added to a session's server-side history"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.bytes += nbytes
+                entry.tokens += tokens
+
+    def tokens(self, user_id: str) -> int:
+        """Estimated tokens of history a user's live session carries (0 if none)"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            return entry.tokens if entry is not None else 0
+
+    def discard(self, user_id: str):
+        """Drop a user's session"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def __contains__(self, user_id: str) -> bool:
+        with self._lock:
+            self._expire(time.monotonic())
+            return user_id in self._entries
+
+    def _expire(self, now: float):
+        """Drop idle sessions; LRU order means they are all at the front (lock held)"""
+        while self._entries:
+            user_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_used <= self.idle_ttl:
+                break
+            del self._entries[user_id]
+            self._stats['expired'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get resident session count, approximate history bytes and counters"""
+        with self._lock:
+            self._expire(time.monotonic())
+            stats = dict(self._stats)
+            stats['resident_sessions'] = len(self._entries)
+            stats['resident_bytes'] = sum(entry.bytes for entry in self._entries.values())
+        stats['max_sessions'] = self.max_sessions
+        stats['idle_ttl'] = self.idle_ttl
+        return stats
+
+def session_cache_from_env(factory: Callable[[List[Dict]], Any]) -> ChatSessionCache:
+    """Build a cache sized by FINSIGHT_CHAT_MAX_SESSIONS and FINSIGHT_CHAT_SESSION_TTL"""
+    return ChatSessionCache(
+        factory,
+        max_sessions=int(os.getenv('FINSIGHT_CHAT_MAX_SESSIONS', DEFAULT_MAX_SESSIONS)),
+        idle_ttl=float(os.getenv('FINSIGHT_CHAT_SESSION_TTL', DEFAULT_IDLE_TTL))
+    )
@@ -7,38 +7,50 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 import os
 import asyncio
+import threading
 from dotenv import load_dotenv
 
+from lazy_imports import module_available, start_warmup
+
 # Load environment
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize Gemini
-try:
-    import google.generativeai as genai
-    
-    api_key = os.getenv('GEMINI_API_KEY')
-    if api_key:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash",
-            system_instruction="""
+# Initialize Gemini; the SDK is imported and the model built on first use
+api_key = os.getenv('GEMINI_API_KEY')
+GEMINI_READY = bool(api_key) and module_available('google.generativeai')
+if GEMINI_READY:
+    print("✅ Gemini AI configured (model loads on first use)")
+elif api_key:
+    print("❌ Gemini initialization failed: google-generativeai is not installed")
+else:
+    print("❌ No Gemini API key found")
+
+SYSTEM_INSTRUCTION = """
             You are FinSight AI, a helpful financial advisor for students and young professionals.
             Always provide specific, actionable financial advice.
             Be conversational and helpful.
             Include practical tips they can implement immediately.
             """
-        )
-        GEMINI_READY = True
-        print("✅ Gemini AI initialized successfully!")
-    else:
-        GEMINI_READY = False
-        print("❌ No Gemini API key found")
-except Exception as e:
-    GEMINI_READY = False
-    print(f"❌ Gemini initialization failed: {e}")
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Get the Gemini model, configuring the SDK on the first call"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=api_key)
+                _model = genai.GenerativeModel(
+                    model_name="gemini-1.5-flash",
+                    system_instruction=SYSTEM_INSTRUCTION
+                )
+    return _model
 
 @app.route('/')
 def home():
@@ -59,7 +71,7 @@ def test():
     
     try:
         # Simple test
-        response = model.generate_content("Say hello and give one quick budgeting tip in 2 sentences.")
+        response = get_model().generate_content("Say hello and give one quick budgeting tip in 2 sentences.")
         return jsonify({
             'gemini_ready': True,
             'test_response': response.text,
@@ -111,7 +123,7 @@ def chat():
         """
         
         # Get AI response
-        response = model.generate_content(full_prompt)
+        response = get_model().generate_content(full_prompt)
         ai_response = response.text
         
         # Generate quick replies based on response
@@ -147,4 +159,6 @@ if __name__ == '__main__':
     print("🧪 Test endpoint: http://localhost:5000/test")
     print("💬 Chat endpoint: http://localhost:5000/chat")
     
+    if GEMINI_READY:
+        start_warmup(hooks=[get_model])
     app.run(debug=True, host='0.0.0.0', port=5000)
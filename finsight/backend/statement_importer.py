@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Bank Statement Importer for FinSight
+Streams CSV and OFX statements into the transactions table in chunked batches,
+skipping rows that already exist, with progress that can be polled
+"""
+
+import csv
+import html
+import io
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Any
+
+from transaction_store import (
+    DATE_FORMAT, VALID_TRANSACTION_TYPES, insert_transactions, count_fingerprints,
+    transaction_fingerprint, normalize_date
+)
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+MAX_TRACKED_JOBS = 100
+DEFAULT_CATEGORY = 'uncategorized'
+
+# Accepted header names for each transaction field, compared case-insensitively
+CSV_COLUMN_ALIASES = {
+    'date': ['date', 'transaction date', 'txn date', 'posted date', 'posting date', 'value date'],
+    'description': ['description', 'narration', 'details', 'particulars', 'memo', 'payee', 'name'],
+    'amount': ['amount', 'transaction amount', 'amt'],
+    'debit': ['debit', 'withdrawal', 'withdrawal amt', 'withdrawal amount', 'dr'],
+    'credit': ['credit', 'deposit', 'deposit amt', 'deposit amount', 'cr'],
+    'category': ['category'],
+    'transaction_type': ['type', 'transaction type', 'transaction_type'],
+}
+
+# Tried in order when a date is not ISO 8601; day-first matches Indian banks
+DATE_FORMATS = ['%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%d-%b-%Y', '%d %b %Y', '%m/%d/%Y', '%Y/%m/%d']
+
+class StatementError(ValueError):
+    """Raised for a statement row that can't be mapped to a transaction"""
+
+@dataclass
+class ImportJob:
+    """Progress and results of one statement import"""
+    job_id: str
+    user_id: int
+    filename: str
+    file_format: str
+    bytes_total: int
+    status: str = 'queued'  # queued, running, completed, failed
+    bytes_read: int = 0
+    rows_read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['progress'] = round(100 * self.bytes_read / self.bytes_total, 1) if self.bytes_total else 0
+        return data
+
+class _CountingReader(io.RawIOBase):
+    """Binary file wrapper that records how many bytes have been read"""
+
+    def __init__(self, raw, job: ImportJob):
+        self._raw = raw
+        self._job = job
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._raw.readinto(buffer)
+        self._job.bytes_read += count or 0
+        return count
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Parse a statement amount such as '1,234.50', '(12.00)' or '12.00 DR'"""
+    if value is None:
+        return None
+    text = str(value).strip().replace(',', '')
+    if not text:
+        return None
+
+    negative = False
+    if text.startswith('(') and text.endswith(')'):
+        negative, text = True, text[1:-1]
+    upper = text.upper()
+    if upper.endswith('DR'):
+        negative, text = True, text[:-2]
+    elif upper.endswith('CR'):
+        text = text[:-2]
+    text = re.sub(r'[^\d.\-+]', '', text)
+    if not text:
+        return None
+
+    amount = float(text)
+    return -abs(amount) if negative else amount
+
+def parse_statement_date(value: str, date_format: Optional[str] = None) -> str:
+    """Parse a statement date into the stored date format"""
+    text = (value or '').strip()
+    if not text:
+        raise StatementError('Missing date')
+
+    formats = [date_format] if date_format else []
+    for fmt in formats + DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime(DATE_FORMAT)
+        except ValueError:
+            continue
+    try:
+        return normalize_date(text)
+    except ValueError:
+        raise StatementError(f'Unrecognized date: {text}')
+
+def _to_row(user_id: int, date_text: str, amount: Optional[float], description: str,
+            category: Optional[str] = None, transaction_type: Optional[str] = None,
+            date_format: Optional[str] = None) -> tuple:
+    """Map parsed statement fields onto a transactions insert row"""
+    if amount is None:
+        raise StatementError('Missing amount')
+
+    transaction_type = (transaction_type or '').strip().lower()
+    if transaction_type not in VALID_TRANSACTION_TYPES:
+        transaction_type = 'expense' if amount < 0 else 'income'
+
+    return (
+        user_id,
+        abs(amount),
+        (category or '').strip() or DEFAULT_CATEGORY,
+        (description or '').strip(),
+        parse_statement_date(date_text, date_format),
+        transaction_type
+    )
+
+def resolve_csv_columns(headers: List[str], mapping: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Work out which CSV header holds each transaction field"""
+    lookup = {header.strip().lower(): header for header in headers if header}
+    columns = {}
+    for field_name, aliases in CSV_COLUMN_ALIASES.items():
+        if mapping and mapping.get(field_name):
+            columns[field_name] = mapping[field_name]
+            continue
+        for alias in aliases:
+            if alias in lookup:
+                columns[field_name] = lookup[alias]
+                break
+
+    if 'date' not in columns:
+        raise StatementError('Could not find a date column')
+    if 'amount' not in columns and not ('debit' in columns or 'credit' in columns):
+        raise StatementError('Could not find an amount or debit/credit column')
+    return columns
+
+def iter_csv_rows(stream: io.TextIOBase, user_id: int, mapping: Optional[Dict[str, str]] = None,
+                  date_format: Optional[str] = None) -> Iterator[tuple]:
+    """
+    Yield (line_number, row_or_error) from a CSV statement, one line at a time.
+    """
+    reader = csv.DictReader(stream)
+    columns = resolve_csv_columns(reader.fieldnames or [], mapping)
+
+    for record in reader:
+        try:
+            if 'amount' in columns:
+                amount = parse_amount(record.get(columns['amount']))
+            else:
+                debit = parse_amount(record.get(columns.get('debit', ''))) or 0
+                credit = parse_amount(record.get(columns.get('credit', ''))) or 0
+                amount = credit - abs(debit) if (debit or credit) else None
+            yield reader.line_num, _to_row(
+                user_id,
+                record.get(columns['date']),
+                amount,
+                record.get(columns.get('description', '')) or '',
+                record.get(columns.get('category', '')),
+                record.get(columns.get('transaction_type', '')),
+                date_format
+            )
+        except (StatementError, ValueError) as e:
+            yield reader.line_num, StatementError(str(e))
+
+_OFX_TOKEN = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+def iter_ofx_rows(stream: io.TextIOBase, user_id: int, read_size: int = 65536) -> Iterator[tuple]:
+    """
+    Yield (index, row_or_error) for each <STMTTRN> in an OFX statement.
+
+    Handles both SGML (OFX 1.x, unclosed leaf tags) and XML (OFX 2.x) files by
+    tokenizing tags from a rolling buffer, so the file is never fully loaded.
+    """
+    buffer = ''
+    current: Optional[Dict[str, str]] = None
+    index = 0
+
+    while True:
+        chunk = stream.read(read_size)
+        buffer += chunk
+        # Keep a possibly incomplete trailing token for the next read
+        cut = len(buffer) if not chunk else buffer.rfind('<')
+        if cut <= 0 and chunk:
+            continue
+
+        for closing, tag, text in _OFX_TOKEN.findall(buffer[:cut]):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    try:
+                        yield index, _to_row(
+                            user_id,
+                            current.get('DTPOSTED', '')[:8],
+                            parse_amount(current.get('TRNAMT')),
+                            current.get('NAME') or current.get('MEMO', ''),
+                            None,
+                            {'CREDIT': 'income', 'DEBIT': 'expense'}.get(current.get('TRNTYPE', '').upper()),
+                            '%Y%m%d'
+                        )
+                    except (StatementError, ValueError) as e:
+                        yield index, StatementError(str(e))
+                    index += 1
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing:
+                current[tag] = html.unescape(text.strip())
+
+        buffer = buffer[cut:]
+        if not chunk:
+            break
+
+def detect_format(filename: str) -> str:
+    """Guess the statement format from the file name"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.ofx', '.qfx'):
+        return 'ofx'
+    if extension in ('.csv', '.txt', ''):
+        return 'csv'
+    raise StatementError(f'Unsupported statement format: {extension}')
+
+class StatementImporter:
+    """
+    Runs statement imports on a small background pool and tracks their progress.
+
+    Each chunk of rows is deduplicated against the user's existing transactions
+    via the fingerprint index and inserted in its own short transaction, so
+    readers see progress and no request worker is tied up by a large file.
+    """
+
+    def __init__(self, connection_manager, max_workers: int = 2, chunk_size: int = CHUNK_SIZE,
+                 on_insert: Optional[Callable[[int], None]] = None):
+        self.connection_manager = connection_manager
+        self.chunk_size = chunk_size
+        # Called with the user id after each chunk that inserted rows commits
+        self.on_insert = on_insert
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='statement-import')
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, path: str, user_id: int, filename: str, mapping: Optional[Dict[str, str]] = None,
+               date_format: Optional[str] = None, delete_after: bool = True) -> ImportJob:
+        """Queue an uploaded statement file for import"""
+        job = ImportJob(
+            job_id=uuid.uuid4().hex,
+            user_id=user_id,
+            filename=filename,
+            file_format=detect_format(filename),
+            bytes_total=os.path.getsize(path)
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > MAX_TRACKED_JOBS:
+                self._jobs.popitem(last=False)
+
+        self._executor.submit(self._run, job, path, mapping, date_format, delete_after)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ImportJob]:
+        """Get an import job by id"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: ImportJob, path: str, mapping, date_format, delete_after):
+        """Import a statement file (runs on the worker pool)"""
+        job.status = 'running'
+        try:
+            with open(path, 'rb', buffering=0) as raw:
+                stream = io.TextIOWrapper(
+                    io.BufferedReader(_CountingReader(raw, job)),
+                    encoding='utf-8-sig', errors='replace', newline=''
+                )
+                if job.file_format == 'ofx':
+                    rows = iter_ofx_rows(stream, job.user_id)
+                else:
+                    rows = iter_csv_rows(stream, job.user_id, mapping, date_format)
+                self._import_rows(job, rows)
+            job.status = 'completed'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            if delete_after:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _import_rows(self, job: ImportJob, rows: Iterator[tuple]):
+        """Deduplicate and insert parsed rows chunk by chunk"""
+        # Occurrences of each fingerprint so far in this statement. The k-th
+        # occurrence is a duplicate if the user already has k such rows, so
+        # repeated identical rows within one statement (two coffees on the
+        # same day) are kept while re-imports are skipped.
+        seen: Dict[str, int] = {}
+        chunk = []
+
+        for position, row in rows:
+            job.rows_read += 1
+            if isinstance(row, Exception):
+                job.failed += 1
+                if len(job.errors) < MAX_REPORTED_ERRORS:
+                    job.errors.append({'row': position, 'error': str(row)})
+                continue
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self._flush(job, chunk, seen)
+                chunk = []
+
+        self._flush(job, chunk, seen)
+
+    def _flush(self, job: ImportJob, chunk: List[tuple], seen: Dict[str, int]):
+        """Deduplicate and insert one chunk in a single write transaction"""
+        if not chunk:
+            return
+
+        fingerprints = [transaction_fingerprint(row[0], row[4], row[1], row[3]) for row in chunk]
+        with self.connection_manager.connection() as conn:
+            # Take the write lock before counting, so a concurrent import of the
+            # same statement sees these rows instead of inserting them again
+            conn.execute('BEGIN IMMEDIATE')
+            existing = count_fingerprints(conn, job.user_id, list(set(fingerprints)))
+
+            fresh = []
+            for row, fp in zip(chunk, fingerprints):
+                seen[fp] = seen.get(fp, 0) + 1
+                if seen[fp] <= existing.get(fp, 0):
+                    job.duplicates += 1
+                else:
+                    fresh.append(row)
+                    existing[fp] = existing.get(fp, 0) + 1
+
+            inserted = insert_transactions(conn, fresh)
+            job.inserted += inserted
+
+        if inserted and self.on_insert:
+            self.on_insert(job.user_id)
@@ -0,0 +1,48 @@
+"""
+Shared pytest setup for the FinSight backend
+Puts the backend modules on the import path, as when running from finsight/backend
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Base tables as created by app.create_tables, before any migration
+BASE_SCHEMA = '''
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        category TEXT NOT NULL,
+        description TEXT,
+        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        transaction_type TEXT DEFAULT 'expense',
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    );
+'''
+
+@pytest.fixture
+def base_db(tmp_path):
+    """An unmigrated database file with the original tables (autocommit connection)"""
+    conn = sqlite3.connect(str(tmp_path / 'finsight.db'), isolation_level=None)
+    conn.executescript(BASE_SCHEMA)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def migrated_db(base_db):
+    """A database at the latest schema version"""
+    from migrations import migrate
+    migrate(base_db)
+    return base_db
@@ -0,0 +1,115 @@
+"""Tests for the chatbot request handlers, run against the stub LLM provider"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import pytest
+
+@pytest.fixture(scope='module')
+def routes():
+    """chatbot_routes with a scratch chat database and a fast stub provider"""
+    settings = {
+        'FINSIGHT_LLM_PROVIDER': 'stub',
+        'FINSIGHT_STUB_LATENCY_MS': '20',
+        'FINSIGHT_STUB_JITTER_MS': '0',
+        'FINSIGHT_STUB_DISTRIBUTION': 'fixed',
+        'FINSIGHT_CHAT_DB': os.path.join(tempfile.mkdtemp(), 'chat.db'),
+        'FINSIGHT_WARMUP': '0'
+    }
+    saved = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    import chatbot_routes
+    from gemini_service import initialize_gemini_service
+    initialize_gemini_service()
+    yield chatbot_routes
+    for name, value in saved.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+async def max_loop_lag(coroutine):
+    """Run a coroutine while measuring the longest the event loop went without ticking"""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - started)
+
+    tick = asyncio.create_task(ticker())
+    try:
+        result = await coroutine
+    finally:
+        done = True
+        await tick
+    return result, lag
+
+def test_chat_answers_and_saves_history(routes):
+    payload, status = asyncio.run(routes.process_chat({'message': 'How do I budget?', 'user_id': 'u1', 'session_id': 's1'}))
+    assert status == 200 and payload['success']
+    assert routes.chat_store.get_messages('s1')[-1]['user_message'] == 'How do I budget?'
+
+def test_blocked_chat_store_does_not_stall_the_event_loop(routes, monkeypatch):
+    def locked(*args, **kwargs):
+        time.sleep(0.3)  # as if waiting on busy_timeout
+
+    monkeypatch.setattr(routes.chat_store, 'append_message', locked)
+    monkeypatch.setattr(routes.chat_store, 'get_messages', lambda *args, **kwargs: locked() or [])
+    (payload, status), lag = asyncio.run(max_loop_lag(
+        routes.process_chat({'message': 'Should I invest?', 'user_id': 'u2', 'session_id': 's2', 'use_cache': False})
+    ))
+    assert status == 200
+    assert lag < 0.15
+
+def test_missing_message_is_rejected(routes):
+    payload, status = asyncio.run(routes.process_chat({'user_id': 'u1'}))
+    assert status == 400 and not payload['success']
+
+def test_batches_stay_below_the_advisor_slots(routes, monkeypatch):
+    in_flight = peak = 0
+    answer = routes.process_chat
+
+    async def counted(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await answer(item)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(routes, 'process_chat', counted)
+    items = [{'message': f'Budget tip number {i}?', 'user_id': f'b{i}', 'session_id': f'b{i}', 'use_cache': False}
+             for i in range(12)]
+
+    async def two_batches():
+        return await asyncio.gather(
+            routes.process_chat_batch({'items': items[:6] + ['not an object'], 'concurrency': 100}),
+            routes.process_chat_batch({'items': items[6:]})
+        )
+
+    (first, status), (second, _) = asyncio.run(two_batches())
+    limit = routes.batch_concurrency()
+    assert status == 200 and first['concurrency'] == limit
+    assert limit < routes.get_gemini_service().dispatcher.max_concurrency
+    assert peak <= limit
+    assert [result['index'] for result in first['results']] == list(range(7))
+    assert first['succeeded'] == 6 and first['results'][6]['status'] == 400
+    assert second['succeeded'] == 6
+
+def test_batch_slots_follow_a_changed_limit(routes):
+    async def scenario():
+        first, same, changed = (routes.batch_slots(limit) for limit in (2, 2, 3))
+        for _ in range(2):
+            await changed.acquire()
+        room_after_two = not changed.locked()
+        await changed.acquire()
+        return first is same, changed is not first, room_after_two, changed.locked()
+
+    assert asyncio.run(scenario()) == (True, True, True, True)
@@ -0,0 +1,97 @@
+"""Tests for the circuit breaker state machine"""
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A manual clock for the breaker's reset timeout"""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: now[0])
+    return now
+
+def opened(threshold=3, probes=1):
+    breaker = CircuitBreaker(failure_threshold=threshold, slow_call_seconds=1.0, reset_timeout=30.0,
+                             half_open_probes=probes)
+    for _ in range(threshold):
+        breaker.acquire()
+        breaker.record_failure('boom')
+    return breaker
+
+def state(breaker):
+    return breaker.get_stats()['state']
+
+def test_consecutive_failures_open_it(clock):
+    breaker = CircuitBreaker(failure_threshold=3)
+    for _ in range(2):
+        breaker.acquire()
+        breaker.record_failure('boom')
+    breaker.acquire()
+    breaker.record_success(0.1)  # a success resets the count
+    for _ in range(2):
+        breaker.acquire()
+        breaker.record_failure('boom')
+    assert state(breaker) == CLOSED
+    breaker.acquire()
+    breaker.record_failure('boom')
+    assert state(breaker) == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+    assert breaker.get_stats()['opened'] == 1 and breaker.get_stats()['rejected'] == 2
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=1.0)
+    for _ in range(2):
+        breaker.acquire()
+        breaker.record_success(1.5)
+    assert state(breaker) == OPEN
+    assert breaker.get_stats()['slow_calls'] == 2
+
+def test_late_success_does_not_close_an_open_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    # Three calls admitted while closed; two fail, then the slow third one answers
+    for _ in range(3):
+        breaker.acquire()
+    breaker.record_failure('boom')
+    breaker.record_failure('boom')
+    assert state(breaker) == OPEN
+    breaker.record_success(0.1)
+    assert state(breaker) == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+
+def test_probe_success_closes_it(clock):
+    breaker = opened()
+    clock[0] += 29
+    assert state(breaker) == OPEN
+    clock[0] += 1
+    assert state(breaker) == HALF_OPEN
+    breaker.check()
+    breaker.acquire()
+    # Only one probe at a time
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+    breaker.record_success(0.1)
+    assert state(breaker) == CLOSED
+    breaker.acquire()
+
+def test_probe_failure_reopens_it(clock):
+    breaker = opened()
+    clock[0] += 30
+    breaker.acquire()
+    breaker.record_failure('still down')
+    assert state(breaker) == OPEN
+    assert breaker.get_stats()['retry_in'] == 30
+    assert breaker.get_stats()['last_error'] == 'still down'
+
+def test_abandoned_probe_frees_its_slot(clock):
+    breaker = opened()
+    clock[0] += 30
+    breaker.acquire()
+    breaker.abandon()
+    breaker.acquire()
+    assert breaker.get_stats()['probes'] == 2
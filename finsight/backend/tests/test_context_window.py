@@ -0,0 +1,72 @@
+"""Tests for fitting chat history into the per-request token budget"""
+
+from collections import namedtuple
+
+from context_window import SUMMARY_HEADER, ContextWindow, estimate_tokens
+
+Message = namedtuple('Message', 'role content')
+
+def conversation(exchanges, words=20):
+    """Alternating user/assistant messages, each about `words` words long"""
+    messages = []
+    for i in range(exchanges):
+        messages.append(Message('user', f'Question {i}. ' + 'detail ' * words))
+        messages.append(Message('assistant', f'Answer {i}. ' + 'advice ' * words))
+    return messages
+
+def roles(plan):
+    return [content['role'] for content in plan.history]
+
+def assert_alternates(plan):
+    assert roles(plan) == ['user', 'model'] * (len(plan.history) // 2)
+
+def test_fits_everything_when_it_is_short():
+    window = ContextWindow(recent_turns=6)
+    history = conversation(2)
+    plan = window.fit(history, 1000)
+    assert [content['parts'][0] for content in plan.history] == [msg.content for msg in history]
+    assert plan.verbatim_turns == 4 and plan.summarized_turns == plan.dropped_turns == 0
+    assert plan.tokens == sum(estimate_tokens(msg.content) for msg in history)
+
+def test_unanswered_questions_are_dropped():
+    window = ContextWindow(recent_turns=10)
+    history = conversation(2)
+    history.insert(2, Message('user', 'Never answered.'))
+    history.append(Message('user', 'Pending question.'))
+    plan = window.fit(history, 1000)
+    assert_alternates(plan)
+    texts = [content['parts'][0] for content in plan.history]
+    assert 'Never answered.' not in texts and 'Pending question.' not in texts
+
+def test_older_turns_are_summarized_beyond_recent_turns():
+    window = ContextWindow(recent_turns=4, summary_tokens=300)
+    plan = window.fit(conversation(5), 1000)
+    assert_alternates(plan)
+    assert plan.history[0]['parts'][0].startswith(SUMMARY_HEADER)
+    assert 'User: Question 0.' in plan.history[0]['parts'][0]
+    assert plan.verbatim_turns == 4 and plan.summarized_turns == 6 and plan.dropped_turns == 0
+    assert plan.history[-2]['parts'][0].startswith('Question 4.')
+
+def test_stays_within_the_available_tokens():
+    window = ContextWindow(recent_turns=6, summary_tokens=40)
+    history = conversation(10)
+    for available in (10, 30, 60, 100, 150, 400):
+        plan = window.fit(history, available)
+        assert plan.tokens <= available
+        assert_alternates(plan)
+        assert plan.summarized_turns + plan.dropped_turns + plan.verbatim_turns == len(history)
+
+def test_turns_that_do_not_fit_are_dropped_and_counted():
+    window = ContextWindow(recent_turns=2, summary_tokens=20)
+    plan = window.fit(conversation(10), 80)
+    assert plan.verbatim_turns == 2
+    assert plan.dropped_turns > 0
+    assert plan.summarized_turns + plan.dropped_turns == 18
+
+def test_no_budget_means_no_history():
+    window = ContextWindow()
+    for available in (0, -50):
+        plan = window.fit(conversation(3), available)
+        assert plan.history == [] and plan.tokens == 0
+        assert plan.dropped_turns == 6
+    assert window.fit(None, 100).history == []
@@ -0,0 +1,39 @@
+"""Tests for the pooled SQLite connection manager"""
+
+import pytest
+
+import db_connection
+from db_connection import ConnectionManager, initialize_connection_manager
+
+@pytest.fixture(autouse=True)
+def fresh_global(monkeypatch):
+    monkeypatch.setattr(db_connection, 'connection_manager', None)
+
+def test_pooled_connections_are_reused_in_wal_mode(tmp_path):
+    manager = ConnectionManager(str(tmp_path / 'pool.db'), pool_size=2)
+    with manager.connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    with manager.connection():
+        pass
+    assert manager.get_stats()['created'] == 1
+    assert manager.get_stats()['reused'] == 1
+
+def test_failed_block_rolls_back(tmp_path):
+    manager = ConnectionManager(str(tmp_path / 'pool.db'))
+    with manager.connection() as conn:
+        conn.execute('CREATE TABLE t (x INTEGER)')
+    with pytest.raises(RuntimeError):
+        with manager.connection() as conn:
+            conn.execute('INSERT INTO t VALUES (1)')
+            raise RuntimeError('boom')
+    with manager.connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+def test_initialize_returns_the_same_manager_for_the_same_path(tmp_path):
+    path = str(tmp_path / 'a.db')
+    assert initialize_connection_manager(path) is initialize_connection_manager(path)
+
+def test_initialize_rejects_a_different_path(tmp_path):
+    initialize_connection_manager(str(tmp_path / 'a.db'))
+    with pytest.raises(ValueError):
+        initialize_connection_manager(str(tmp_path / 'b.db'))
@@ -0,0 +1,90 @@
+"""Tests for the closed-form FIRE solver against the simulations it replaced"""
+
+import math
+import random
+
+import pytest
+
+from fire_engine import (
+    MAX_MONTHS, balance_after, calculator_years_to_fire, months_to_target, scenario_grid, solve_months,
+    whole_months
+)
+
+def old_calculator_years(current_savings, monthly_savings, expected_return, fire_number):
+    """/api/calculator/fire before the closed form"""
+    remaining_needed = fire_number - current_savings
+    if monthly_savings > 0 and expected_return > 0:
+        monthly_return = expected_return / 12
+        if remaining_needed <= 0:
+            return 0
+        months = 0
+        balance = current_savings
+        while balance < fire_number and months < 600:
+            balance = balance * (1 + monthly_return) + monthly_savings
+            months += 1
+        return months / 12
+    return remaining_needed / (monthly_savings * 12) if monthly_savings > 0 else float('inf')
+
+def old_fire_loop(current_savings, monthly_savings, monthly_return, target_corpus):
+    """/api/fire/calculate before the closed form: (months, balance)"""
+    balance = current_savings
+    months = 0
+    while balance < target_corpus and months < 600:
+        balance = balance * (1 + monthly_return) + monthly_savings
+        months += 1
+    return months, balance
+
+def random_inputs(rng, count):
+    for _ in range(count):
+        yield (
+            rng.choice([0, rng.uniform(0, 500000)]),
+            rng.choice([0, rng.uniform(-500, 0), rng.uniform(1, 5000)]),
+            rng.choice([0, rng.uniform(-0.05, 0), rng.uniform(0.001, 0.15)]),
+            rng.uniform(10000, 2000000)
+        )
+
+def test_calculator_matches_the_old_endpoint_including_edges():
+    rng = random.Random(7)
+    for savings, monthly, annual_return, target in random_inputs(rng, 3000):
+        expected = old_calculator_years(savings, monthly, annual_return, target)
+        actual = calculator_years_to_fire(savings, monthly, annual_return, target)
+        if math.isinf(expected):
+            assert math.isinf(actual)
+        else:
+            assert actual == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+def test_zero_return_is_straight_line_and_uncapped():
+    assert calculator_years_to_fire(0, 100, 0, 1000000) == pytest.approx(1000000 / 1200)
+    assert calculator_years_to_fire(0, 100, 0, 1000000) > MAX_MONTHS / 12
+
+def test_no_monthly_savings_never_reaches_fire_in_the_calculator():
+    assert math.isinf(calculator_years_to_fire(100000, 0, 0.08, 500000))
+
+def test_whole_months_and_balance_match_the_old_loop():
+    rng = random.Random(11)
+    for savings, monthly, annual_return, target in random_inputs(rng, 3000):
+        if monthly <= 0:
+            continue  # rejected by the endpoint
+        monthly_return = annual_return / 12
+        expected_months, expected_balance = old_fire_loop(savings, monthly, monthly_return, target)
+        months = whole_months(solve_months(savings, monthly, monthly_return, target))
+        assert months == expected_months
+        assert float(balance_after(savings, monthly, monthly_return, months)) == pytest.approx(expected_balance, rel=1e-9)
+
+def test_months_to_target_edges():
+    assert float(months_to_target(500, 10, 0.01, 400)) == 0
+    assert float(months_to_target(0, 100, 0, 1000)) == 10
+    assert math.isinf(float(months_to_target(0, 0, 0, 1000)))
+    assert math.isinf(float(months_to_target(0, 10, -0.5, 1000000)))
+
+def test_scenario_grid_shape_and_values():
+    grid = scenario_grid(5000, 10000, [10, 50], [0, 8], [20000, 40000, 60000])
+    years = grid['years_to_fire']
+    assert len(years) == 2 and len(years[0]) == 2 and len(years[0][0]) == 3
+    assert years[1][1][0] < years[0][1][0]
+    expected = solve_months(10000, 2500, 0.08 / 12, 40000 / 0.04) / 12
+    assert years[1][1][1] == pytest.approx(round(expected, 1))
+
+def test_scenario_grid_rejects_oversized_grids():
+    with pytest.raises(ValueError):
+        scenario_grid(5000, 0, list(range(100)), list(range(100)), list(range(100)))
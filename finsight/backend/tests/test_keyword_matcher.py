@@ -0,0 +1,46 @@
+"""Tests for the shared keyword matcher against the keyword loops it replaced"""
+
+import random
+
+import pytest
+
+from keyword_matcher import FINANCE_KEYWORDS, KeywordMatcher
+
+FILLER = ['your', 'monthly', 'plan', 'should', 'a', 'rule', 'for', 'each', 'paycheck', 'the', 'steps', 'Emergency',
+          'FUND', 'money-management', 'what', 'is', 'help', 'me', 'understand', 'hi,', '(invest)', 'prepayment']
+
+def legacy_first(text, table, default):
+    """The old matching: lowercase, then test each keyword of each category in order"""
+    lowered = text.lower()
+    for category, keywords in FINANCE_KEYWORDS.tables[table].items():
+        if any(keyword in lowered for keyword in keywords):
+            return category
+    return default
+
+def random_texts(count, seed=7):
+    rng = random.Random(seed)
+    keywords = [k for categories in FINANCE_KEYWORDS.tables.values() for ks in categories.values() for k in ks]
+    for _ in range(count):
+        rate = rng.random() * 0.3
+        words = [rng.choice(keywords).upper() if rng.random() < rate else rng.choice(FILLER)
+                 for _ in range(rng.randint(0, 60))]
+        yield ' '.join(words)
+
+@pytest.mark.parametrize('table', list(FINANCE_KEYWORDS.tables))
+def test_first_agrees_with_the_old_loops(table):
+    for text in random_texts(2000):
+        assert FINANCE_KEYWORDS.first(text, table, 'none') == legacy_first(text, table, 'none')
+
+def test_substring_and_phrase_semantics():
+    assert FINANCE_KEYWORDS.first('Think about your FUTURE', 'intent', 'general') == 'planning'
+    assert FINANCE_KEYWORDS.first('Prepayments lower interest', 'intent', 'general') == 'debt'
+    assert FINANCE_KEYWORDS.first('What   is a Roth?', 'intent', 'none') == 'none'
+    assert FINANCE_KEYWORDS.first('What is a Roth?', 'intent', 'none') == 'education'
+    assert FINANCE_KEYWORDS.first('', 'reply', 'general') == 'general'
+
+def test_categories_are_tried_in_table_order():
+    matcher = KeywordMatcher({'t': {'a': ['loan'], 'b': ['pay off'], 'c': ['Car']}})
+    assert matcher.first('Pay off the car LOAN first', 't', 'none') == 'a'
+    assert matcher.first('Pay off the car first', 't', 'none') == 'b'
+    assert matcher.first('scarcely', 't', 'none') == 'c'
+    assert matcher.first('nothing here', 't', 'none') == 'none'
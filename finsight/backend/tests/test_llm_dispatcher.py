@@ -0,0 +1,130 @@
+"""Tests for the LLM call dispatcher: slots, fair queueing, coalescing and deadlines"""
+
+import asyncio
+import time
+
+import pytest
+
+from llm_dispatcher import DispatcherFull, LLMDispatcher
+
+def test_queue_wait_gives_up_at_the_deadline():
+    dispatcher = LLMDispatcher(max_concurrency=1, max_queue=4)
+
+    async def scenario():
+        async def hold():
+            async with dispatcher.slot('a'):
+                await asyncio.sleep(0.3)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        started = time.monotonic()
+        with pytest.raises(DispatcherFull):
+            await dispatcher.run(None, lambda: asyncio.sleep(0), user='b', deadline=started + 0.05)
+        gave_up = time.monotonic() - started
+        await holder
+        return gave_up
+
+    gave_up = asyncio.run(scenario())
+    assert gave_up < 0.2
+    stats = dispatcher.get_stats()
+    assert stats['timed_out'] == 1 and stats['waiting'] == 0 and stats['active'] == 0
+
+def served_order(dispatcher, requests):
+    """Queue (user, label) requests behind one held slot and record the order they get a slot in"""
+    order = []
+
+    async def scenario():
+        async def call(label):
+            async with dispatcher.slot(label[0]):
+                order.append(label)
+                await asyncio.sleep(0)
+
+        async with dispatcher.slot('holder'):
+            tasks = []
+            for label in requests:
+                tasks.append(asyncio.create_task(call(label)))
+                await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    return order
+
+def test_waiting_users_share_freed_slots_fairly():
+    dispatcher = LLMDispatcher(max_concurrency=1, max_queue=16)
+    order = served_order(dispatcher, [('heavy', i) for i in range(4)] + [('light', 0), ('other', 0)])
+    # The light users queued last but are served right after the heavy user's first call
+    assert order[:3] == [('heavy', 0), ('light', 0), ('other', 0)]
+    assert dispatcher.get_stats()['waiting_users'] == 0
+
+def test_weights_give_larger_shares():
+    dispatcher = LLMDispatcher(max_concurrency=1, max_queue=16, weights={'vip': 3})
+    order = served_order(dispatcher, [('std', i) for i in range(3)] + [('vip', i) for i in range(3)])
+    # Finish tags: std 1, 2, 3 and vip 1/3, 2/3, 1 (queued after std's 1, so served after it)
+    assert [user for user, _ in order] == ['vip', 'vip', 'std', 'vip', 'std', 'std']
+
+def test_full_queue_sheds_at_once():
+    dispatcher = LLMDispatcher(max_concurrency=1, max_queue=1)
+
+    async def scenario():
+        async with dispatcher.slot('a'):
+            waiter = asyncio.create_task(dispatcher.run(None, lambda: asyncio.sleep(0), user='b'))
+            await asyncio.sleep(0)
+            with pytest.raises(DispatcherFull):
+                await dispatcher.run(None, lambda: asyncio.sleep(0), user='c')
+        await waiter
+
+    asyncio.run(scenario())
+    assert dispatcher.get_stats()['shed'] == 1
+
+def test_cancelled_waiter_gives_up_its_place():
+    dispatcher = LLMDispatcher(max_concurrency=1, max_queue=4)
+
+    async def scenario():
+        async with dispatcher.slot('a'):
+            cancelled = asyncio.create_task(dispatcher.run(None, lambda: asyncio.sleep(0), user='b'))
+            await asyncio.sleep(0)
+            served = asyncio.create_task(dispatcher.run(None, lambda: asyncio.sleep(0, 'c'), user='c'))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            await asyncio.sleep(0)
+        return await served
+
+    assert asyncio.run(scenario()) == 'c'
+    stats = dispatcher.get_stats()
+    assert stats['active'] == 0 and stats['waiting'] == 0
+
+def test_identical_calls_are_coalesced():
+    dispatcher = LLMDispatcher(max_concurrency=4)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'answer'
+
+    async def scenario():
+        return await asyncio.gather(*(dispatcher.run('key', call, user=f'u{i}') for i in range(3)))
+
+    assert asyncio.run(scenario()) == ['answer'] * 3
+    assert len(calls) == 1 and dispatcher.get_stats()['coalesced'] == 2
+
+def test_cancelled_follower_leaves_the_others_their_result():
+    dispatcher = LLMDispatcher(max_concurrency=4)
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return 'answer'
+
+    async def scenario():
+        leader = asyncio.create_task(dispatcher.run('key', call, user='a'))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(dispatcher.run('key', call, user=user)) for user in ('b', 'c')]
+        await asyncio.sleep(0.01)
+        followers[0].cancel()
+        results = await asyncio.gather(leader, *followers, return_exceptions=True)
+        return results
+
+    leader, cancelled, follower = asyncio.run(scenario())
+    assert leader == follower == 'answer'
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert dispatcher.get_stats()['inflight_keys'] == 0
@@ -0,0 +1,63 @@
+"""Tests for the thread pool that runs blocking model SDK calls"""
+
+import asyncio
+import threading
+
+from gemini_service import GeminiFinancialAdvisor
+from llm_executor import LLMExecutor
+from llm_provider import StubProvider
+
+def test_counts_queued_and_running_calls_and_cancels_queued_ones():
+    executor = LLMExecutor(max_workers=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    async def scenario():
+        running = asyncio.create_task(executor.run(blocking))
+        await asyncio.to_thread(started.wait, 5)
+        queued = asyncio.create_task(executor.run(lambda: 'never'))
+        await asyncio.sleep(0.01)
+        saturated = executor.get_stats()
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        after_cancel = executor.get_stats()
+        release.set()
+        return saturated, after_cancel, await running
+
+    try:
+        saturated, after_cancel, result = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert result == 'done'
+    assert saturated['active'] == 1 and saturated['queued'] == 1
+    assert after_cancel['queued'] == 0 and after_cancel['cancelled'] == 1
+    stats = executor.get_stats()
+    assert stats['queued'] == 0 and stats['active'] == 0
+    assert stats['submitted'] == 2 and stats['completed'] == 1 and stats['peak_active'] == 1
+
+def ask(async_api: bool):
+    advisor = GeminiFinancialAdvisor(provider=StubProvider(latency_ms=5, jitter_ms=0, distribution='fixed',
+                                                           async_api=async_api))
+
+    async def scenario():
+        result = await advisor.get_chat_response('How do I budget?', 'u', use_cache=False)
+        events = [event async for event in advisor.stream_chat_response('How do I save?', 'u', use_cache=False)]
+        return result, events
+
+    result, events = asyncio.run(scenario())
+    assert result['success'] and events[-1]['type'] == 'done'
+    return advisor.get_executor_stats()
+
+def test_native_async_provider_never_uses_the_pool():
+    stats = ask(async_api=True)
+    assert stats['native_async'] and stats['submitted'] == 0
+
+def test_blocking_provider_runs_on_the_pool():
+    stats = ask(async_api=False)
+    assert not stats['native_async'] and stats['submitted'] > 0
+    assert stats['queued'] == 0 and stats['active'] == 0
@@ -0,0 +1,86 @@
+"""Tests for the vectorized amortization engine against a month-by-month loop"""
+
+import random
+
+import numpy as np
+import pytest
+
+from loan_engine import EPSILON, amortization_schedule, batch_schedules, calculate_emi_amount
+
+def loop_schedule(principal, annual_rate, tenure, prepayments=None, rate_changes=None, reduce='tenure'):
+    """Reference amortization, one month at a time"""
+    prepayments = prepayments or {}
+    rate_changes = rate_changes or {}
+    monthly_rate = annual_rate / 1200
+    emi = calculate_emi_amount(principal, monthly_rate, tenure)
+    balance = principal
+    rows = []
+    month = 1
+    while balance > EPSILON and month <= 1200:
+        if month in rate_changes:
+            monthly_rate = rate_changes[month] / 1200
+            if reduce == 'emi' or emi <= balance * monthly_rate:
+                emi = calculate_emi_amount(balance, monthly_rate, max(tenure - month + 1, 1))
+        interest = balance * monthly_rate
+        payment = emi
+        closing = balance + interest - payment
+        if closing < EPSILON:
+            payment, closing = balance + interest, 0.0
+        prepaid = 0.0
+        if month in prepayments and closing > EPSILON:
+            prepaid = min(prepayments[month], closing)
+            closing -= prepaid
+            if reduce == 'emi' and closing > EPSILON:
+                emi = calculate_emi_amount(closing, monthly_rate, max(tenure - month, 1))
+        rows.append((interest, payment, prepaid, closing))
+        balance = closing
+        month += 1
+    return rows
+
+def compare(principal, annual_rate, tenure, prepayments=None, rate_changes=None, reduce='tenure'):
+    expected = loop_schedule(principal, annual_rate, tenure, prepayments, rate_changes, reduce)
+    result = amortization_schedule(
+        principal, annual_rate, tenure,
+        prepayments=[{'month': m, 'amount': a} for m, a in (prepayments or {}).items()],
+        rate_changes=[{'month': m, 'annual_rate': r} for m, r in (rate_changes or {}).items()],
+        reduce=reduce
+    )
+    schedule = result['schedule']
+    assert result['months'] == len(expected)
+    for column, index in (('interest', 0), ('payment', 1), ('prepayment', 2), ('closing_balance', 3)):
+        assert schedule[column] == pytest.approx([row[index] for row in expected], rel=1e-7, abs=1e-4)
+    assert result['total_interest'] == pytest.approx(sum(row[0] for row in expected), abs=0.01)
+
+def test_plain_loans_match_the_loop():
+    rng = random.Random(3)
+    for _ in range(200):
+        compare(rng.uniform(1000, 5000000), rng.choice([0, rng.uniform(1, 24)]), rng.randint(1, 360))
+
+@pytest.mark.parametrize('reduce', ['tenure', 'emi'])
+def test_prepayments_and_rate_changes_match_the_loop(reduce):
+    rng = random.Random(5)
+    for _ in range(200):
+        tenure = rng.randint(12, 360)
+        principal = rng.uniform(10000, 5000000)
+        prepayments = {rng.randint(1, tenure): rng.uniform(0, principal / 4) for _ in range(rng.randint(0, 4))}
+        rate_changes = {rng.randint(1, tenure): rng.uniform(0, 24) for _ in range(rng.randint(0, 3))}
+        compare(principal, rng.uniform(0, 18), tenure, prepayments, rate_changes, reduce)
+
+def test_emi_formula_and_zero_rate():
+    assert calculate_emi_amount(120000, 0, 12) == pytest.approx(10000)
+    assert calculate_emi_amount(100000, 0.01, 12) == pytest.approx(8884.88, abs=0.01)
+
+def test_batch_schedules_match_single_schedules():
+    principals, rates, tenures = [250000, 80000, 1200000], [9.5, 0, 7.25], [60, 24, 240]
+    batch = batch_schedules(principals, rates, tenures)
+    for row, (principal, rate, tenure) in enumerate(zip(principals, rates, tenures)):
+        single = amortization_schedule(principal, rate, tenure)['schedule']
+        assert batch['interest'][row, :tenure] == pytest.approx(single['interest'], abs=1e-4)
+        assert batch['closing_balance'][row, tenure - 1] == pytest.approx(0, abs=1e-4)
+        assert np.all(batch['interest'][row, tenure:] == 0)
+
+def test_invalid_loans_are_rejected():
+    with pytest.raises(ValueError):
+        amortization_schedule(0, 10, 12)
+    with pytest.raises(ValueError):
+        amortization_schedule(1000, 10, 12, reduce='both')
@@ -0,0 +1,48 @@
+"""Tests for the versioned SQLite schema migrations"""
+
+import pytest
+
+from migrations import MIGRATIONS, explain_query_plan, get_schema_version, migrate
+from transaction_store import month_range
+
+def test_fresh_database_is_migrated_to_the_latest_version(base_db):
+    applied = migrate(base_db)
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    assert get_schema_version(base_db) == MIGRATIONS[-1][0]
+
+def test_migrate_is_idempotent(migrated_db):
+    assert migrate(migrated_db) == []
+
+def test_dates_are_normalized_to_the_sortable_format(base_db):
+    base_db.execute("INSERT INTO transactions (user_id, amount, category, date) VALUES (1, 5, 'food', '2025-01-05T09:30:00')")
+    base_db.execute("INSERT INTO transactions (user_id, amount, category, date) VALUES (1, 5, 'food', '2025-01-06 10:00:00')")
+    migrate(base_db)
+    dates = [row[0] for row in base_db.execute('SELECT date FROM transactions ORDER BY id')]
+    assert dates == ['2025-01-05 09:30:00', '2025-01-06 10:00:00']
+
+def test_monthly_range_query_uses_the_date_index(migrated_db):
+    start, end = month_range('2025-01')
+    plan = ' '.join(explain_query_plan(migrated_db, '''
+        SELECT SUM(amount) FROM transactions
+        WHERE user_id = ? AND transaction_type = ? AND date >= ? AND date < ?
+    ''', (1, 'expense', start, end)))
+    assert 'idx_transactions_user_type_date' in plan
+
+def test_failed_migration_rolls_back_and_keeps_the_version(base_db, monkeypatch):
+    def broken(conn):
+        conn.execute("INSERT INTO transactions (user_id, amount, category) VALUES (1, 1, 'x')")
+        raise RuntimeError('broken migration')
+    monkeypatch.setattr('migrations.MIGRATIONS', [(1, 'Broken', broken)])
+    with pytest.raises(RuntimeError):
+        migrate(base_db)
+    assert get_schema_version(base_db) == 0
+    assert base_db.execute('SELECT COUNT(*) FROM transactions').fetchone()[0] == 0
+
+def test_rollup_backfill_skips_rows_without_a_date_or_type(base_db):
+    base_db.execute("INSERT INTO transactions (user_id, amount, category, date) VALUES (1, 5, 'food', NULL)")
+    base_db.execute("INSERT INTO transactions (user_id, amount, category, transaction_type) VALUES (1, 7, 'food', NULL)")
+    base_db.execute("INSERT INTO transactions (user_id, amount, category, date) VALUES (1, 9, 'food', '2025-01-05 09:30:00')")
+    migrate(base_db)
+    assert get_schema_version(base_db) == MIGRATIONS[-1][0]
+    rows = base_db.execute('SELECT month, transaction_type, total, txn_count FROM monthly_rollups').fetchall()
+    assert rows == [('2025-01', 'expense', 9.0, 1)]
@@ -0,0 +1,83 @@
+"""Tests for the Monte Carlo FIRE simulation"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import monte_carlo
+from monte_carlo import SimulationTimeout, run_simulation
+
+PLAN = dict(current_savings=50000, monthly_savings=2000, annual_return=0.07, annual_volatility=0.15,
+            target=1000000, years=40)
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    """Stand in for the process pool so chunks can be slowed down in-process"""
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(monte_carlo, '_get_pool', lambda: pool)
+    monkeypatch.setattr(monte_carlo, 'POOL_THRESHOLD', 1)
+    monkeypatch.setattr(monte_carlo, 'CHUNK_PATHS', 100)
+    yield pool
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def test_same_seed_gives_the_same_result_inline_and_pooled(monkeypatch):
+    monkeypatch.setattr(monte_carlo, 'CHUNK_PATHS', 100)
+    inline = run_simulation(paths=1000, seed=42, **PLAN)
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(monte_carlo, '_get_pool', lambda: pool)
+    monkeypatch.setattr(monte_carlo, 'POOL_THRESHOLD', 1)
+    assert run_simulation(paths=1000, seed=42, **PLAN) == inline
+    pool.shutdown()
+
+def test_pool_wait_is_bounded_for_the_whole_request(thread_pool, monkeypatch):
+    real_chunk = monte_carlo.simulate_chunk
+
+    def slow_chunk(*args):
+        time.sleep(0.2)
+        return real_chunk(*args)
+
+    monkeypatch.setattr(monte_carlo, 'simulate_chunk', slow_chunk)
+    monkeypatch.setattr(monte_carlo, 'POOL_TIMEOUT', 0.5)
+    started = time.monotonic()
+    # 10 chunks on one worker: a per-chunk timeout would wait about 2s
+    with pytest.raises(SimulationTimeout):
+        run_simulation(paths=1000, seed=1, **PLAN)
+    assert time.monotonic() - started < 1.0
+
+def test_results_are_sane():
+    result = run_simulation(paths=2000, seed=7, **PLAN)
+    assert 0 < result['success_probability'] <= 1
+    bands = result['balance_bands']
+    assert len(bands['year']) == 40
+    assert all(low <= high for low, high in zip(bands['p5'], bands['p95']))
+
+def test_invalid_inputs_are_rejected():
+    with pytest.raises(ValueError):
+        run_simulation(paths=0, **PLAN)
+    with pytest.raises(ValueError):
+        run_simulation(paths=100, **{**PLAN, 'annual_volatility': -0.1})
+
+def test_timeout_counts_cancelled_and_abandoned_chunks(thread_pool, monkeypatch):
+    release = threading.Event()
+    real_chunk = monte_carlo.simulate_chunk
+
+    def stuck_chunk(*args):
+        release.wait(5)
+        return real_chunk(*args)
+
+    monkeypatch.setattr(monte_carlo, 'simulate_chunk', stuck_chunk)
+    monkeypatch.setattr(monte_carlo, 'POOL_TIMEOUT', 0.1)
+    before = monte_carlo.get_pool_stats()
+    with pytest.raises(SimulationTimeout):
+        run_simulation(paths=1000, seed=1, **PLAN)
+    stats = monte_carlo.get_pool_stats()
+    # One worker: the running chunk is abandoned, the other nine never start
+    assert stats['timeouts'] - before['timeouts'] == 1
+    assert stats['abandoned_chunks'] - before['abandoned_chunks'] == 1
+    assert stats['cancelled_chunks'] - before['cancelled_chunks'] == 9
+    assert stats['abandoned_running'] == 1
+    release.set()
+    thread_pool.shutdown(wait=True)
+    assert monte_carlo.get_pool_stats()['abandoned_running'] == 0
@@ -0,0 +1,48 @@
+"""Tests for the per-user token bucket limiter"""
+
+import pytest
+
+import rate_limiter
+from rate_limiter import TokenBucketLimiter, rate_limiter_from_env
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [500.0]
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: now[0])
+    return now
+
+def test_off_by_default(monkeypatch):
+    monkeypatch.delenv('FINSIGHT_USER_RATE', raising=False)
+    limiter = rate_limiter_from_env()
+    assert all(limiter.acquire('flutter_user') == 0 for _ in range(100))
+    assert limiter.get_stats()['tracked_users'] == 0
+
+def test_burst_then_refill(clock):
+    limiter = TokenBucketLimiter(rate=0.5, burst=3)
+    assert [limiter.acquire('u') for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire('u') == pytest.approx(2.0)
+    clock[0] += 1
+    assert limiter.acquire('u') == pytest.approx(1.0)
+    clock[0] += 1
+    assert limiter.acquire('u') == 0
+    # Refill is capped at the burst
+    clock[0] += 100
+    assert [limiter.acquire('u') for _ in range(4)][-1] > 0
+    assert limiter.get_stats()['allowed'] == 7
+
+def test_users_have_their_own_buckets(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=1)
+    assert limiter.acquire('a') == 0
+    assert limiter.acquire('a') > 0
+    assert limiter.acquire('b') == 0
+
+def test_least_recent_users_are_dropped(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_users=2)
+    limiter.acquire('a')
+    limiter.acquire('b')
+    limiter.acquire('a')
+    limiter.acquire('c')  # drops b, the least recently seen
+    assert limiter.get_stats()['tracked_users'] == 2
+    assert limiter.acquire('c') > 0
+    # b starts again with a full bucket
+    assert limiter.acquire('b') == 0
@@ -0,0 +1,108 @@
+"""Tests for the chatbot response cache key and the prompts of shared answers"""
+
+import asyncio
+
+from gemini_service import ChatContext, ChatMessage, GeminiFinancialAdvisor
+from llm_provider import StubProvider
+from response_cache import ChatResponseCache, context_bucket, describe_bucket
+
+class RecordingProvider(StubProvider):
+    """Stub provider that keeps every prompt it was asked to answer"""
+
+    def __init__(self):
+        super().__init__(latency_ms=5, jitter_ms=0, distribution='fixed')
+        self.prompts = []
+        self.sessions = []
+
+    def start_chat(self, history):
+        session = super().start_chat(history)
+        self.sessions.append(session)
+        return session
+
+    def response_for(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return super().response_for(prompt)
+
+def context(**overrides):
+    fields = dict(monthly_income=5123.0, monthly_expenses=3900.0, savings_goal=25000.0,
+                  debt_amount=12000.0, risk_tolerance='Moderate', financial_goals=['Buy a house in Austin'])
+    fields.update(overrides)
+    return ChatContext(**fields)
+
+def test_similar_users_share_a_key():
+    cache = ChatResponseCache()
+    first = cache.key_for('How do I build an emergency fund?', context())
+    second = cache.key_for('how to build an Emergency Fund', context(monthly_income=6000.0, monthly_expenses=4500.0))
+    assert first == second == ('build emergency fund', (3, 2, True, 'moderate'))
+
+def test_different_buckets_get_different_keys():
+    cache = ChatResponseCache()
+    key = cache.key_for('How do I build an emergency fund?', context())
+    assert cache.key_for('How do I build an emergency fund?', context(monthly_income=51230.0)) != key
+    assert cache.key_for('How do I build an emergency fund?', context(debt_amount=None)) != key
+    assert cache.key_for('How do I build an emergency fund?', None) != key
+
+def test_personal_questions_bypass_the_cache():
+    cache = ChatResponseCache()
+    history = [ChatMessage(content='Hi', role='user', timestamp=None)]
+    assert cache.key_for('Should I pay off my $4000 card?', context()) is None
+    assert cache.key_for('I earn 3000 a month, how much should I save?', context()) is None
+    assert cache.key_for('What about index funds?', context(), history) is None
+    assert cache.key_for('How do I budget?', context(), bypass=True) is None
+    assert cache.key_for('How do I budget?', context()) is not None
+    assert cache.get_stats()['bypassed'] == 4
+
+def test_describe_bucket():
+    assert describe_bucket(()) == []
+    assert describe_bucket((3, 2, True, 'moderate')) == [
+        'Monthly Income: $1,000-$9,999', 'Savings Rate: 20-29%', 'Current Debt: yes', 'Risk Tolerance: moderate']
+    assert describe_bucket(context_bucket(context(monthly_expenses=6000.0, debt_amount=None, risk_tolerance=None))) == [
+        'Monthly Income: $1,000-$9,999', 'Savings Rate: spending at least 10% more than income']
+    assert describe_bucket((4, 5, False, None)) == ['Monthly Income: $10,000-$99,999', 'Savings Rate: 30% or more']
+
+def test_shared_answer_prompt_carries_no_personal_details():
+    provider = RecordingProvider()
+    advisor = GeminiFinancialAdvisor(provider=provider)
+    result = asyncio.run(advisor.get_chat_response('How do I build an emergency fund?', 'alice', context()))
+    assert result['success']
+    prompt = provider.prompts[-1]
+    assert 'Monthly Income: $1,000-$9,999' in prompt
+    for detail in ('5,123', '3,900', '25,000', '12,000', 'Austin'):
+        assert detail not in prompt
+
+def test_personal_prompt_keeps_exact_figures():
+    provider = RecordingProvider()
+    advisor = GeminiFinancialAdvisor(provider=provider)
+    asyncio.run(advisor.get_chat_response('Should I pay off my $4000 card first?', 'alice', context()))
+    prompt = provider.prompts[-1]
+    assert 'Monthly Income: $5,123.00' in prompt and 'Buy a house in Austin' in prompt
+
+def test_coalesced_shared_answer_uses_no_ones_conversation():
+    provider = RecordingProvider()
+    advisor = GeminiFinancialAdvisor(provider=provider)
+    asyncio.run(advisor.get_chat_response('Should I pay off my $4000 card first?', 'alice', context()))
+    personal = provider.sessions[-1]
+
+    async def ask_together():
+        return await asyncio.gather(
+            advisor.get_chat_response('How do I build an emergency fund?', 'alice', context()),
+            advisor.get_chat_response('How do I build an emergency fund?', 'bob', context(monthly_income=5500.0))
+        )
+
+    alice, bob = asyncio.run(ask_together())
+    assert alice['response'] == bob['response']
+    assert len(provider.prompts) == 2 and advisor.dispatcher.get_stats()['coalesced'] == 1
+    # Answered on a fresh session, and alice's earlier conversation was not extended
+    shared = provider.sessions[-1]
+    assert shared is not personal and len(shared.history) == 2
+    assert len(personal.history) == 2
+    assert 'alice' not in advisor.chat_sessions and 'bob' not in advisor.chat_sessions
+
+def test_follow_up_after_shared_answer_rebuilds_from_client_history():
+    provider = RecordingProvider()
+    advisor = GeminiFinancialAdvisor(provider=provider)
+    first = asyncio.run(advisor.get_chat_response('How do I build an emergency fund?', 'alice', context()))
+    history = [ChatMessage(content='How do I build an emergency fund?', role='user', timestamp=None),
+               ChatMessage(content=first['response'], role='assistant', timestamp=None)]
+    asyncio.run(advisor.get_chat_response('And where should I keep it?', 'alice', context(), history))
+    assert len(provider.sessions[-1].history) == 4
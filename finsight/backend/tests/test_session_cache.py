@@ -0,0 +1,71 @@
+"""Tests for the bounded, idle-expiring store of live chat sessions"""
+
+import pytest
+
+import session_cache
+from session_cache import ChatSessionCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(session_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+class FakeSession:
+    def __init__(self, history):
+        self.history = list(history)
+
+def cache(**settings):
+    return ChatSessionCache(FakeSession, **settings)
+
+def test_returns_the_same_live_session(clock):
+    sessions = cache()
+    first = sessions.get('a')
+    assert sessions.get('a') is first
+    stats = sessions.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['resident_sessions'] == 1
+
+def test_least_recently_used_session_is_evicted(clock):
+    sessions = cache(max_sessions=2)
+    a = sessions.get('a')
+    sessions.get('b')
+    assert sessions.get('a') is a
+    sessions.get('c')  # evicts b
+    assert 'b' not in sessions and 'a' in sessions and 'c' in sessions
+    stats = sessions.get_stats()
+    assert stats['evicted'] == 1 and stats['resident_sessions'] == 2
+
+def test_idle_sessions_expire(clock):
+    sessions = cache(idle_ttl=60)
+    first = sessions.get('a')
+    sessions.get('b')
+    clock[0] += 40
+    sessions.get('b')
+    clock[0] += 30
+    assert 'a' not in sessions and 'b' in sessions
+    assert sessions.get('a') is not first
+    assert sessions.get_stats()['expired'] == 1
+
+def test_evicted_session_is_rehydrated_from_history(clock):
+    sessions = cache(max_sessions=1)
+    sessions.get('a')
+    sessions.get('b')
+    history = [{'role': 'user', 'parts': ['Hi']}, {'role': 'model', 'parts': ['Héllo']}]
+    rebuilt = sessions.get('a', history, tokens=3)
+    assert rebuilt.history == history
+    assert sessions.tokens('a') == 3
+    stats = sessions.get_stats()
+    assert stats['rehydrated'] == 1 and stats['resident_bytes'] == len('Hi') + len('Héllo'.encode('utf-8'))
+
+def test_record_and_discard_track_resident_history(clock):
+    sessions = cache()
+    sessions.get('a')
+    sessions.get('b')
+    sessions.record('a', 120, tokens=30)
+    sessions.record('b', 80, tokens=20)
+    sessions.record('missing', 999)
+    assert sessions.get_stats()['resident_bytes'] == 200
+    assert sessions.tokens('a') == 30 and sessions.tokens('missing') == 0
+    sessions.discard('a')
+    assert sessions.get_stats()['resident_bytes'] == 80
+    assert sessions.tokens('a') == 0
@@ -0,0 +1,54 @@
+"""Tests for statement imports and duplicate detection"""
+
+import time
+
+import pytest
+
+from db_connection import ConnectionManager
+from statement_importer import StatementImporter
+
+def write_statement(path, rows):
+    path.write_text('Date,Description,Amount\n' + ''.join(f'{d},{desc},{amount}\n' for d, desc, amount in rows))
+    return str(path)
+
+def wait_for(importer, *jobs):
+    deadline = time.monotonic() + 10
+    while any(importer.get_job(job.job_id).status in ('queued', 'running') for job in jobs):
+        assert time.monotonic() < deadline, 'import did not finish'
+        time.sleep(0.01)
+    return [importer.get_job(job.job_id) for job in jobs]
+
+@pytest.fixture
+def importer(migrated_db, tmp_path):
+    manager = ConnectionManager(str(tmp_path / 'finsight.db'))
+    importer = StatementImporter(manager, chunk_size=7)
+    yield importer
+    manager.close_all()
+
+def count_rows(conn):
+    return conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+
+STATEMENT = [(f'2025-05-{day % 28 + 1:02d}', f'shop {day % 9}', f'-{day % 13 + 1}.50') for day in range(60)]
+
+def test_repeated_rows_in_one_statement_are_kept(importer, migrated_db, tmp_path):
+    path = write_statement(tmp_path / 'a.csv', [('2025-05-01', 'coffee', '-3.00')] * 3)
+    job, = wait_for(importer, importer.submit(path, 1, 'a.csv', delete_after=False))
+    assert (job.inserted, job.duplicates) == (3, 0)
+    assert count_rows(migrated_db) == 3
+
+def test_reimporting_a_statement_inserts_nothing(importer, migrated_db, tmp_path):
+    path = write_statement(tmp_path / 'a.csv', STATEMENT)
+    wait_for(importer, importer.submit(path, 1, 'a.csv', delete_after=False))
+    job, = wait_for(importer, importer.submit(path, 1, 'a.csv', delete_after=False))
+    assert (job.inserted, job.duplicates) == (0, len(STATEMENT))
+    assert count_rows(migrated_db) == len(STATEMENT)
+
+def test_concurrent_imports_of_the_same_statement_insert_it_once(importer, migrated_db, tmp_path):
+    # Repeated fingerprints spread across chunks, imported by both workers at once
+    rows = STATEMENT + [('2025-05-01', 'coffee', '-3.00')] * 3 + STATEMENT[:10]
+    first = write_statement(tmp_path / 'a.csv', rows)
+    second = write_statement(tmp_path / 'b.csv', rows)
+    jobs = wait_for(importer, importer.submit(first, 1, 'a.csv'), importer.submit(second, 1, 'b.csv'))
+    assert all(job.status == 'completed' for job in jobs)
+    assert count_rows(migrated_db) == len(rows)
+    assert sum(job.inserted for job in jobs) == len(rows)
@@ -0,0 +1,118 @@
+"""Tests for transaction writes, monthly rollups and keyset pagination"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from transaction_store import (
+    get_month_totals, insert_transaction, insert_transactions, list_transactions, parse_amount_filter,
+    rebuild_rollups, update_rollup, validate_transaction
+)
+
+def raw_totals(conn, user_id, month):
+    """Month totals straight from the transaction rows"""
+    totals = {'income': 0, 'expense': 0}
+    for transaction_type, total in conn.execute('''
+        SELECT transaction_type, SUM(amount) FROM transactions
+        WHERE user_id = ? AND substr(date, 1, 7) = ? GROUP BY transaction_type
+    ''', (user_id, month)):
+        totals[transaction_type] = total
+    return totals
+
+def test_single_and_bulk_inserts_keep_rollups_in_sync(migrated_db):
+    insert_transaction(migrated_db, 1, 40.0, 'food', 'lunch', '2025-03-02 12:00:00', 'expense')
+    insert_transaction(migrated_db, 1, 2500.0, 'salary', 'pay', '2025-03-01 09:00:00', 'income')
+    insert_transactions(migrated_db, [
+        validate_transaction({'user_id': 1, 'amount': 10, 'category': 'food', 'transaction_type': 'expense',
+                              'date': f'2025-03-{day:02d}'})
+        for day in range(1, 11)
+    ])
+    assert get_month_totals(migrated_db, 1, '2025-03') == raw_totals(migrated_db, 1, '2025-03')
+    assert get_month_totals(migrated_db, 1, '2025-03') == {'income': 2500.0, 'expense': 140.0}
+    assert rebuild_rollups(migrated_db)['drifted_rows'] == 0
+
+def test_backing_a_row_out_returns_the_rollup_to_zero(migrated_db):
+    insert_transaction(migrated_db, 1, 40.0, 'food', 'lunch', '2025-03-02 12:00:00', 'expense')
+    update_rollup(migrated_db, 1, '2025-03-02 12:00:00', 'food', 'expense', -40.0, -1)
+    assert get_month_totals(migrated_db, 1, '2025-03') == {'income': 0, 'expense': 0}
+
+def test_rebuild_repairs_drifted_rollups(migrated_db):
+    insert_transaction(migrated_db, 1, 40.0, 'food', 'lunch', '2025-03-02 12:00:00', 'expense')
+    migrated_db.execute('UPDATE monthly_rollups SET total = 999')
+    assert rebuild_rollups(migrated_db)['drifted_rows'] == 1
+    assert get_month_totals(migrated_db, 1, '2025-03')['expense'] == 40.0
+
+def test_rebuild_skips_and_reports_rows_without_a_date_or_type(migrated_db):
+    insert_transaction(migrated_db, 1, 40.0, 'food', 'lunch', '2025-03-02 12:00:00', 'expense')
+    migrated_db.execute("INSERT INTO transactions (user_id, amount, category, date) VALUES (1, 5, 'food', NULL)")
+    migrated_db.execute("INSERT INTO transactions (user_id, amount, category, transaction_type) VALUES (2, 7, 'food', NULL)")
+    assert rebuild_rollups(migrated_db) == {'rollup_rows': 1, 'drifted_rows': 0, 'skipped_rows': 2}
+    assert rebuild_rollups(migrated_db, user_id=2)['skipped_rows'] == 1
+    assert get_month_totals(migrated_db, 1, '2025-03')['expense'] == 40.0
+
+def test_concurrent_writers_do_not_lose_rollup_updates(migrated_db, tmp_path):
+    path = str(tmp_path / 'finsight.db')
+
+    def writer():
+        conn = sqlite3.connect(path, timeout=10)
+        for _ in range(25):
+            with conn:
+                insert_transaction(conn, 7, 2.0, 'coffee', '', '2025-04-01 08:00:00', 'expense')
+        conn.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert get_month_totals(migrated_db, 7, '2025-04')['expense'] == 200.0
+    assert rebuild_rollups(migrated_db)['drifted_rows'] == 0
+
+def seed_listing(conn):
+    """45 transactions over 15 days, three per day sharing a timestamp"""
+    insert_transactions(conn, [
+        (1, float(amount), category, f'row {day}-{amount}', f'2025-06-{day:02d} 10:00:00', 'expense')
+        for day in range(1, 16) for amount, category in ((5, 'food'), (50, 'rent'), (500, 'food'))
+    ])
+    insert_transaction(conn, 2, 1.0, 'food', 'other user', '2025-06-10 10:00:00', 'expense')
+
+def walk(conn, **filters):
+    """Follow next cursors to the end, returning every row"""
+    rows, cursor = [], None
+    while True:
+        page, cursor = list_transactions(conn, 1, cursor=cursor, **filters)
+        rows.extend(page)
+        if cursor is None:
+            return rows
+
+def test_keyset_pages_cover_every_row_once_in_order(migrated_db):
+    seed_listing(migrated_db)
+    rows = walk(migrated_db, limit=4)
+    assert len(rows) == 45
+    assert len({row['id'] for row in rows}) == 45
+    assert [(row['date'], row['id']) for row in rows] == sorted(
+        ((row['date'], row['id']) for row in rows), reverse=True
+    )
+
+def test_keyset_pages_apply_filters(migrated_db):
+    seed_listing(migrated_db)
+    rows = walk(migrated_db, limit=7, category='food', min_amount=10, start_date='2025-06-05', end_date='2025-06-10')
+    assert [row['amount'] for row in rows] == [500.0] * 5
+    assert {row['date'][:10] for row in rows} == {f'2025-06-{day:02d}' for day in range(5, 10)}
+
+def test_last_page_has_no_cursor(migrated_db):
+    seed_listing(migrated_db)
+    page, cursor = list_transactions(migrated_db, 1, limit=45)
+    assert len(page) == 45 and cursor is None
+
+def test_bad_cursor_and_amounts_are_rejected(migrated_db):
+    with pytest.raises(ValueError):
+        list_transactions(migrated_db, 1, cursor='not-a-cursor')
+    with pytest.raises(ValueError, match='min_amount'):
+        parse_amount_filter('ten', 'min_amount')
+    for value in ('nan', 'inf', '-Infinity'):
+        with pytest.raises(ValueError, match='max_amount'):
+            parse_amount_filter(value, 'max_amount')
+    assert parse_amount_filter(None, 'min_amount') is None
+    assert parse_amount_filter('12.5', 'max_amount') == 12.5
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Transaction Storage Helpers for FinSight
+Date normalization, writes with rollup maintenance and query helpers for the raw-sqlite3 routes
+"""
+
+import base64
+import hashlib
+import math
+import re
+import sqlite3
+from collections import defaultdict
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Transaction dates are stored in SQLite's CURRENT_TIMESTAMP layout, which
+# sorts lexically in chronological order.
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+INSERT_TRANSACTION_SQL = '''
+    INSERT INTO transactions (user_id, amount, category, description, date, transaction_type, fingerprint)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPSERT_ROLLUP_SQL = '''
+    INSERT INTO monthly_rollups (user_id, month, category, transaction_type, total, txn_count)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, month, category, transaction_type) DO UPDATE SET
+        total = total + excluded.total,
+        txn_count = txn_count + excluded.txn_count
+'''
+
+REQUIRED_FIELDS = ('user_id', 'amount', 'category', 'transaction_type')
+VALID_TRANSACTION_TYPES = ('income', 'expense')
+
+def normalize_date(value: Optional[Union[str, datetime, date]] = None) -> str:
+    """Convert a date, datetime or ISO string to the sortable storage format"""
+    if value is None or value == '':
+        return datetime.now().strftime(DATE_FORMAT)
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).strftime(DATE_FORMAT)
+
+    text = str(value).strip()
+    if text.endswith('Z'):
+        text = text[:-1]
+    parsed = datetime.fromisoformat(text)
+    return parsed.strftime(DATE_FORMAT)
+
+def month_range(month: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Get the half-open [start, end) bounds for a 'YYYY-MM' month.
+
+    Comparing the date column against these bounds lets SQLite serve the
+    filter from an index, unlike a LIKE 'YYYY-MM%' pattern.
+    """
+    if month is None:
+        start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    else:
+        start = datetime.strptime(month, '%Y-%m')
+
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+
+    return start.strftime(DATE_FORMAT), end.strftime(DATE_FORMAT)
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+def normalize_description(description: Optional[str]) -> str:
+    """Lowercase a description and collapse punctuation and whitespace"""
+    return _NON_WORD.sub(' ', (description or '').lower()).strip()
+
+def transaction_fingerprint(user_id: int, stored_date: str, amount: float, description: Optional[str]) -> str:
+    """
+    Hash the fields that identify a duplicate transaction.
+
+    Only the day part of the date is used, since bank statements carry no
+    time of day, and the amount is compared to the cent.
+    """
+    key = f'{user_id}|{stored_date[:10]}|{round(float(amount), 2):.2f}|{normalize_description(description)}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def month_key(stored_date: str) -> str:
+    """Get the 'YYYY-MM' rollup key for a stored transaction date"""
+    return stored_date[:7]
+
+def update_rollup(
+    conn: sqlite3.Connection,
+    user_id: int,
+    stored_date: str,
+    category: str,
+    transaction_type: str,
+    amount: float,
+    count: int = 1
+):
+    """
+    Apply a delta to the monthly rollup row for a transaction.
+
+    Must run inside the same transaction as the write it mirrors. Edit and
+    delete paths pass a negative amount and count to back a row out.
+    """
+    conn.execute(UPSERT_ROLLUP_SQL, (
+        user_id, month_key(stored_date), category, transaction_type, amount, count
+    ))
+
+def insert_transaction(
+    conn: sqlite3.Connection,
+    user_id: int,
+    amount: float,
+    category: str,
+    description: str,
+    stored_date: str,
+    transaction_type: str
+) -> int:
+    """Insert a transaction and update its monthly rollup, returning the new id"""
+    cursor = conn.execute(INSERT_TRANSACTION_SQL, (
+        user_id, amount, category, description, stored_date, transaction_type,
+        transaction_fingerprint(user_id, stored_date, amount, description)
+    ))
+    update_rollup(conn, user_id, stored_date, category, transaction_type, amount)
+    return cursor.lastrowid
+
+def validate_transaction(data: Any) -> Tuple:
+    """
+    Validate a transaction payload and convert it to an insert row.
+
+    Raises ValueError with a client-facing message for invalid input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Row must be a JSON object')
+
+    missing = [field for field in REQUIRED_FIELDS if data.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    try:
+        user_id = int(data['user_id'])
+        amount = float(data['amount'])
+    except (TypeError, ValueError):
+        raise ValueError('user_id must be an integer and amount a number')
+
+    transaction_type = str(data['transaction_type'])
+    if transaction_type not in VALID_TRANSACTION_TYPES:
+        raise ValueError(f"transaction_type must be one of {', '.join(VALID_TRANSACTION_TYPES)}")
+
+    try:
+        stored_date = normalize_date(data.get('date'))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid date format, expected ISO 8601')
+
+    return (user_id, amount, str(data['category']), data.get('description') or '', stored_date, transaction_type)
+
+def insert_transactions(conn: sqlite3.Connection, rows: List[Tuple]) -> int:
+    """
+    Insert pre-validated rows with a single executemany and fold them into
+    the monthly rollups with one upsert per (user, month, category, type).
+
+    Rows are (user_id, amount, category, description, date, transaction_type)
+    tuples as returned by validate_transaction. The caller owns the transaction.
+    """
+    if not rows:
+        return 0
+
+    conn.executemany(INSERT_TRANSACTION_SQL, [
+        row + (transaction_fingerprint(row[0], row[4], row[1], row[3]),) for row in rows
+    ])
+
+    deltas: Dict[Tuple, List] = defaultdict(lambda: [0.0, 0])
+    for user_id, amount, category, _, stored_date, transaction_type in rows:
+        delta = deltas[(user_id, month_key(stored_date), category, transaction_type)]
+        delta[0] += amount
+        delta[1] += 1
+    conn.executemany(UPSERT_ROLLUP_SQL, [key + tuple(delta) for key, delta in deltas.items()])
+
+    return len(rows)
+
+def count_fingerprints(conn: sqlite3.Connection, user_id: int, fingerprints: List[str]) -> Dict[str, int]:
+    """Count a user's existing transactions for each fingerprint"""
+    counts: Dict[str, int] = {}
+    # Stay well below SQLite's bound-parameter limit
+    for start in range(0, len(fingerprints), 500):
+        batch = fingerprints[start:start + 500]
+        placeholders = ', '.join('?' * len(batch))
+        for fingerprint, count in conn.execute(f'''
+            SELECT fingerprint, COUNT(*) FROM transactions
+            WHERE user_id = ? AND fingerprint IN ({placeholders})
+            GROUP BY fingerprint
+        ''', (user_id, *batch)):
+            counts[fingerprint] = count
+    return counts
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(stored_date: str, transaction_id: int) -> str:
+    """Encode the (date, id) of the last row on a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(f'{stored_date}|{transaction_id}'.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a page cursor back into (date, id)"""
+    try:
+        stored_date, transaction_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return stored_date, int(transaction_id)
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+def parse_amount_filter(value: Optional[str], name: str) -> Optional[float]:
+    """Parse an optional amount bound from a query string, rejecting non-numbers, NaN and infinities"""
+    if value is None or value == '':
+        return None
+    try:
+        amount = float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+    # float() accepts 'nan' and 'inf', which would silently filter out every row
+    if not math.isfinite(amount):
+        raise ValueError(f'{name} must be a number')
+    return amount
+
+def list_transactions(
+    conn: sqlite3.Connection,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    category: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Get one page of a user's transactions, newest first.
+
+    Pages are keyed on (date, id) rather than OFFSET, so every page is an
+    index seek no matter how deep it is. The user, category/type and date
+    predicates are served by the (user_id, category|transaction_type, date)
+    indexes; amount bounds are applied to the rows the index yields.
+    start_date is inclusive and end_date exclusive.
+
+    Returns the rows and the cursor for the next page (None on the last page).
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    clauses = ['user_id = ?']
+    params: List[Any] = [user_id]
+
+    if category:
+        clauses.append('category = ?')
+        params.append(category)
+    if transaction_type:
+        clauses.append('transaction_type = ?')
+        params.append(transaction_type)
+    if min_amount is not None:
+        clauses.append('amount >= ?')
+        params.append(min_amount)
+    if max_amount is not None:
+        clauses.append('amount <= ?')
+        params.append(max_amount)
+    if start_date:
+        clauses.append('date >= ?')
+        params.append(normalize_date(start_date))
+    if end_date:
+        clauses.append('date < ?')
+        params.append(normalize_date(end_date))
+    if cursor:
+        clauses.append('(date, id) < (?, ?)')
+        params.extend(decode_cursor(cursor))
+
+    rows = conn.execute(f'''
+        SELECT id, amount, category, description, date, transaction_type
+        FROM transactions
+        WHERE {' AND '.join(clauses)}
+        ORDER BY date DESC, id DESC
+        LIMIT ?
+    ''', (*params, limit + 1)).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][4], rows[-1][0])
+
+    return [{
+        'id': row[0],
+        'amount': row[1],
+        'category': row[2],
+        'description': row[3],
+        'date': row[4],
+        'type': row[5]
+    } for row in rows], next_cursor
+
+def get_month_totals(conn: sqlite3.Connection, user_id: int, month: Optional[str] = None) -> Dict[str, float]:
+    """Get income and expense totals for a month from the rollup table"""
+    if month is None:
+        month = datetime.now().strftime('%Y-%m')
+
+    totals = {'income': 0, 'expense': 0}
+    for transaction_type, total in conn.execute('''
+        SELECT transaction_type, SUM(total) FROM monthly_rollups
+        WHERE user_id = ? AND month = ?
+        GROUP BY transaction_type
+    ''', (user_id, month)):
+        totals[transaction_type] = total or 0
+    return totals
+
+def rebuild_rollups(conn: sqlite3.Connection, user_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Reconcile monthly rollups from the raw transaction rows.
+
+    Returns how many rollup rows were out of sync before the rebuild, and
+    how many transactions were left out because they have no date or type
+    (legacy rows that no month or type rollup can hold).
+    """
+    user_filter = '' if user_id is None else 'WHERE user_id = ?'
+    user_and = '' if user_id is None else 'AND user_id = ?'
+    params = () if user_id is None else (user_id,)
+    aggregate = f'''
+        SELECT user_id, substr(date, 1, 7) AS month, category, transaction_type,
+               SUM(amount) AS total, COUNT(*) AS txn_count
+        FROM transactions
+        WHERE date IS NOT NULL AND transaction_type IS NOT NULL {user_and}
+        GROUP BY user_id, month, category, transaction_type
+    '''
+    skipped = conn.execute(f'''
+        SELECT COUNT(*) FROM transactions
+        WHERE (date IS NULL OR transaction_type IS NULL) {user_and}
+    ''', params).fetchone()[0]
+
+    drifted = conn.execute(f'''
+        SELECT COUNT(*) FROM ({aggregate}) AS fresh
+        LEFT JOIN monthly_rollups AS r
+        ON r.user_id = fresh.user_id AND r.month = fresh.month
+        AND r.category = fresh.category AND r.transaction_type = fresh.transaction_type
+        WHERE r.user_id IS NULL OR abs(r.total - fresh.total) > 0.005 OR r.txn_count != fresh.txn_count
+    ''', params).fetchone()[0]
+    drifted += conn.execute(f'''
+        SELECT COUNT(*) FROM monthly_rollups AS r
+        WHERE r.txn_count != 0 {user_and}
+        AND NOT EXISTS (
+            SELECT 1 FROM transactions AS t
+            WHERE t.user_id = r.user_id AND substr(t.date, 1, 7) = r.month
+            AND t.category = r.category AND t.transaction_type = r.transaction_type
+        )
+    ''', params).fetchone()[0]
+
+    conn.execute(f'DELETE FROM monthly_rollups {user_filter}', params)
+    conn.execute(f'''
+        INSERT INTO monthly_rollups (user_id, month, category, transaction_type, total, txn_count)
+        {aggregate}
+    ''', params)
+    rows = conn.execute(f'SELECT COUNT(*) FROM monthly_rollups {user_filter}', params).fetchone()[0]
+
+    return {'rollup_rows': rows, 'drifted_rows': drifted, 'skipped_rows': skipped}
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='FinSight transaction store maintenance')
+    parser.add_argument('command', choices=['rebuild-rollups'])
+    parser.add_argument('--db', default='finsight.db')
+    parser.add_argument('--user-id', type=int)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        with conn:
+            result = rebuild_rollups(conn, args.user_id)
+        print(f"✅ Rebuilt {result['rollup_rows']} rollup rows ({result['drifted_rows']} were out of sync)")
+        if result['skipped_rows']:
+            print(f"⚠️  Skipped {result['skipped_rows']} transactions without a date or type")
+    finally:
+        conn.close()